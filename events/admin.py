@@ -1,5 +1,7 @@
 from django.contrib import admin
-from .models import Event, Booking, Review
+from .models import (
+    ArchivedBooking, ArchivedEvent, ArchivedReview, Event, Booking, Review
+)
 from django_summernote.admin import SummernoteModelAdmin
 
 # Register your models here.
@@ -8,11 +10,15 @@ from django_summernote.admin import SummernoteModelAdmin
 class EventAdmin(SummernoteModelAdmin):
 
     list_display = ('id', 'event_name', 'event_date', 'event_organiser',
-                    'created_on', 'updated_on',)
+                    'created_on', 'updated_on', 'deleted_on',)
     search_fields = ['event_name']
     summernote_fields = ('long_description',)
     list_filter = ('event_organiser', 'event_date', 'created_on', 'updated_on')
 
+    def get_queryset(self, request):
+        # Shows deleted events until their purge has finished
+        return Event.all_objects.all()
+
 
 @admin.register(Booking)
 class BookingAdmin(SummernoteModelAdmin):
@@ -28,3 +34,27 @@ class ReviewAdmin(SummernoteModelAdmin):
     list_display = ('id', 'event', 'author', 'rating',)
     search_fields = ['author', 'event__event_name']
     list_filter = ('rating', 'author')
+
+
+@admin.register(ArchivedEvent)
+class ArchivedEventAdmin(admin.ModelAdmin):
+
+    list_display = ('id', 'event_name', 'event_date', 'event_organiser',
+                    'tickets_booked', 'archived_on',)
+    search_fields = ['event_name']
+    list_filter = ('event_date', 'archived_on')
+
+
+@admin.register(ArchivedBooking)
+class ArchivedBookingAdmin(admin.ModelAdmin):
+
+    list_display = ('id', 'event', 'tickets', 'ticketholder',)
+    search_fields = ['event__event_name', 'ticketholder__username']
+
+
+@admin.register(ArchivedReview)
+class ArchivedReviewAdmin(admin.ModelAdmin):
+
+    list_display = ('id', 'event', 'author', 'rating', 'approved',)
+    search_fields = ['author__username', 'event__event_name']
+    list_filter = ('rating', 'approved')
@@ -0,0 +1,412 @@
+import base64
+import binascii
+import hashlib
+import json
+from functools import wraps
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q, Sum
+from django.db.models.functions import Coalesce
+from django.http import Http404, HttpResponse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.dateparse import parse_datetime
+from django.utils.http import quote_etag
+from django.utils.timezone import is_naive, now
+from django.views.decorators.http import require_safe
+from .cache import get_event_or_404
+from .changes import (
+    CursorExpired, Position, check_synced_on, event_changes, start_positions
+)
+from .cdn import surrogate_keys
+from .models import Booking, Event, Review
+
+DEFAULT_EVENTS_API = {
+    'PAGE_SIZE': 20,
+    'MAX_PAGE_SIZE': 100,
+}
+
+
+def events_api_settings():
+    """
+    Returns the EVENTS_API setting merged over the defaults.
+    """
+    options = dict(DEFAULT_EVENTS_API)
+    options.update(getattr(settings, 'EVENTS_API', {}))
+    return options
+
+
+class ApiError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+class Field:
+    """
+    A field of an API object. ``columns`` are the model columns it reads,
+    so that a sparse fieldset only loads what it returns, and ``related``
+    names a relation to join for it.
+    """
+
+    def __init__(self, get, columns=(), related=None):
+        self.get = get
+        self.columns = columns
+        self.related = related
+
+
+def attribute(name):
+    return Field(lambda obj: getattr(obj, name), columns=(name,))
+
+
+EVENT_FIELDS = {
+    'id': Field(lambda event: event.pk),
+    'event_name': attribute('event_name'),
+    'event_date': attribute('event_date'),
+    'is_online': attribute('is_online'),
+    'url_or_address': attribute('url_or_address'),
+    'maximum_attendees': attribute('maximum_attendees'),
+    'tickets_booked': Field(lambda event: event.current_attendees),
+    'short_description': attribute('short_description'),
+    'long_description_html': attribute('long_description_html'),
+    'image': Field(lambda event: event.image_url(), columns=('image',)),
+    'event_organiser': Field(
+        lambda event: event.event_organiser.username,
+        columns=('event_organiser__username',),
+        related='event_organiser',
+    ),
+    'created_on': attribute('created_on'),
+    'updated_on': attribute('updated_on'),
+}
+
+BOOKING_FIELDS = {
+    'id': Field(lambda booking: booking.pk),
+    'event': Field(lambda booking: booking.event_id, columns=('event',)),
+    'event_name': Field(
+        lambda booking: booking.event.event_name,
+        columns=('event__event_name',),
+        related='event',
+    ),
+    'event_date': attribute('event_date'),
+    'tickets': attribute('tickets'),
+}
+
+REVIEW_FIELDS = {
+    'id': Field(lambda review: review.pk),
+    'author': Field(
+        lambda review: review.author.username,
+        columns=('author__username',),
+        related='author',
+    ),
+    'rating': attribute('rating'),
+    'content': attribute('content'),
+}
+
+
+def requested_fields(request, fields):
+    """
+    Returns the names of the fields picked with ``?fields=a,b``, or every
+    field when the parameter is left out.
+    """
+    value = request.GET.get('fields')
+    if not value:
+        return list(fields)
+    names = [name for name in value.split(',') if name]
+    unknown = [name for name in names if name not in fields]
+    if unknown:
+        raise ApiError(400, f'Unknown fields: {", ".join(unknown)}')
+    return names
+
+
+def select_fields(queryset, fields, names, extra=()):
+    """
+    Limits the queryset to the columns and joins the named fields need,
+    plus any ``extra`` columns.
+    """
+    related = {
+        fields[name].related for name in names if fields[name].related
+    }
+    columns = {column for name in names for column in fields[name].columns}
+    columns.update(extra)
+    if related:
+        queryset = queryset.select_related(*related)
+    return queryset.only(*columns) if columns else queryset.only('id')
+
+
+def serialize(obj, fields, names):
+    return {name: fields[name].get(obj) for name in names}
+
+
+def encode_cursor(values):
+    data = json.dumps(values, separators=(',', ':'))
+    return base64.urlsafe_b64encode(data.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor, length=2):
+    """
+    Returns the values encoded in an opaque cursor, raising ApiError for
+    anything this API didn't hand out.
+    """
+    try:
+        data = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        values = json.loads(data)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        values = None
+    if not isinstance(values, list) or len(values) != length:
+        raise ApiError(400, 'Invalid cursor')
+    return values
+
+
+def parse_cursor_date(value):
+    date = parse_datetime(value) if isinstance(value, str) else None
+    # Cursors handed out always carry an offset, and a naive date can't be
+    # compared with the aware ones it is checked against
+    if date is None or is_naive(date):
+        raise ApiError(400, 'Invalid cursor')
+    return date
+
+
+def encode_position(position):
+    changed_on = position.changed_on
+    return [changed_on and changed_on.isoformat(), position.pk]
+
+
+def decode_position(values):
+    if not isinstance(values, list) or len(values) != 2:
+        raise ApiError(400, 'Invalid cursor')
+    changed_on, pk = values
+    if not isinstance(pk, int):
+        raise ApiError(400, 'Invalid cursor')
+    if changed_on is None:
+        return Position(pk=pk)
+    return Position(parse_cursor_date(changed_on), pk)
+
+
+def page_size(request):
+    options = events_api_settings()
+    try:
+        limit = int(request.GET.get('limit', options['PAGE_SIZE']))
+    except ValueError:
+        raise ApiError(400, 'limit must be a number') from None
+    return max(1, min(limit, options['MAX_PAGE_SIZE']))
+
+
+def paginate(request, queryset, date_field=None):
+    """
+    Returns a page of the queryset after the request's cursor, along with
+    the cursor for the next page or None on the last one.
+
+    Pages are ordered by ``date_field`` and id and read with a keyset
+    condition instead of an offset, so every page costs the same however
+    deep a client goes and rows added meanwhile don't shift the pages.
+    """
+    ordering = [date_field, 'pk'] if date_field else ['pk']
+    queryset = queryset.order_by(*ordering)
+    cursor = request.GET.get('cursor')
+    if cursor:
+        after_date, after_pk = decode_cursor(cursor)
+        if not isinstance(after_pk, int):
+            raise ApiError(400, 'Invalid cursor')
+        if date_field:
+            after_date = parse_cursor_date(after_date)
+            queryset = queryset.filter(
+                Q(**{f'{date_field}__gt': after_date})
+                | Q(**{date_field: after_date, 'pk__gt': after_pk})
+            )
+        else:
+            queryset = queryset.filter(pk__gt=after_pk)
+    limit = page_size(request)
+    objects = list(queryset[:limit + 1])
+    if len(objects) <= limit:
+        return objects, None
+    objects = objects[:limit]
+    last = objects[-1]
+    after_date = None
+    if date_field:
+        # Full precision, DjangoJSONEncoder would cut the microseconds
+        after_date = getattr(last, date_field).isoformat()
+    return objects, encode_cursor([after_date, last.pk])
+
+
+def json_response(request, data, status=200):
+    """
+    Returns the data as compact JSON with an ETag, or an empty 304 when
+    the client already holds this exact body.
+    """
+    body = json.dumps(data, cls=DjangoJSONEncoder, separators=(',', ':'))
+    response = HttpResponse(
+        body, status=status, content_type='application/json'
+    )
+    if status != 200:
+        return response
+    etag = quote_etag(hashlib.md5(body.encode()).hexdigest())
+    response.headers['ETag'] = etag
+    return get_conditional_response(request, etag=etag, response=response)
+
+
+def api_view(view):
+    """
+    Decorator for read-only API views, turning ApiError and Http404 into
+    JSON error responses.
+    """
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        try:
+            return view(request, *args, **kwargs)
+        except ApiError as error:
+            return json_response(
+                request, {'error': error.message}, status=error.status
+            )
+        except Http404:
+            return json_response(
+                request, {'error': 'Not found'}, status=404
+            )
+    return require_safe(wrapper)
+
+
+@surrogate_keys('event-list')
+@api_view
+def event_list_api(request):
+    """
+    Returns upcoming events ordered by date, a page at a time. Past events
+    are included with ``?past=1``.
+    """
+    names = requested_fields(request, EVENT_FIELDS)
+    events = select_fields(Event.objects.all(), EVENT_FIELDS, names)
+    if request.GET.get('past') != '1':
+        events = events.filter(event_date__gte=now())
+    if 'tickets_booked' in names:
+        events = events.annotate(
+            tickets_booked=Coalesce(Sum('bookings__tickets'), 0)
+        )
+    events, next_cursor = paginate(request, events, 'event_date')
+    return json_response(request, {
+        'results': [
+            serialize(event, EVENT_FIELDS, names) for event in events
+        ],
+        'next': next_cursor,
+    })
+
+
+# Booking totals don't touch updated_on, so the feed can't report them
+CHANGE_FIELDS = {
+    name: field for name, field in EVENT_FIELDS.items()
+    if name != 'tickets_booked'
+}
+
+
+@api_view
+def event_changes_api(request):
+    """
+    Returns the events created, updated or deleted since the request's
+    cursor, oldest first and a batch at a time. Without a cursor every
+    event is returned once, starting a full sync. Clients keep the
+    ``next`` cursor for their next sync, and follow it straight away while
+    ``more`` is true.
+    """
+    names = requested_fields(request, CHANGE_FIELDS)
+    if 'id' not in names:
+        names.insert(0, 'id')
+    cursor = request.GET.get('cursor')
+    if cursor:
+        synced_on, event_position, tombstone_position = decode_cursor(
+            cursor, length=3
+        )
+        try:
+            check_synced_on(parse_cursor_date(synced_on))
+        except CursorExpired:
+            raise ApiError(
+                410, 'Cursor expired, sync again without a cursor'
+            ) from None
+        event_position = decode_position(event_position)
+        tombstone_position = decode_position(tombstone_position)
+    else:
+        event_position, tombstone_position = start_positions()
+    synced_on = now()
+    events = select_fields(
+        Event.all_objects.all(), CHANGE_FIELDS, names,
+        extra=('updated_on', 'deleted_on'),
+    )
+    (
+        changed, deleted, event_position, tombstone_position, more
+    ) = event_changes(
+        events, event_position, tombstone_position, page_size(request)
+    )
+    return json_response(request, {
+        'changed': [
+            serialize(event, CHANGE_FIELDS, names) for event in changed
+        ],
+        'deleted': deleted,
+        'next': encode_cursor([
+            synced_on.isoformat(),
+            encode_position(event_position),
+            encode_position(tombstone_position),
+        ]),
+        'more': more,
+    })
+
+
+@surrogate_keys('event-{event_id}')
+@api_view
+def event_detail_api(request, event_id):
+    """
+    Returns a single event, read through the event cache.
+    """
+    names = requested_fields(request, EVENT_FIELDS)
+    event = get_event_or_404(event_id)
+    if 'tickets_booked' in names:
+        event.tickets_booked = event.bookings.filter(
+            event_date=event.event_date
+        ).aggregate(total=Coalesce(Sum('tickets'), 0))['total']
+    return json_response(request, serialize(event, EVENT_FIELDS, names))
+
+
+@surrogate_keys('event-{event_id}')
+@api_view
+def event_reviews_api(request, event_id):
+    """
+    Returns the approved reviews of an event, a page at a time.
+    """
+    names = requested_fields(request, REVIEW_FIELDS)
+    event = get_event_or_404(event_id)
+    reviews = select_fields(
+        Review.objects.filter(event_id=event.pk, approved=True),
+        REVIEW_FIELDS,
+        names,
+    )
+    reviews, next_cursor = paginate(request, reviews)
+    return json_response(request, {
+        'results': [
+            serialize(review, REVIEW_FIELDS, names) for review in reviews
+        ],
+        'next': next_cursor,
+    })
+
+
+@api_view
+def booking_list_api(request):
+    """
+    Returns the signed in user's bookings ordered by event date, a page at
+    a time. Past bookings are included with ``?past=1``.
+    """
+    if not request.user.is_authenticated:
+        raise ApiError(401, 'Authentication required')
+    names = requested_fields(request, BOOKING_FIELDS)
+    bookings = select_fields(
+        Booking.objects.filter(ticketholder=request.user),
+        BOOKING_FIELDS,
+        names,
+    )
+    if request.GET.get('past') != '1':
+        bookings = bookings.filter(event_date__gte=now())
+    bookings, next_cursor = paginate(request, bookings, 'event_date')
+    response = json_response(request, {
+        'results': [
+            serialize(booking, BOOKING_FIELDS, names)
+            for booking in bookings
+        ],
+        'next': next_cursor,
+    })
+    patch_cache_control(response, private=True)
+    return response
@@ -0,0 +1,103 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Sum
+from django.utils import timezone
+from .deletion import delete_batch
+from .models import (
+    ArchivedBooking, ArchivedEvent, ArchivedReview, Booking, Event, Review
+)
+
+DEFAULT_EVENT_ARCHIVE = {
+    # Events move to the archive this many days after they took place
+    'AFTER_DAYS': 365,
+    'BATCH_SIZE': 1000,
+}
+
+# Event columns copied to ArchivedEvent as they are
+ARCHIVED_EVENT_FIELDS = (
+    'event_name',
+    'event_date',
+    'is_online',
+    'url_or_address',
+    'maximum_attendees',
+    'short_description',
+    'image',
+    'long_description',
+    'long_description_html',
+    'event_organiser_id',
+    'created_on',
+    'updated_on',
+)
+
+
+def event_archive_settings():
+    """
+    Returns the EVENT_ARCHIVE setting merged over the defaults.
+    """
+    options = dict(DEFAULT_EVENT_ARCHIVE)
+    options.update(getattr(settings, 'EVENT_ARCHIVE', {}))
+    return options
+
+
+def archive_cutoff():
+    return timezone.now() - timedelta(
+        days=event_archive_settings()['AFTER_DAYS']
+    )
+
+
+def events_to_archive():
+    """
+    Returns the events that took place before the retention horizon,
+    oldest first. Deleted events are left to their purge.
+    """
+    return Event.objects.filter(
+        event_date__lt=archive_cutoff()
+    ).order_by('event_date')
+
+
+def _copy(queryset, model, fields, batch_size):
+    rows = queryset.values_list('pk', *fields)
+    batch = []
+    for pk, *values in rows.iterator(chunk_size=batch_size):
+        batch.append(model(id=pk, **dict(zip(fields, values))))
+        if len(batch) == batch_size:
+            model.objects.bulk_create(batch)
+            batch = []
+    if batch:
+        model.objects.bulk_create(batch)
+
+
+@transaction.atomic
+def archive_event(event):
+    """
+    Moves an event with its bookings and reviews into the archive tables.
+    Everything happens in one transaction, so an event is never half
+    archived.
+    """
+    batch_size = event_archive_settings()['BATCH_SIZE']
+    bookings = Booking.all_objects.filter(event_id=event.pk)
+    reviews = Review.all_objects.filter(event_id=event.pk)
+    archived = ArchivedEvent.objects.create(
+        id=event.pk,
+        tickets_booked=bookings.aggregate(
+            total=Sum('tickets')
+        )['total'] or 0,
+        **{field: getattr(event, field) for field in ARCHIVED_EVENT_FIELDS},
+    )
+    _copy(
+        bookings, ArchivedBooking,
+        ('event_id', 'ticketholder_id', 'tickets'), batch_size,
+    )
+    _copy(
+        reviews, ArchivedReview,
+        ('event_id', 'author_id', 'rating', 'content', 'approved'),
+        batch_size,
+    )
+    for model in (Review, Booking):
+        while delete_batch(model, event.pk, batch_size):
+            pass
+    # Deleting the event itself invalidates its cached pages
+    event.delete()
+    return archived
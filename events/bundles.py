@@ -0,0 +1,116 @@
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.templatetags.static import static
+from django.utils.html import format_html, format_html_join
+
+# The stylesheets and scripts each bundle loads, in order. Sources without
+# a scheme are static files, and may be given as a dict to add attributes
+# such as integrity hashes.
+DEFAULT_STATIC_BUNDLES = {
+    # Loaded on every page by base.html
+    'base': {
+        'css': [
+            {
+                'href': 'https://cdn.jsdelivr.net/npm/bootstrap@5.3.6/dist/'
+                        'css/bootstrap.min.css',
+                'integrity': 'sha384-4Q6Gf2aSP4eDXB8Miphtr37CMZZQ5oXLH2yaXMJ2'
+                             'w8e2ZtHTl7GptT4jmndRuHDT',
+                'crossorigin': 'anonymous',
+            },
+            'css/style.css',
+        ],
+        'js': [
+            {
+                'src': 'https://cdn.jsdelivr.net/npm/bootstrap@5.3.6/dist/'
+                       'js/bootstrap.bundle.min.js',
+                'integrity': 'sha384-j1CDi7MgGQ12Z7Qab0qlWQ/Qqz24Gc6BM0thvEMV'
+                             'jHnfYGF0rmFCozFSxQBxwHKO',
+                'crossorigin': 'anonymous',
+            },
+            'js/tooltips.js',
+        ],
+    },
+    # Date and time pickers on the create and edit event forms
+    'datepicker': {
+        'css': [
+            'https://cdn.jsdelivr.net/npm/flatpickr/dist/flatpickr.min.css',
+        ],
+        'js': [
+            'https://cdn.jsdelivr.net/npm/flatpickr',
+            'https://cdn.jsdelivr.net/npm/flatpickr/dist/l10n/us.js',
+            'js/datepicker.js',
+        ],
+    },
+    # Star icons for review ratings
+    'ratings': {
+        'js': ['js/ratings.js'],
+    },
+    # Delete confirmation modals
+    'confirm-delete': {
+        'js': ['js/confirm-delete.js'],
+    },
+    # Attendee list loaded on demand on the event page
+    'attendees': {
+        'js': ['js/attendees.js'],
+    },
+}
+
+
+def static_bundles():
+    """
+    Returns the STATIC_BUNDLES setting merged over the default bundles.
+    """
+    bundles = dict(DEFAULT_STATIC_BUNDLES)
+    bundles.update(getattr(settings, 'STATIC_BUNDLES', {}))
+    return bundles
+
+
+def _attributes(source, url_attribute):
+    if isinstance(source, str):
+        source = {url_attribute: source}
+    attributes = dict(source)
+    url = attributes[url_attribute]
+    if '://' not in url:
+        attributes[url_attribute] = static(url)
+    return attributes
+
+
+def _render_tag(template, attributes):
+    return format_html(
+        template,
+        format_html_join(
+            '', ' {}="{}"', attributes.items()
+        ),
+    )
+
+
+@lru_cache(maxsize=None)
+def render_bundles(names):
+    """
+    Returns the link and script tags for the named bundles, stylesheets
+    first. Scripts are deferred so they download alongside the page and
+    run in order once it has been parsed. Rendered tags are memoized, as
+    bundles only change with settings and static files.
+    """
+    bundles = static_bundles()
+    stylesheets, scripts = [], []
+    for name in names:
+        stylesheets += bundles[name].get('css', [])
+        scripts += bundles[name].get('js', [])
+    tags = [
+        _render_tag('<link rel="stylesheet"{}>', _attributes(source, 'href'))
+        for source in stylesheets
+    ] + [
+        _render_tag('<script defer{}></script>', _attributes(source, 'src'))
+        for source in scripts
+    ]
+    return format_html_join('\n', '{}', ((tag,) for tag in tags))
+
+
+@receiver(setting_changed)
+def reset_rendered_bundles(setting, **kwargs):
+    if setting in ('STATIC_BUNDLES', 'STATIC_URL', 'STORAGES'):
+        render_bundles.cache_clear()
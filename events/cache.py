@@ -0,0 +1,626 @@
+import copy
+import hashlib
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.filebased import FileBasedCache
+from django.core.paginator import Paginator
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.http import Http404
+from django.shortcuts import get_object_or_404
+from django.utils.module_loading import import_string
+
+from .models import Event
+
+DEFAULT_EVENT_CACHE = {
+    'ENABLED': True,
+    'CACHE_ALIAS': 'default',
+    'LOCAL_MAX_ENTRIES': 256,
+    'LOCAL_TTL': 30,
+    'SHARED_TTL': 300,
+    'BROKER': 'events.cache.CacheBroker',
+    'BROKER_POLL_INTERVAL': 1,
+    'STATS_PUBLISH_EVERY': 100,
+    'PAGE_TTL': 60,
+    'PAGE_STALE_TTL': 300,
+    'REBUILD_LOCK_TIMEOUT': 10,
+    'REBUILD_WAIT': 2,
+    'NEGATIVE_TTL': 30,
+    # Remembered missing ids are many, small and short lived, so they can
+    # be kept apart from the event objects to stop them pushing those out.
+    # None keeps them in CACHE_ALIAS.
+    'NEGATIVE_CACHE_ALIAS': None,
+    # Directory of the lock files taken with FileBasedCache, shared by the
+    # workers on a machine
+    'LOCK_DIR': os.path.join(tempfile.gettempdir(), 'ourglass_locks'),
+}
+
+_MISSING = object()
+
+
+def event_cache_settings():
+    """
+    Returns the EVENT_CACHE setting merged over the defaults.
+    """
+    options = dict(DEFAULT_EVENT_CACHE)
+    options.update(getattr(settings, 'EVENT_CACHE', {}))
+    return options
+
+
+class LocalLRUCache:
+    """
+    A small, thread-safe, per-process cache that evicts the least recently
+    used entry once it holds ``max_entries`` items. Entries expire after
+    ``ttl`` seconds regardless of how often they are read.
+    """
+
+    def __init__(self, max_entries=256, ttl=30):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key, default=_MISSING):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return default
+            expires_at, value = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                return default
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+class LocalBroker:
+    """
+    In-process publish/subscribe channel. Messages are only delivered to
+    subscribers living in the same process, which is enough for a single
+    worker or for tests.
+    """
+
+    def __init__(self, **options):
+        self._subscribers = []
+
+    def subscribe(self, callback):
+        self._subscribers.append(callback)
+
+    def publish(self, message):
+        self._deliver(message)
+
+    def poll(self):
+        pass
+
+    def _deliver(self, message):
+        for callback in self._subscribers:
+            callback(message)
+
+
+class CacheBroker(LocalBroker):
+    """
+    Publish/subscribe stand-in that lets every gunicorn worker see the
+    invalidations published by the others, using nothing more than the
+    shared cache backend.
+
+    Publishing appends the message to a numbered log in the shared cache.
+    Each worker polls the log sequence at most once per ``poll_interval``
+    seconds and replays anything it has not seen yet. If the log has moved
+    on too far, or entries have expired, subscribers receive ``RESET`` and
+    should drop everything they hold.
+
+    The cache's add() and incr() aren't atomic on FileBasedCache, so
+    appending is serialised with acquire_lock(), and the message is written
+    before the sequence moves on to it. A publisher that can't take the
+    lock within ``lock_wait`` seconds appends anyway, so delivery stays
+    best-effort: a message lost in that race leaves other workers serving
+    the old event until their local copy expires after LOCAL_TTL.
+    """
+
+    RESET = '*'
+    KEY_PREFIX = 'events:broker'
+
+    def __init__(self, cache_alias='default', poll_interval=1,
+                 max_backlog=500, message_ttl=600, lock_wait=1,
+                 **options):
+        super().__init__(**options)
+        self.cache = caches[cache_alias]
+        self.poll_interval = poll_interval
+        self.max_backlog = max_backlog
+        self.message_ttl = message_ttl
+        self.lock_wait = lock_wait
+        self._last_seq = None
+        self._next_poll = 0
+        self._lock = threading.Lock()
+
+    @property
+    def _seq_key(self):
+        return f'{self.KEY_PREFIX}:seq'
+
+    def _message_key(self, seq):
+        return f'{self.KEY_PREFIX}:msg:{seq}'
+
+    @property
+    def _lock_key(self):
+        return f'{self.KEY_PREFIX}:lock'
+
+    def _append(self, message):
+        seq = self.cache.get(self._seq_key, 0) + 1
+        self.cache.set(
+            self._message_key(seq), message, timeout=self.message_ttl
+        )
+        self.cache.set(self._seq_key, seq, timeout=None)
+
+    def _wait_for_lock(self):
+        deadline = time.monotonic() + self.lock_wait
+        while not acquire_lock(self.cache, self._lock_key, 10):
+            if time.monotonic() >= deadline:
+                return False
+            time.sleep(0.01)
+        return True
+
+    def publish(self, message):
+        locked = self._wait_for_lock()
+        try:
+            self._append(message)
+        finally:
+            if locked:
+                release_lock(self.cache, self._lock_key)
+        self._deliver(message)
+
+    def poll(self):
+        now = time.monotonic()
+        if now < self._next_poll:
+            return
+        with self._lock:
+            self._next_poll = now + self.poll_interval
+            seq = self.cache.get(self._seq_key, 0)
+            last_seq, self._last_seq = self._last_seq, seq
+        if last_seq is None or seq == last_seq:
+            return
+        if seq < last_seq or seq - last_seq > self.max_backlog:
+            self._deliver(self.RESET)
+            return
+        keys = [self._message_key(n) for n in range(last_seq + 1, seq + 1)]
+        found = self.cache.get_many(keys)
+        if len(found) != len(keys):
+            self._deliver(self.RESET)
+            return
+        for key in keys:
+            self._deliver(found[key])
+
+
+class EventRepository:
+    """
+    Two-tier read-through cache for Event objects. Lookups go to the
+    per-worker LRU first, then the shared cache backend, and only then the
+    database. Invalidations are published through the broker so that every
+    worker drops its local copy.
+    """
+
+    def __init__(self, enabled=True, cache_alias='default',
+                 local_max_entries=256, local_ttl=30, shared_ttl=300,
+                 negative_ttl=30, broker=None, stats_publish_every=100,
+                 negative_cache_alias=None):
+        self.enabled = enabled
+        self.shared = caches[cache_alias]
+        self.negative = caches[negative_cache_alias or cache_alias]
+        self.shared_ttl = shared_ttl
+        self.negative_ttl = negative_ttl
+        self.local = LocalLRUCache(local_max_entries, local_ttl)
+        self.broker = broker or LocalBroker()
+        self.broker.subscribe(self._on_message)
+        self.stats_publish_every = stats_publish_every
+        self._counts = {
+            'local_hits': 0, 'shared_hits': 0, 'negative_hits': 0,
+            'misses': 0,
+        }
+
+    @staticmethod
+    def shared_key(event_id):
+        return f'events:event:{event_id}'
+
+    def get(self, event_id):
+        """
+        Returns the Event with the given id, raising Event.DoesNotExist if
+        there isn't one. Callers always receive their own copy, so mutating
+        the result never leaks into the cache. Ids that recently turned out
+        not to exist are rejected without a query.
+        """
+        event_id = int(event_id)
+        if not self.enabled:
+            return Event.objects.get(pk=event_id)
+        self.broker.poll()
+        event = self.local.get(event_id)
+        if event is not _MISSING:
+            self._count('local_hits')
+            return copy.copy(event)
+        shared_key = self.shared_key(event_id)
+        negative_key = missing_key(Event, event_id)
+        if self.negative is self.shared:
+            found = self.shared.get_many([shared_key, negative_key])
+        else:
+            found = self.shared.get_many([shared_key])
+            if not found:
+                found = self.negative.get_many([negative_key])
+        if shared_key in found:
+            event = found[shared_key]
+            self._count('shared_hits')
+            self.local.set(event_id, event)
+            return copy.copy(event)
+        if negative_key in found:
+            self._count('negative_hits')
+            raise Event.DoesNotExist
+        self._count('misses')
+        try:
+            event = Event.objects.get(pk=event_id)
+        except Event.DoesNotExist:
+            self.negative.set(negative_key, True, self.negative_ttl)
+            raise
+        self.shared.set(self.shared_key(event_id), event, self.shared_ttl)
+        self.local.set(event_id, event)
+        return copy.copy(event)
+
+    def invalidate(self, event_id):
+        """
+        Removes an event from the shared cache and tells every worker to
+        drop its local copy.
+        """
+        if not self.enabled:
+            return
+        self.shared.delete(self.shared_key(event_id))
+        self.broker.publish(int(event_id))
+
+    def _on_message(self, message):
+        if message == CacheBroker.RESET:
+            self.local.clear()
+        else:
+            self.local.delete(message)
+
+    def _count(self, name):
+        self._counts[name] += 1
+        lookups = sum(self._counts.values())
+        if (
+            self.stats_publish_every
+            and lookups % self.stats_publish_every == 0
+        ):
+            self.publish_stats()
+
+    def stats(self):
+        """
+        Returns hit and miss counts for this worker along with the overall
+        and per-tier hit ratios.
+        """
+        counts = dict(self._counts)
+        lookups = sum(counts.values())
+        hits = (
+            counts['local_hits'] + counts['shared_hits']
+            + counts['negative_hits']
+        )
+        counts.update({
+            'lookups': lookups,
+            'hit_ratio': hits / lookups if lookups else 0.0,
+            'local_hit_ratio': (
+                counts['local_hits'] / lookups if lookups else 0.0
+            ),
+            'local_entries': len(self.local),
+        })
+        return counts
+
+    def publish_stats(self):
+        """
+        Stores this worker's stats in the shared cache so they can be
+        gathered with the event_cache_stats management command.
+        """
+        self.shared.set(
+            f'events:stats:{os.getpid()}', self.stats(), self.shared_ttl
+        )
+        pids = set(self.shared.get('events:stats:pids', []))
+        if os.getpid() not in pids:
+            pids.add(os.getpid())
+            self.shared.set('events:stats:pids', sorted(pids), None)
+
+
+_repository = None
+_repository_lock = threading.Lock()
+
+
+def get_event_repository():
+    """
+    Returns the process-wide EventRepository, building it from the
+    EVENT_CACHE setting on first use.
+    """
+    global _repository
+    if _repository is None:
+        with _repository_lock:
+            if _repository is None:
+                options = event_cache_settings()
+                broker = import_string(options['BROKER'])(
+                    cache_alias=options['CACHE_ALIAS'],
+                    poll_interval=options['BROKER_POLL_INTERVAL'],
+                )
+                _repository = EventRepository(
+                    enabled=options['ENABLED'],
+                    cache_alias=options['CACHE_ALIAS'],
+                    local_max_entries=options['LOCAL_MAX_ENTRIES'],
+                    local_ttl=options['LOCAL_TTL'],
+                    shared_ttl=options['SHARED_TTL'],
+                    negative_ttl=options['NEGATIVE_TTL'],
+                    broker=broker,
+                    stats_publish_every=options['STATS_PUBLISH_EVERY'],
+                    negative_cache_alias=options['NEGATIVE_CACHE_ALIAS'],
+                )
+    return _repository
+
+
+@receiver(setting_changed)
+def reset_event_repository(setting, **kwargs):
+    """
+    Rebuilds the repository when tests override the cache settings.
+    """
+    global _repository
+    if setting in ('EVENT_CACHE', 'CACHES'):
+        _repository = None
+
+
+def missing_key(model, object_id):
+    return f'events:missing:{model._meta.model_name}:{int(object_id)}'
+
+
+def negative_cache(options):
+    return caches[options['NEGATIVE_CACHE_ALIAS'] or options['CACHE_ALIAS']]
+
+
+def forget_missing(model, object_id):
+    """
+    Clears a remembered missing id, used once an object with that id has
+    been created.
+    """
+    options = event_cache_settings()
+    if options['ENABLED']:
+        negative_cache(options).delete(missing_key(model, object_id))
+
+
+def get_object_or_404_cached(model, object_id):
+    """
+    Works like get_object_or_404 for a lookup by id, but remembers ids that
+    don't exist for NEGATIVE_TTL seconds so that repeated requests for them
+    are turned away without a query.
+    """
+    options = event_cache_settings()
+    if not options['ENABLED']:
+        return get_object_or_404(model, id=object_id)
+    cache = negative_cache(options)
+    key = missing_key(model, object_id)
+    if cache.get(key):
+        raise Http404(f'No {model._meta.object_name} matches the given query.')
+    try:
+        return get_object_or_404(model, id=object_id)
+    except Http404:
+        cache.set(key, True, options['NEGATIVE_TTL'])
+        raise
+
+
+def get_event_or_404(event_id):
+    """
+    Returns the event for the id through the repository, raising Http404 if
+    it doesn't exist.
+    """
+    try:
+        return get_event_repository().get(event_id)
+    except Event.DoesNotExist:
+        raise Http404('No Event matches the given query.')
+
+
+def _lock_file(key):
+    name = hashlib.md5(key.encode()).hexdigest()
+    return os.path.join(event_cache_settings()['LOCK_DIR'], f'{name}.lock')
+
+
+def acquire_lock(cache, key, timeout):
+    """
+    Takes a lock shared by every worker using the cache, which expires
+    after ``timeout`` seconds, and returns whether it was taken.
+
+    FileBasedCache implements add() as a check followed by a write, so two
+    workers could both take the same lock. With that backend the lock is a
+    file in LOCK_DIR created with O_EXCL instead, which is atomic. Other
+    backends' add() is atomic already.
+    """
+    if not isinstance(cache, FileBasedCache):
+        return cache.add(key, True, timeout)
+    path = _lock_file(key)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    for attempt in range(2):
+        try:
+            os.close(os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+            return True
+        except FileExistsError:
+            pass
+        try:
+            # A worker that died while holding the lock never removes it
+            if time.time() - os.path.getmtime(path) < timeout:
+                return False
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+    return False
+
+
+def release_lock(cache, key):
+    if not isinstance(cache, FileBasedCache):
+        cache.delete(key)
+        return
+    try:
+        os.remove(_lock_file(key))
+    except FileNotFoundError:
+        pass
+
+
+_flights = {}
+_flights_lock = threading.Lock()
+
+
+@contextmanager
+def _flight(key):
+    """
+    Lets one thread of this worker at a time rebuild ``key``. This only
+    helps threaded workers, coalescing between workers rests on the shared
+    lock. Entries are dropped once no thread waits on them, so arbitrary
+    search queries don't grow the map.
+    """
+    with _flights_lock:
+        entry = _flights.setdefault(key, [threading.Lock(), 0])
+        entry[1] += 1
+    try:
+        with entry[0]:
+            yield
+    finally:
+        with _flights_lock:
+            entry[1] -= 1
+            if not entry[1]:
+                del _flights[key]
+
+
+def get_or_rebuild(key, rebuild, timeout=None, stale_timeout=None):
+    """
+    Returns the cached value for key, calling ``rebuild`` to produce it
+    when needed while making sure only one request rebuilds at a time.
+
+    Values are fresh for ``timeout`` seconds and can then be served stale
+    for ``stale_timeout`` more. The first request to find a stale value
+    rebuilds it while the others keep getting the stale copy. When there is
+    no value at all, other requests wait up to REBUILD_WAIT seconds for the
+    rebuilding request instead of all hitting the database at once.
+    """
+    options = event_cache_settings()
+    if not options['ENABLED']:
+        return rebuild()
+    cache = caches[options['CACHE_ALIAS']]
+    timeout = options['PAGE_TTL'] if timeout is None else timeout
+    if stale_timeout is None:
+        stale_timeout = options['PAGE_STALE_TTL']
+    lock_key = f'{key}:rebuilding'
+
+    def store():
+        value = rebuild()
+        cache.set(
+            key,
+            {'value': value, 'fresh_until': time.time() + timeout},
+            timeout + stale_timeout,
+        )
+        return value
+
+    envelope = cache.get(key)
+    if envelope is not None:
+        if envelope['fresh_until'] > time.time():
+            return envelope['value']
+        if not acquire_lock(
+            cache, lock_key, options['REBUILD_LOCK_TIMEOUT']
+        ):
+            return envelope['value']
+        try:
+            return store()
+        finally:
+            release_lock(cache, lock_key)
+
+    # Threads in this worker queue up here, so only one of them asks the
+    # shared cache for the rebuild lock.
+    with _flight(key):
+        envelope = cache.get(key)
+        if envelope is not None:
+            return envelope['value']
+        if acquire_lock(cache, lock_key, options['REBUILD_LOCK_TIMEOUT']):
+            try:
+                return store()
+            finally:
+                release_lock(cache, lock_key)
+        deadline = time.monotonic() + options['REBUILD_WAIT']
+        while time.monotonic() < deadline:
+            time.sleep(0.05)
+            envelope = cache.get(key)
+            if envelope is not None:
+                return envelope['value']
+        return rebuild()
+
+
+def event_detail_key(event_id):
+    return f'events:detail:{int(event_id)}'
+
+
+LIST_GENERATION_KEY = 'events:list-generation'
+
+
+def list_generation():
+    """
+    Returns the current generation of cached event lists. Bumping it makes
+    every latest-events and search results entry unreachable.
+
+    Generations are timestamps rather than a counter, so one culled from
+    the cache is replaced by a new one instead of going back to a number
+    whose old lists may still be cached.
+    """
+    cache = caches[event_cache_settings()['CACHE_ALIAS']]
+    generation = cache.get(LIST_GENERATION_KEY)
+    if generation is None:
+        new_generation = time.time_ns()
+        cache.add(LIST_GENERATION_KEY, new_generation, timeout=None)
+        generation = cache.get(LIST_GENERATION_KEY, new_generation)
+    return generation
+
+
+def bump_list_generation():
+    # A plain set, as add() then incr() isn't atomic on FileBasedCache
+    caches[event_cache_settings()['CACHE_ALIAS']].set(
+        LIST_GENERATION_KEY, time.time_ns(), timeout=None
+    )
+
+
+def invalidate_event_pages(event_id):
+    """
+    Drops the cached detail page context for an event along with every
+    cached event list.
+    """
+    options = event_cache_settings()
+    if not options['ENABLED']:
+        return
+    caches[options['CACHE_ALIAS']].delete(event_detail_key(event_id))
+    bump_list_generation()
+
+
+class PrecountedPaginator(Paginator):
+    """
+    Paginator for a page of objects whose total count was cached alongside
+    it, so rendering the page controls doesn't need a COUNT query.
+    """
+
+    def __init__(self, count, per_page):
+        super().__init__([], per_page)
+        self.count = count
@@ -0,0 +1,146 @@
+import urllib.request
+from functools import wraps
+
+from django.conf import settings
+from django.utils.cache import patch_cache_control
+from django.utils.module_loading import import_string
+from jobs.queue import enqueue, task
+
+DEFAULT_CDN = {
+    'BACKEND': 'events.cdn.NullPurger',
+    # Browsers revalidate every time, the CDN keeps pages until purged or
+    # S_MAXAGE runs out
+    'MAX_AGE': 0,
+    'S_MAXAGE': 300,
+    'STALE_WHILE_REVALIDATE': 60,
+    'HEADER': 'Surrogate-Key',
+    # Used by HTTPPurger
+    'PURGE_URL': None,
+    'PURGE_HEADERS': {},
+    'PURGE_TIMEOUT': 2,
+}
+
+
+def cdn_settings():
+    """
+    Returns the CDN setting merged over the defaults.
+    """
+    options = dict(DEFAULT_CDN)
+    options.update(getattr(settings, 'CDN', {}))
+    return options
+
+
+def event_key(event_id):
+    return f'event-{event_id}'
+
+
+EVENT_LIST_KEY = 'event-list'
+
+
+def surrogate_keys(*keys):
+    """
+    Decorator for read-only views whose anonymous responses can be cached
+    by the CDN. Keys are formatted with the view's keyword arguments, e.g.
+    ``@surrogate_keys('event-{event_id}')``.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            response = view(request, *args, **kwargs)
+            response.surrogate_keys = [key.format(**kwargs) for key in keys]
+            return response
+        return wrapper
+    return decorator
+
+
+class CDNCacheMiddleware:
+    """
+    Makes responses from views decorated with surrogate_keys cacheable by
+    the CDN, tagged with their keys. Only successful responses to anonymous
+    GETs that set no cookies qualify, so pages carrying flash messages,
+    CSRF tokens or session changes are never shared. Has to sit above the
+    session, CSRF and messages middleware to see their cookies.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        keys = getattr(response, 'surrogate_keys', None)
+        if not keys or response.has_header('Cache-Control'):
+            return response
+        user = getattr(request, 'user', None)
+        if (
+            request.method in ('GET', 'HEAD')
+            and response.status_code == 200
+            and not response.cookies
+            and not (user and user.is_authenticated)
+        ):
+            options = cdn_settings()
+            patch_cache_control(
+                response,
+                public=True,
+                max_age=options['MAX_AGE'],
+                s_maxage=options['S_MAXAGE'],
+                stale_while_revalidate=options['STALE_WHILE_REVALIDATE'],
+            )
+            response[options['HEADER']] = ' '.join(keys)
+        else:
+            patch_cache_control(response, private=True)
+        return response
+
+
+class NullPurger:
+    """
+    Purger for when there is no CDN in front of the site.
+    """
+
+    def purge(self, keys):
+        pass
+
+
+class HTTPPurger:
+    """
+    Purges by surrogate key with a POST to PURGE_URL carrying the keys in
+    the surrogate key header, the form Fastly's purge API expects. Extra
+    headers such as API tokens come from PURGE_HEADERS.
+    """
+
+    def purge(self, keys):
+        options = cdn_settings()
+        request = urllib.request.Request(
+            options['PURGE_URL'],
+            method='POST',
+            headers={
+                options['HEADER']: ' '.join(keys),
+                **options['PURGE_HEADERS'],
+            },
+        )
+        with urllib.request.urlopen(
+            request, timeout=options['PURGE_TIMEOUT']
+        ) as response:
+            response.read()
+
+
+@task(priority=10)
+def purge(keys):
+    """
+    Purges the keys from the CDN. Failures raise, so the job is retried,
+    and pages stay cached until then or until S_MAXAGE runs out.
+    """
+    import_string(cdn_settings()['BACKEND'])().purge(sorted(set(keys)))
+
+
+def purge_on_commit(keys):
+    """
+    Queues a purge of the keys. The job becomes visible to the workers when
+    the current transaction commits, so the CDN can't fetch the old page
+    again before the change is visible.
+    """
+    if cdn_settings()['BACKEND'] == DEFAULT_CDN['BACKEND']:
+        return
+    keys = sorted(set(keys))
+    enqueue(
+        purge, args=[keys], idempotency_key='purge:' + ' '.join(keys)
+    )
@@ -0,0 +1,131 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+from .models import EventTombstone
+
+DEFAULT_EVENT_CHANGES = {
+    # Changes younger than this are left for the next sync, so a save
+    # that commits a moment after another with a later timestamp isn't
+    # skipped by a cursor that has already moved past it
+    'SETTLE_SECONDS': 5,
+    # Tombstones are kept this long, clients that haven't synced since
+    # have to start over
+    'TOMBSTONE_DAYS': 90,
+}
+
+
+def event_changes_settings():
+    """
+    Returns the EVENT_CHANGES setting merged over the defaults.
+    """
+    options = dict(DEFAULT_EVENT_CHANGES)
+    options.update(getattr(settings, 'EVENT_CHANGES', {}))
+    return options
+
+
+class CursorExpired(Exception):
+    pass
+
+
+class Position:
+    """
+    Where a sync has got to in one of the change streams: the timestamp
+    and id of the last row it returned, or the start of the stream.
+    """
+
+    def __init__(self, changed_on=None, pk=0):
+        self.changed_on = changed_on
+        self.pk = pk
+
+    def after(self, queryset, field):
+        """
+        Filters the queryset to the rows past this position, in the order
+        of the (field, id) index.
+        """
+        if self.changed_on is not None:
+            queryset = queryset.filter(
+                Q(**{f'{field}__gt': self.changed_on})
+                | Q(**{field: self.changed_on, 'pk__gt': self.pk})
+            )
+        return queryset.order_by(field, 'pk')
+
+
+def start_positions():
+    """
+    Returns the positions of a first sync: every event there is, and only
+    the tombstones of events removed while it runs.
+    """
+    return Position(), Position(settled_before())
+
+
+def settled_before():
+    return timezone.now() - timedelta(
+        seconds=event_changes_settings()['SETTLE_SECONDS']
+    )
+
+
+def check_synced_on(synced_on):
+    """
+    Raises CursorExpired when tombstones the client hasn't seen may have
+    been pruned since its last sync.
+    """
+    days = event_changes_settings()['TOMBSTONE_DAYS']
+    if synced_on < timezone.now() - timedelta(days=days):
+        raise CursorExpired
+
+
+def event_changes(events, event_position, tombstone_position, limit):
+    """
+    Returns up to ``limit`` changes after the two positions, oldest first,
+    as ``(changed_events, deleted_ids, event_position, tombstone_position,
+    more)``.
+
+    ``events`` is the Event queryset to read, so callers can limit its
+    columns. Each stream is read from its index after its own position, so
+    a sync costs as much as the changes since the last one whatever the
+    size of the catalogue. Events deleted but not yet purged count as
+    deleted.
+    """
+    settled = settled_before()
+    changed = event_position.after(
+        events.filter(updated_on__lt=settled), 'updated_on'
+    )[:limit + 1]
+    removed = tombstone_position.after(
+        EventTombstone.objects.filter(deleted_on__lt=settled), 'deleted_on'
+    )[:limit + 1]
+    merged = sorted(
+        [(event.updated_on, event) for event in changed]
+        + [(tombstone.deleted_on, tombstone) for tombstone in removed],
+        key=lambda change: change[0],
+    )
+    more = len(merged) > limit
+    changed_events = []
+    deleted_ids = []
+    for changed_on, row in merged[:limit]:
+        if isinstance(row, EventTombstone):
+            deleted_ids.append(row.event_id)
+            tombstone_position = Position(changed_on, row.pk)
+            continue
+        if row.deleted_on is None:
+            changed_events.append(row)
+        else:
+            deleted_ids.append(row.pk)
+        event_position = Position(changed_on, row.pk)
+    return (
+        changed_events, list(dict.fromkeys(deleted_ids)),
+        event_position, tombstone_position, more,
+    )
+
+
+def prune_tombstones():
+    """
+    Deletes tombstones older than TOMBSTONE_DAYS and returns how many.
+    """
+    days = event_changes_settings()['TOMBSTONE_DAYS']
+    deleted, _ = EventTombstone.objects.filter(
+        deleted_on__lt=timezone.now() - timedelta(days=days)
+    ).delete()
+    return deleted
+
@@ -0,0 +1,104 @@
+import logging
+import time
+
+from django.conf import settings
+from django.db import connections, router
+from django.utils import timezone
+from jobs.queue import Retry, enqueue, task
+from .models import Event, Booking, Review
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_EVENT_DELETION = {
+    'BATCH_SIZE': 500,
+    # Seconds a purge job runs before queuing the rest, so a large event
+    # doesn't hold up the other jobs
+    'TIME_LIMIT': 20,
+}
+
+
+def event_deletion_settings():
+    """
+    Returns the EVENT_DELETION setting merged over the defaults.
+    """
+    options = dict(DEFAULT_EVENT_DELETION)
+    options.update(getattr(settings, 'EVENT_DELETION', {}))
+    return options
+
+
+def purge_key(event_id):
+    return f'purge-event:{event_id}'
+
+
+def delete_event(event):
+    """
+    Hides the event straight away and queues the removal of its bookings,
+    reviews and finally the event itself, which for a large event would
+    otherwise hold locks for the length of the request.
+    """
+    event.deleted_on = timezone.now()
+    event.save(update_fields=['deleted_on', 'updated_on'])
+    schedule_purge(event.pk)
+
+
+def schedule_purge(event_id):
+    return enqueue(
+        purge_deleted_event,
+        args=[event_id],
+        idempotency_key=purge_key(event_id),
+    )
+
+
+def delete_batch(model, event_id, batch_size):
+    """
+    Deletes up to ``batch_size`` bookings or reviews of an event and returns
+    how many were deleted. The rows are removed with a plain DELETE without
+    being loaded, so no delete signals are sent: callers take care of the
+    event's caches. Nothing references these rows, so there is nothing to
+    cascade to.
+    """
+    ids = list(
+        model.all_objects.filter(
+            event_id=event_id
+        ).values_list('pk', flat=True)[:batch_size]
+    )
+    if not ids:
+        return 0
+    connection = connections[router.db_for_write(model)]
+    table = connection.ops.quote_name(model._meta.db_table)
+    placeholders = ', '.join(['%s'] * len(ids))
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'DELETE FROM {table} WHERE id IN ({placeholders})', ids
+        )
+        return cursor.rowcount
+
+
+@task(priority=-10)
+def purge_deleted_event(event_id):
+    """
+    Removes a deleted event's reviews and bookings in batches of BATCH_SIZE,
+    then the event. Every batch commits on its own, so a purge that stops
+    part way, or runs past TIME_LIMIT and queues itself again, carries on
+    from the rows that are left.
+    """
+    options = event_deletion_settings()
+    deadline = time.monotonic() + options['TIME_LIMIT']
+    event = Event.all_objects.filter(
+        pk=event_id, deleted_on__isnull=False
+    ).first()
+    if event is None:
+        return
+    # The event's pages were invalidated when it was hidden
+    for model in (Review, Booking):
+        while deleted := delete_batch(
+            model, event_id, options['BATCH_SIZE']
+        ):
+            logger.info(
+                'Removed %d %s rows of deleted event %s',
+                deleted, model._meta.model_name, event_id,
+            )
+            if time.monotonic() > deadline:
+                raise Retry(0)
+    event.delete()
+    logger.info('Removed deleted event %s', event_id)
@@ -2,16 +2,35 @@ from django import forms
 from django.utils import timezone
 from django_summernote.widgets import SummernoteWidget
 from datetime import timedelta
+from .images import PENDING_IMAGE
 from .models import Event, Review, Booking
+from .uploads import (
+    InvalidImage, discard_staged_upload, stage_upload, validate_image
+)
 
 
 class EventForm(forms.ModelForm):
+    # Uploads are staged locally and transferred to the image backend in the
+    # background, so the image is kept out of the model fields
+    image = forms.FileField(
+        widget=forms.ClearableFileInput(
+            attrs={
+                'class': 'form-control',
+                'accept': 'image/*'
+            }
+        )
+    )
+    field_order = [
+        'event_name',
+        'event_date',
+        'image',
+    ]
+
     class Meta:
         model = Event
         fields = [
             'event_name',
             'event_date',
-            'image',
             'is_online',
             'url_or_address',
             'maximum_attendees',
@@ -31,12 +50,6 @@ class EventForm(forms.ModelForm):
                     'placeholder': 'Select date and time'
                 }
             ),
-            'image': forms.ClearableFileInput(
-                attrs={
-                    'class': 'form-control',
-                    'accept': 'image/*'
-                }
-            ),
             'is_online': forms.CheckboxInput(
                 attrs={
                     'class': 'form-check-input'
@@ -64,6 +77,33 @@ class EventForm(forms.ModelForm):
             'long_description': SummernoteWidget(),
         }
 
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Existing events keep their image unless a new one is uploaded
+        if self.instance.pk:
+            self.fields['image'].required = False
+
+    def clean_image(self):
+        image = self.cleaned_data.get('image')
+        if not image:
+            return None
+        try:
+            self.image_format = validate_image(image)
+        except InvalidImage as error:
+            raise forms.ValidationError(str(error))
+        return image
+
+    def save(self, commit=True):
+        image = self.cleaned_data.get('image')
+        if image:
+            if self.instance.image_pending:
+                discard_staged_upload(self.instance.image_pending)
+            self.instance.image = PENDING_IMAGE
+            self.instance.image_pending = stage_upload(
+                image, self.image_format
+            )
+        return super().save(commit)
+
     def clean_event_date(self):
         event_date = self.cleaned_data.get('event_date')
         now = timezone.now()
@@ -164,6 +204,7 @@ class BookingForm(forms.ModelForm):
         # Checks if the user is already booked
         if not self.instance.pk and Booking.objects.filter(
             event=self.event,
+            event_date=self.event.event_date,
             ticketholder=self.user
         ).exists():
             raise forms.ValidationError(already_booked_error)
@@ -0,0 +1,228 @@
+import time
+from datetime import timedelta, timezone
+
+from django.conf import settings
+from django.core import signing
+from django.core.cache import caches
+from django.utils.crypto import constant_time_compare, get_random_string
+from .models import CalendarFeed
+
+DEFAULT_EVENT_CALENDAR = {
+    'CACHE_ALIAS': 'default',
+    # Rendered feeds are kept this long unless a change replaces them
+    'TTL': 60 * 60 * 24,
+    # Events don't record an end time, calendars show them this long
+    'DURATION_HOURS': 2,
+}
+
+TOKEN_SALT = 'events.calendar'
+
+
+def event_calendar_settings():
+    """
+    Returns the EVENT_CALENDAR setting merged over the defaults.
+    """
+    options = dict(DEFAULT_EVENT_CALENDAR)
+    options.update(getattr(settings, 'EVENT_CALENDAR', {}))
+    return options
+
+
+def _cache():
+    return caches[event_calendar_settings()['CACHE_ALIAS']]
+
+
+def calendar_token(user):
+    """
+    Returns the token in the user's feed link, which carries their current
+    calendar secret.
+    """
+    feed, created = CalendarFeed.objects.get_or_create(
+        user=user, defaults={'secret': get_random_string(32)}
+    )
+    if created:
+        forget_calendar_access(user.pk)
+    return signing.Signer(salt=TOKEN_SALT).sign(f'{user.pk}:{feed.secret}')
+
+
+def reset_calendar_token(user):
+    """
+    Gives the user a new calendar secret, so links handed out before stop
+    working, and returns the new token.
+    """
+    CalendarFeed.objects.update_or_create(
+        user=user, defaults={'secret': get_random_string(32)}
+    )
+    forget_calendar_access(user.pk)
+    return calendar_token(user)
+
+
+def access_key(user_id):
+    return f'events:calendar:access:{user_id}'
+
+
+def calendar_secret(user_id):
+    """
+    Returns the current calendar secret of an active user, or '' when the
+    user doesn't exist or has been deactivated. Kept in the cache, so polls
+    are checked without a query.
+    """
+    cache = _cache()
+    secret = cache.get(access_key(user_id))
+    if secret is None:
+        secret = CalendarFeed.objects.filter(
+            user_id=user_id, user__is_active=True
+        ).values_list('secret', flat=True).first() or ''
+        cache.set(
+            access_key(user_id), secret, event_calendar_settings()['TTL']
+        )
+    return secret
+
+
+def forget_calendar_access(user_id):
+    _cache().delete(access_key(user_id))
+
+
+def calendar_user_id(token):
+    """
+    Returns the id of the active user a feed token was issued to, raising
+    BadSignature for tokens this site didn't sign, tokens that have been
+    reset and those of deactivated users.
+    """
+    value = signing.Signer(salt=TOKEN_SALT).unsign(token)
+    user_id, _, secret = value.partition(':')
+    try:
+        user_id = int(user_id)
+    except ValueError:
+        raise signing.BadSignature('Malformed calendar token') from None
+    current = calendar_secret(user_id)
+    if not current or not constant_time_compare(secret, current):
+        raise signing.BadSignature('Calendar token is no longer valid')
+    return user_id
+
+
+def version_key(user_id):
+    return f'events:calendar:version:{user_id}'
+
+
+def feed_key(user_id, version):
+    return f'events:calendar:feed:{user_id}:{version}'
+
+
+def calendar_version(user_id):
+    """
+    Returns the version of the user's feed, which changes whenever one of
+    their bookings or events does. Polls that present the current version
+    as their ETag are answered without rendering anything.
+    """
+    cache = _cache()
+    version = cache.get(version_key(user_id))
+    if version is None:
+        cache.add(version_key(user_id), time.time_ns(), timeout=None)
+        version = cache.get(version_key(user_id))
+    return version
+
+
+def touch_calendars(user_ids):
+    """
+    Gives each user's feed a new version, so their next poll renders it
+    again. Done in one round trip however many users are affected.
+    """
+    version = time.time_ns()
+    _cache().set_many(
+        {version_key(user_id): version for user_id in set(user_ids)},
+        timeout=None,
+    )
+
+
+def cached_feed(user_id, version):
+    return _cache().get(feed_key(user_id, version))
+
+
+def caching_stream(chunks, user_id, version):
+    """
+    Passes the chunks of a feed through while it is streamed, storing the
+    whole feed once the last one has been sent.
+    """
+    sent = []
+    for chunk in chunks:
+        sent.append(chunk)
+        yield chunk
+    _cache().set(
+        feed_key(user_id, version), ''.join(sent),
+        event_calendar_settings()['TTL'],
+    )
+
+
+def escape_text(value):
+    return (
+        str(value).replace('\\', '\\\\').replace(';', '\\;')
+        .replace(',', '\\,').replace('\r\n', '\\n').replace('\n', '\\n')
+    )
+
+
+def fold(line):
+    """
+    Splits a content line into lines of at most 75 octets, as RFC 5545
+    asks, without breaking a multi-byte character.
+    """
+    folded = []
+    current = ''
+    for char in line:
+        limit = 75 if not folded else 74
+        if len((current + char).encode()) > limit:
+            folded.append(current)
+            current = char
+        else:
+            current += char
+    folded.append(current)
+    return '\r\n '.join(folded) + '\r\n'
+
+
+def format_time(value):
+    return value.astimezone(timezone.utc).strftime('%Y%m%dT%H%M%SZ')
+
+
+def vevent(event, url, summary, stamp):
+    duration = timedelta(hours=event_calendar_settings()['DURATION_HOURS'])
+    lines = [
+        'BEGIN:VEVENT',
+        f'UID:event-{event.pk}@ourglass',
+        f'DTSTAMP:{format_time(stamp)}',
+        f'DTSTART:{format_time(event.event_date)}',
+        f'DTEND:{format_time(event.event_date + duration)}',
+        f'SUMMARY:{escape_text(summary)}',
+        f'DESCRIPTION:{escape_text(event.short_description)}',
+        f'LOCATION:{escape_text(event.url_or_address)}',
+        f'URL:{url}',
+        'END:VEVENT',
+    ]
+    return ''.join(fold(line) for line in lines)
+
+
+def calendar_chunks(bookings, organised_events, event_url):
+    """
+    Yields an iCalendar feed of the bookings and organised events an entry
+    at a time, as the querysets are read. ``event_url`` turns an event into
+    the absolute URL of its page.
+    """
+    yield (
+        'BEGIN:VCALENDAR\r\n'
+        'VERSION:2.0\r\n'
+        'PRODID:-//Ourglass//Events//EN\r\n'
+        + fold('X-WR-CALNAME:Ourglass')
+    )
+    for booking in bookings.iterator():
+        event = booking.event
+        tickets = f'{booking.tickets} ticket' + (
+            's' if booking.tickets != 1 else ''
+        )
+        yield vevent(
+            event, event_url(event), f'{event.event_name} ({tickets})',
+            event.updated_on,
+        )
+    for event in organised_events.iterator():
+        yield vevent(
+            event, event_url(event), f'{event.event_name} (organiser)',
+            event.updated_on,
+        )
+    yield 'END:VCALENDAR\r\n'
@@ -0,0 +1,150 @@
+import os
+import re
+import shutil
+import uuid
+from functools import lru_cache
+
+from cloudinary.models import CLOUDINARY_FIELD_DB_RE
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.templatetags.static import static
+from django.utils.module_loading import import_string
+
+DEFAULT_EVENT_IMAGES = {
+    'BACKEND': 'events.images.CloudinaryImageBackend',
+    # Widths of the variants offered to the browser through srcset
+    'WIDTHS': (320, 640, 960, 1280),
+    # Width used for the src attribute of browsers without srcset support
+    'DEFAULT_WIDTH': 640,
+    # Longest side stored for uploads, larger originals are scaled down
+    'MAX_DIMENSION': 2560,
+    # Shown while an uploaded image is still being transferred
+    'PLACEHOLDER': 'images/event-placeholder.svg',
+}
+
+# Stored in the image column until the background transfer has finished
+PENDING_IMAGE = 'ourglass/pending-upload'
+
+
+def event_images_settings():
+    """
+    Returns the EVENT_IMAGES setting merged over the defaults.
+    """
+    options = dict(DEFAULT_EVENT_IMAGES)
+    options.update(getattr(settings, 'EVENT_IMAGES', {}))
+    return options
+
+
+class CloudinaryImageBackend:
+    """
+    Builds Cloudinary delivery URLs that resize the image on the CDN and
+    let it pick the best format and quality for the browser.
+    """
+
+    def url(self, public_id, format=None, version=None, width=None):
+        from cloudinary import CloudinaryImage
+        transformation = {'fetch_format': 'auto', 'quality': 'auto'}
+        if width:
+            transformation.update({'width': width, 'crop': 'limit'})
+        return CloudinaryImage(
+            public_id, format=format, version=version
+        ).build_url(secure=True, **transformation)
+
+    def upload(self, path):
+        """
+        Uploads the file at ``path`` and returns the value to store in the
+        image column.
+        """
+        from cloudinary import uploader
+        max_dimension = event_images_settings()['MAX_DIMENSION']
+        resource = uploader.upload_resource(
+            path,
+            type='upload',
+            resource_type='image',
+            transformation={
+                'width': max_dimension,
+                'height': max_dimension,
+                'crop': 'limit',
+            },
+        )
+        return resource.get_prep_value()
+
+
+class LocalImageBackend:
+    """
+    Stand-in for Cloudinary that serves images from MEDIA_ROOT, for working
+    and testing offline. Variants are the original file with the requested
+    width in the query string.
+    """
+
+    def url(self, public_id, format=None, version=None, width=None):
+        name = f'{public_id}.{format}' if format else public_id
+        url = f'{settings.MEDIA_URL}{name}'
+        return f'{url}?w={width}' if width else url
+
+    def upload(self, path):
+        extension = os.path.splitext(path)[1]
+        name = f'events/{uuid.uuid4().hex}{extension}'
+        destination = os.path.join(settings.MEDIA_ROOT, name)
+        os.makedirs(os.path.dirname(destination), exist_ok=True)
+        shutil.copyfile(path, destination)
+        return name
+
+
+@lru_cache(maxsize=None)
+def get_image_backend():
+    return import_string(event_images_settings()['BACKEND'])()
+
+
+@lru_cache(maxsize=4096)
+def _build_url(public_id, format, version, width):
+    return get_image_backend().url(public_id, format, version, width)
+
+
+@receiver(setting_changed)
+def reset_image_backend(setting, **kwargs):
+    if setting in ('EVENT_IMAGES', 'MEDIA_URL'):
+        get_image_backend.cache_clear()
+        _build_url.cache_clear()
+
+
+def is_pending(image):
+    """
+    Returns True while the image is still waiting to be transferred to the
+    image backend.
+    """
+    public_id = getattr(image, 'public_id', image)
+    return bool(public_id) and str(public_id).startswith(PENDING_IMAGE)
+
+
+def image_url(image, width=None):
+    """
+    Returns the URL of an image variant. Building URLs through the SDK is
+    slow enough to show up on card grids, so results are memoized by public
+    id and transformation.
+    """
+    if not image:
+        return ''
+    if isinstance(image, str):
+        public_id, format, version = re.match(
+            CLOUDINARY_FIELD_DB_RE, image
+        ).group('public_id', 'format', 'version')
+    else:
+        public_id, format, version = (
+            image.public_id, image.format, image.version
+        )
+    if public_id == PENDING_IMAGE:
+        return static(event_images_settings()['PLACEHOLDER'])
+    return _build_url(public_id, format, version, width)
+
+
+def image_srcset(image, widths=None):
+    """
+    Returns a srcset attribute value listing a variant of the image for each
+    of the configured widths.
+    """
+    if is_pending(image):
+        return ''
+    widths = widths or event_images_settings()['WIDTHS']
+    return ', '.join(f'{image_url(image, width)} {width}w' for width in widths)
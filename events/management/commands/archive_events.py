@@ -0,0 +1,49 @@
+from django.core.management.base import BaseCommand
+from events.archive import archive_event, events_to_archive
+from events.changes import prune_tombstones
+from events.models import Event
+
+
+class Command(BaseCommand):
+    help = (
+        'Moves events past the retention horizon, with their bookings and '
+        'reviews, into the archive tables, and prunes expired change feed '
+        'tombstones. Meant to run daily.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--limit',
+            type=int,
+            default=None,
+            help='Archive at most this many events.',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='List the events that would be archived.',
+        )
+
+    def handle(self, *args, **options):
+        events = events_to_archive()
+        if options['limit'] is not None:
+            events = events[:options['limit']]
+        if options['dry_run']:
+            for event in events:
+                self.stdout.write(f'Would archive {event}')
+            return
+        archived = 0
+        # Each event is loaded in turn rather than through one open cursor,
+        # as archiving deletes it
+        for event_id in list(events.values_list('pk', flat=True)):
+            event = Event.objects.filter(pk=event_id).first()
+            if event is None:
+                continue
+            archive_event(event)
+            archived += 1
+            if options['verbosity'] > 1:
+                self.stdout.write(f'Archived {event}')
+        self.stdout.write(self.style.SUCCESS(f'Archived {archived} events'))
+        pruned = prune_tombstones()
+        if pruned:
+            self.stdout.write(f'Pruned {pruned} change feed tombstones')
@@ -0,0 +1,39 @@
+from django.core.management.base import BaseCommand
+from django.db import connection
+from events.partitions import (
+    booking_partitions_settings, ensure_partitions, is_partitioned,
+    list_partitions
+)
+
+
+class Command(BaseCommand):
+    help = (
+        'Creates the monthly booking partitions for the months ahead and '
+        'reports the size of each partition. Meant to run daily or at '
+        'least monthly.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--months-ahead',
+            type=int,
+            default=booking_partitions_settings()['MONTHS_AHEAD'],
+            help='Number of months ahead to create partitions for.',
+        )
+
+    def handle(self, *args, **options):
+        if not is_partitioned():
+            self.stdout.write(
+                f'Bookings are a plain table on {connection.vendor}, there '
+                'are no partitions to maintain.'
+            )
+            return
+        created = ensure_partitions(months_ahead=options['months_ahead'])
+        for name in created:
+            self.stdout.write(f'Created {name}')
+        if options['verbosity'] > 1:
+            for name, bounds, rows in list_partitions():
+                self.stdout.write(f'{name}: ~{rows} rows, {bounds}')
+        self.stdout.write(self.style.SUCCESS(
+            f'Created {len(created)} booking partitions'
+        ))
@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand
+from ourglass.templates import compile_templates
+
+
+class Command(BaseCommand):
+    help = (
+        'Compiles every project template and reports how long each took, '
+        'slowest first.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--slowest',
+            type=int,
+            default=10,
+            help='Number of the slowest templates to list.',
+        )
+
+    def handle(self, *args, **options):
+        timings = compile_templates()
+        timings.sort(key=lambda timing: timing[1], reverse=True)
+        for name, seconds, error in timings[:options['slowest']]:
+            self.stdout.write(f'{seconds * 1000:8.2f}ms  {name}')
+        total = sum(seconds for _, seconds, _ in timings)
+        compiled = sum(1 for _, _, error in timings if not error)
+        self.stdout.write(self.style.SUCCESS(
+            f'Compiled {compiled} templates in {total * 1000:.0f}ms'
+        ))
+        # Templates for allauth features the site doesn't enable can't be
+        # compiled, and are never rendered
+        for name, _, error in timings:
+            if error:
+                self.stdout.write(self.style.WARNING(
+                    f"Skipped {name}: {str(error).splitlines()[0]}"
+                ))
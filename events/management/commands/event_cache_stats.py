@@ -0,0 +1,34 @@
+from django.core.cache import caches
+from django.core.management.base import BaseCommand
+from events.cache import event_cache_settings
+
+
+class Command(BaseCommand):
+    help = 'Reports event cache hit ratios published by each worker.'
+
+    def handle(self, *args, **options):
+        cache = caches[event_cache_settings()['CACHE_ALIAS']]
+        pids = cache.get('events:stats:pids', [])
+        snapshots = cache.get_many([f'events:stats:{pid}' for pid in pids])
+        if not snapshots:
+            self.stdout.write('No event cache stats have been published yet.')
+            return
+        totals = {
+            'local_hits': 0, 'shared_hits': 0, 'negative_hits': 0,
+            'misses': 0,
+        }
+        for key, stats in sorted(snapshots.items()):
+            for name in totals:
+                totals[name] += stats[name]
+            self.stdout.write(
+                f"{key.rsplit(':', 1)[1]}: {stats['lookups']} lookups, "
+                f"hit ratio {stats['hit_ratio']:.1%} "
+                f"(local {stats['local_hit_ratio']:.1%}), "
+                f"{stats['local_entries']} local entries"
+            )
+        lookups = sum(totals.values())
+        hits = lookups - totals['misses']
+        self.stdout.write(self.style.SUCCESS(
+            f'All workers: {lookups} lookups, hit ratio '
+            f'{hits / lookups if lookups else 0:.1%}'
+        ))
@@ -0,0 +1,89 @@
+import os
+import subprocess
+import sys
+from collections import Counter
+
+from django.apps import apps
+from django.core.management.base import BaseCommand, CommandError
+
+
+def parse_importtime(output):
+    """
+    Sums the self time of each module in ``python -X importtime`` output
+    by top-level package, in microseconds.
+    """
+    totals = Counter()
+    for line in output.splitlines():
+        if not line.startswith('import time:'):
+            continue
+        try:
+            self_time, _, module = line[len('import time:'):].split('|')
+            totals[module.strip().split('.')[0]] += int(self_time)
+        except ValueError:
+            # The header line
+            continue
+    return totals
+
+
+def import_script(module=None):
+    """
+    Returns the code run under ``-X importtime``: Django is set up, which
+    imports the settings, every installed app and its models, and then
+    ``module`` is imported if given.
+    """
+    script = 'import django; django.setup()'
+    if module:
+        script += f'; import {module}'
+    return script
+
+
+class Command(BaseCommand):
+    help = (
+        'Sets up Django in a fresh interpreter and reports the import time '
+        'of each package, slowest first. The startup warm up is skipped, so '
+        'the URLconf and templates it loads are not counted.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--module',
+            default=None,
+            help='Module to import after setting up Django, e.g. '
+                 'ourglass.urls.',
+        )
+        parser.add_argument(
+            '--limit',
+            type=int,
+            default=20,
+            help='Number of packages to list.',
+        )
+
+    def handle(self, *args, **options):
+        result = subprocess.run(
+            [
+                sys.executable, '-X', 'importtime', '-c',
+                import_script(options['module']),
+            ],
+            capture_output=True,
+            text=True,
+            env={**os.environ, 'OURGLASS_SKIP_WARM_UP': '1'},
+        )
+        target = options['module'] or 'Django'
+        if result.returncode:
+            raise CommandError(
+                f'Importing {target} failed:\n'
+                + result.stderr[-2000:]
+            )
+        totals = parse_importtime(result.stderr)
+        installed = {
+            config.name.split('.')[0] for config in apps.get_app_configs()
+        }
+        for package, microseconds in totals.most_common(options['limit']):
+            label = '  (installed app)' if package in installed else ''
+            self.stdout.write(
+                f'{microseconds / 1000:8.1f}ms  {package}{label}'
+            )
+        self.stdout.write(self.style.SUCCESS(
+            f'Imported {target} in '
+            f'{sum(totals.values()) / 1000:.0f}ms'
+        ))
@@ -0,0 +1,61 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Count
+from events.deletion import purge_key, schedule_purge
+from events.models import Event, Booking, Review
+from jobs.models import Job
+
+
+class Command(BaseCommand):
+    help = (
+        'Reports deleted events that are still being purged, with the rows '
+        'left and the state of their purge job.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--resume',
+            action='store_true',
+            help='Queue a purge for every deleted event without one queued, '
+                 'e.g. after a purge job has failed.',
+        )
+
+    def handle(self, *args, **options):
+        deleted = list(
+            Event.all_objects.filter(
+                deleted_on__isnull=False
+            ).order_by('deleted_on').values_list('pk', 'deleted_on')
+        )
+        if not deleted:
+            self.stdout.write('No deleted events are waiting to be purged.')
+            return
+        event_ids = [event_id for event_id, _ in deleted]
+        remaining = {}
+        for model in (Booking, Review):
+            counts = model.all_objects.filter(
+                event_id__in=event_ids
+            ).values('event_id').annotate(rows=Count('pk'))
+            for row in counts:
+                remaining.setdefault(row['event_id'], {})[model] = row['rows']
+        jobs = {}
+        for job in Job.objects.filter(
+            idempotency_key__in=[purge_key(pk) for pk in event_ids]
+        ).order_by('created_on'):
+            # The latest job for each event wins
+            jobs[job.idempotency_key] = job
+
+        for event_id, deleted_on in deleted:
+            rows = remaining.get(event_id, {})
+            job = jobs.get(purge_key(event_id))
+            self.stdout.write(
+                f'Event {event_id}, deleted {deleted_on:%Y-%m-%d %H:%M}: '
+                f'{rows.get(Booking, 0)} bookings and {rows.get(Review, 0)} '
+                f'reviews left, purge {job.status if job else "not queued"}'
+            )
+            if options['resume'] and (
+                job is None or job.status == Job.FAILED
+            ):
+                schedule_purge(event_id)
+                self.stdout.write(f'Queued a purge for event {event_id}')
+        self.stdout.write(self.style.SUCCESS(
+            f'{len(deleted)} deleted events waiting to be purged'
+        ))
@@ -0,0 +1,45 @@
+from django.core.management.base import BaseCommand
+from events.models import Event
+from events.sanitizers import sanitize_description
+
+
+class Command(BaseCommand):
+    help = (
+        'Backfills the sanitized copy of each event long description. By '
+        'default only events without one are processed.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--all',
+            action='store_true',
+            help='Re-sanitize every event, e.g. after changing the whitelist.',
+        )
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        events = Event.objects.only('long_description').order_by('pk')
+        if not options['all']:
+            events = events.filter(long_description_html='')
+        batch_size = options['batch_size']
+        batch = []
+        updated = 0
+        for event in events.iterator(chunk_size=batch_size):
+            event.long_description_html = sanitize_description(
+                event.long_description
+            )
+            batch.append(event)
+            if len(batch) == batch_size:
+                updated += self._flush(batch)
+        updated += self._flush(batch)
+        self.stdout.write(self.style.SUCCESS(
+            f'Sanitized {updated} event description(s).'
+        ))
+
+    def _flush(self, batch):
+        # bulk_update skips save() and signals, so no cached pages are
+        # invalidated; stale copies expire on their own.
+        Event.objects.bulk_update(batch, ['long_description_html'])
+        count = len(batch)
+        batch.clear()
+        return count
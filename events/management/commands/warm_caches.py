@@ -0,0 +1,148 @@
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connections
+from django.db.models import Sum
+from django.test import Client
+from django.urls import reverse
+from django.utils.timezone import now
+from events.models import Event
+
+
+class Command(BaseCommand):
+    help = (
+        'Renders the most visited pages through the full request handler '
+        'so the caches are filled before users arrive, e.g. after a deploy. '
+        'The all events list is not warmed: it is built per user and never '
+        'cached, so the upcoming events are warmed through their detail '
+        'pages instead.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--upcoming',
+            type=int,
+            default=20,
+            help='Number of the next upcoming events whose detail pages '
+                 'are warmed.',
+        )
+        parser.add_argument(
+            '--top',
+            type=int,
+            default=20,
+            help='Number of the most booked events to warm.',
+        )
+        parser.add_argument(
+            '--search',
+            action='append',
+            default=None,
+            help='Search query to warm, can be repeated. Defaults to the '
+                 'WARM_CACHES_SEARCH_QUERIES setting.',
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=4,
+            help='Number of pages rendered at once.',
+        )
+        parser.add_argument(
+            '--deadline',
+            type=float,
+            default=60,
+            help='Seconds after which no more pages are started.',
+        )
+        parser.add_argument(
+            '--host',
+            default=settings.ALLOWED_HOSTS[0].lstrip('.')
+            if settings.ALLOWED_HOSTS else 'localhost',
+            help='Host header sent with each request.',
+        )
+
+    def get_urls(self, options):
+        upcoming = Event.objects.filter(
+            event_date__gte=now()
+        ).order_by('event_date').values_list('id', flat=True)
+        most_booked = Event.objects.annotate(
+            tickets_sold=Sum('bookings__tickets')
+        ).filter(
+            tickets_sold__gt=0
+        ).order_by('-tickets_sold').values_list('id', flat=True)
+        queries = options['search']
+        if queries is None:
+            queries = getattr(settings, 'WARM_CACHES_SEARCH_QUERIES', [''])
+        # all-events is left out as it excludes the viewer's own events
+        # and is rendered afresh for every user, so there is nothing to fill
+        urls = [reverse('index')]
+        urls += [
+            reverse('event-detail', args=[event_id])
+            for event_id in [
+                *upcoming[:options['upcoming']],
+                *most_booked[:options['top']],
+            ]
+        ]
+        urls += [
+            f"{reverse('search-events')}?{urlencode({'q': query})}"
+            for query in queries
+        ]
+        # Keeps the first occurrence of each page
+        return list(dict.fromkeys(urls))
+
+    def warm(self, url, host, deadline):
+        if time.monotonic() > deadline:
+            return url, None, 0
+        started = time.monotonic()
+        client = Client(raise_request_exception=False, HTTP_HOST=host)
+        response = client.get(url)
+        return url, response.status_code, time.monotonic() - started
+
+    def warm_in_thread(self, *args):
+        try:
+            return self.warm(*args)
+        finally:
+            # Worker threads open their own connections
+            connections.close_all()
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        deadline = started + options['deadline']
+        urls = self.get_urls(options)
+        if options['workers'] > 1:
+            with ThreadPoolExecutor(max_workers=options['workers']) as pool:
+                futures = [
+                    pool.submit(
+                        self.warm_in_thread, url, options['host'], deadline
+                    )
+                    for url in urls
+                ]
+                wait(futures, timeout=options['deadline'])
+                for future in futures:
+                    future.cancel()
+            results = [
+                future.result() for future in futures
+                if future.done() and not future.cancelled()
+            ]
+        else:
+            results = [
+                self.warm(url, options['host'], deadline) for url in urls
+            ]
+
+        warmed = failed = 0
+        for url, status, seconds in results:
+            if status is None:
+                continue
+            if status == 200:
+                warmed += 1
+            else:
+                failed += 1
+                self.stderr.write(f'{url} returned {status}')
+            if options['verbosity'] > 1:
+                self.stdout.write(f'{seconds * 1000:8.1f}ms  {status}  {url}')
+        skipped = len(urls) - warmed - failed
+        self.stdout.write(self.style.SUCCESS(
+            f'Warmed {warmed} of {len(urls)} pages in '
+            f'{time.monotonic() - started:.1f}s, {failed} failed, '
+            f'{skipped} skipped at the deadline'
+        ))
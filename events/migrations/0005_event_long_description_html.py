@@ -0,0 +1,18 @@
+# Generated by Django 5.2.1 on 2026-10-19 09:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0004_alter_review_approved'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='event',
+            name='long_description_html',
+            field=models.TextField(blank=True, editable=False),
+        ),
+    ]
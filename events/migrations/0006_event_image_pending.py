@@ -0,0 +1,18 @@
+# Generated by Django 5.2.1 on 2026-10-19 11:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0005_event_long_description_html'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='event',
+            name='image_pending',
+            field=models.CharField(blank=True, editable=False, max_length=255),
+        ),
+    ]
@@ -0,0 +1,28 @@
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+
+def copy_event_dates(apps, schema_editor):
+    Booking = apps.get_model('events', 'Booking')
+    Event = apps.get_model('events', 'Event')
+    Booking.objects.update(
+        event_date=Subquery(
+            Event.objects.filter(pk=OuterRef('event_id')).values('event_date')
+        )
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0008_archive'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='booking',
+            name='event_date',
+            field=models.DateTimeField(editable=False, null=True),
+        ),
+        migrations.RunPython(copy_event_dates, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,168 @@
+from datetime import date, datetime, timezone
+
+from django.db import migrations, models
+
+# Frozen copies of the helpers in events.partitions as they were when this
+# migration was written, so later changes there can't change what it does
+TABLE = 'events_booking'
+DEFAULT_PARTITION = f'{TABLE}_default'
+STAGING_TABLE = f'{TABLE}_unpartitioned'
+MONTHS_AHEAD = 12
+
+
+def month_start(value):
+    return date(value.year, value.month, 1)
+
+
+def add_months(month, months):
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(month):
+    return f'{TABLE}_{month:%Y_%m}'
+
+
+def _bound(month):
+    return datetime(
+        month.year, month.month, 1, tzinfo=timezone.utc
+    ).isoformat()
+
+
+def create_partition(cursor, month):
+    name = partition_name(month)
+    start, end = _bound(month), _bound(add_months(month, 1))
+    cursor.execute(
+        f'CREATE TABLE {name} PARTITION OF {TABLE} '
+        f"FOR VALUES FROM ('{start}') TO ('{end}')"
+    )
+
+
+def ensure_partitions(cursor, first_month):
+    """
+    Creates the monthly partitions from ``first_month`` to MONTHS_AHEAD
+    months from now. The table is new and empty, so none exist yet.
+    """
+    last = add_months(month_start(datetime.now(timezone.utc)), MONTHS_AHEAD)
+    month = first_month
+    while month <= last:
+        create_partition(cursor, month)
+        month = add_months(month, 1)
+
+
+def _rebuild(schema_editor, partitioned):
+    """
+    Swaps the booking table for a partitioned or a plain copy of itself,
+    keeping the rows, id sequence, indexes and foreign keys.
+    """
+    connection = schema_editor.connection
+    with connection.cursor() as cursor:
+        # Copying every booking can take longer than requests are allowed
+        cursor.execute('SET LOCAL statement_timeout = 0')
+        cursor.execute(f'ALTER TABLE {TABLE} RENAME TO {STAGING_TABLE}')
+        cursor.execute(
+            'SELECT indexname, indexdef FROM pg_indexes '
+            "WHERE tablename = %s AND indexname NOT LIKE '%%_pkey'",
+            [STAGING_TABLE],
+        )
+        indexes = cursor.fetchall()
+        cursor.execute(
+            'SELECT conname, pg_get_constraintdef(oid) FROM pg_constraint '
+            "WHERE conrelid = to_regclass(%s) AND contype = 'f'",
+            [STAGING_TABLE],
+        )
+        foreign_keys = cursor.fetchall()
+        cursor.execute(
+            'SELECT conname FROM pg_constraint '
+            "WHERE conrelid = to_regclass(%s) AND contype = 'p'",
+            [STAGING_TABLE],
+        )
+        # Frees the primary key's name for the new table
+        cursor.execute(
+            f'ALTER TABLE {STAGING_TABLE} '
+            f'DROP CONSTRAINT {cursor.fetchone()[0]}'
+        )
+        cursor.execute(
+            "SELECT pg_get_serial_sequence(%s, 'id'), attidentity "
+            'FROM pg_attribute '
+            "WHERE attrelid = to_regclass(%s) AND attname = 'id'",
+            [STAGING_TABLE, STAGING_TABLE],
+        )
+        sequence, identity = cursor.fetchone()
+
+        if partitioned:
+            cursor.execute(
+                f'CREATE TABLE {TABLE} (LIKE {STAGING_TABLE} '
+                f'INCLUDING DEFAULTS INCLUDING IDENTITY) '
+                f'PARTITION BY RANGE (event_date)'
+            )
+            # Unique keys on a partitioned table have to include the
+            # partition key
+            cursor.execute(
+                f'ALTER TABLE {TABLE} ADD PRIMARY KEY (id, event_date)'
+            )
+            cursor.execute(
+                f'CREATE TABLE {DEFAULT_PARTITION} '
+                f'PARTITION OF {TABLE} DEFAULT'
+            )
+            cursor.execute(f'SELECT MIN(event_date) FROM {STAGING_TABLE}')
+            earliest = cursor.fetchone()[0] or datetime.now(timezone.utc)
+            ensure_partitions(cursor, month_start(earliest))
+        else:
+            cursor.execute(
+                f'CREATE TABLE {TABLE} (LIKE {STAGING_TABLE} '
+                f'INCLUDING DEFAULTS INCLUDING IDENTITY)'
+            )
+            cursor.execute(f'ALTER TABLE {TABLE} ADD PRIMARY KEY (id)')
+
+        if not identity:
+            # A serial column's sequence would go with the old table
+            cursor.execute(f'ALTER SEQUENCE {sequence} OWNED BY {TABLE}.id')
+        cursor.execute(
+            f'INSERT INTO {TABLE} OVERRIDING SYSTEM VALUE '
+            f'SELECT * FROM {STAGING_TABLE}'
+        )
+        cursor.execute(
+            f"SELECT setval(pg_get_serial_sequence('{TABLE}', 'id'), "
+            f'COALESCE(MAX(id), 0) + 1, false) FROM {TABLE}'
+        )
+        cursor.execute(f'DROP TABLE {STAGING_TABLE} CASCADE')
+        for name, definition in indexes:
+            cursor.execute(definition.replace(STAGING_TABLE, TABLE))
+        for name, definition in foreign_keys:
+            cursor.execute(
+                f'ALTER TABLE {TABLE} ADD CONSTRAINT {name} {definition}'
+            )
+
+
+def partition_bookings(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        _rebuild(schema_editor, partitioned=True)
+
+
+def unpartition_bookings(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        _rebuild(schema_editor, partitioned=False)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0009_booking_event_date'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='booking',
+            name='event_date',
+            field=models.DateTimeField(editable=False),
+        ),
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(
+                fields=['ticketholder', 'event_date'],
+                name='booking_holder_date_idx',
+            ),
+        ),
+        migrations.RunPython(partition_bookings, unpartition_bookings),
+    ]
@@ -1,9 +1,42 @@
 from django.db import models
 from django.contrib.auth.models import User
 from cloudinary.models import CloudinaryField
+from .images import image_srcset, image_url
+from .sanitizers import sanitize_description
 # Create your models here.
 
 
+class EventQuerySet(models.QuerySet):
+    def for_cards(self):
+        """
+        Loads only the columns that the event card templates display, so
+        list pages never fetch the long description.
+        """
+        return self.only(*Event.CARD_FIELDS)
+
+
+class VisibleEventManager(models.Manager):
+    """
+    Default manager for events, leaving out deleted events whose bookings
+    and reviews are still being removed.
+    """
+
+    def get_queryset(self):
+        return super().get_queryset().filter(deleted_on__isnull=True)
+
+
+class EventRelatedManager(models.Manager):
+    """
+    Default manager for bookings and reviews, leaving out those of deleted
+    events.
+    """
+
+    def get_queryset(self):
+        return super().get_queryset().filter(
+            event__deleted_on__isnull=True
+        )
+
+
 class Event (models.Model):
     event_name = models.CharField(max_length=75)
     event_date = models.DateTimeField()
@@ -12,7 +45,13 @@ class Event (models.Model):
     maximum_attendees = models.PositiveSmallIntegerField()
     short_description = models.TextField(max_length=200)
     image = CloudinaryField('image')
+    # Id of the StagedUpload waiting to be transferred to the image backend
+    image_pending = models.CharField(
+        max_length=255, blank=True, editable=False
+    )
     long_description = models.TextField(max_length=3000)
+    # Sanitized copy of long_description, rendered once on save
+    long_description_html = models.TextField(blank=True, editable=False)
     event_organiser = models.ForeignKey(
         User,
         on_delete=models.CASCADE,
@@ -20,12 +59,86 @@ class Event (models.Model):
     )
     created_on = models.DateTimeField(auto_now_add=True)
     updated_on = models.DateTimeField(auto_now=True)
+    # Set when the organiser deletes the event, see events.deletion
+    deleted_on = models.DateTimeField(null=True, blank=True, editable=False)
+
+    objects = VisibleEventManager.from_queryset(EventQuerySet)()
+    all_objects = EventQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=['deleted_on'],
+                condition=models.Q(deleted_on__isnull=False),
+                name='events_deleted_idx',
+            ),
+            # Walked by the change feed, see events.changes
+            models.Index(
+                fields=['updated_on', 'id'], name='events_updated_idx'
+            ),
+        ]
+
+    # Columns used by the cards on the index, all-events, search and
+    # my-events pages
+    CARD_FIELDS = (
+        'event_name',
+        'event_date',
+        'is_online',
+        'url_or_address',
+        'maximum_attendees',
+        'short_description',
+        'image',
+        'event_organiser',
+        'created_on',
+        'updated_on',
+    )
 
     def __str__(self):
         return f'{self.event_name} | Date: {self.event_date}'
 
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None or 'long_description' in update_fields:
+            self.long_description_html = sanitize_description(
+                self.long_description
+            )
+            if update_fields is not None:
+                kwargs['update_fields'] = {
+                    *update_fields, 'long_description_html'
+                }
+        adding = self._state.adding
+        super().save(*args, **kwargs)
+        if not adding and (
+            update_fields is None or 'event_date' in update_fields
+        ):
+            # Keeps the bookings' copy of the date, and on PostgreSQL their
+            # partition, in step with the event
+            Booking.all_objects.filter(event=self).exclude(
+                event_date=self.event_date
+            ).update(event_date=self.event_date)
+
+    def image_url(self, width=None):
+        """
+        Returns the URL of the event image, resized to ``width`` if given.
+        """
+        return image_url(self.image, width)
+
+    @property
+    def image_srcset(self):
+        """
+        Returns the srcset listing the resized variants of the event image.
+        """
+        return image_srcset(self.image)
+
     @property
     def current_attendees(self):
+        """
+        Returns the number of tickets booked for the event, using the
+        tickets_booked value when a queryset or cache has provided one.
+        """
+        tickets_booked = getattr(self, 'tickets_booked', None)
+        if tickets_booked is not None:
+            return tickets_booked
         return sum(booking.tickets for booking in self.bookings.all())
 
 
@@ -42,6 +155,20 @@ class Booking(models.Model):
         (4, 'x4')
     ]
     tickets = models.PositiveSmallIntegerField(choices=NO_OF_TICKETS)
+    # Copy of the event's date, which bookings are partitioned by on
+    # PostgreSQL, see events.partitions
+    event_date = models.DateTimeField(editable=False)
+
+    objects = EventRelatedManager()
+    all_objects = models.Manager()
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=['ticketholder', 'event_date'],
+                name='booking_holder_date_idx',
+            ),
+        ]
 
     def __str__(self):
         booking_detail = (
@@ -50,6 +177,13 @@ class Booking(models.Model):
         )
         return booking_detail
 
+    def save(self, *args, **kwargs):
+        self.event_date = self.event.event_date
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            kwargs['update_fields'] = {*update_fields, 'event_date'}
+        super().save(*args, **kwargs)
+
 
 class Review(models.Model):
     event = models.ForeignKey(
@@ -76,3 +210,135 @@ class Review(models.Model):
         max_length=300
     )
     approved = models.BooleanField(default=False)
+
+    objects = EventRelatedManager()
+    all_objects = models.Manager()
+
+
+class StagedUpload(models.Model):
+    """
+    An uploaded event image waiting to be transferred to the image backend.
+    The bytes are kept in the database because the job workers run on other
+    machines than the web process that received the upload.
+    """
+    data = models.BinaryField()
+    extension = models.CharField(max_length=5)
+    created_on = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f'Staged upload {self.pk} | Created: {self.created_on}'
+
+
+class CalendarFeed(models.Model):
+    """
+    The secret in a user's calendar feed link. Replacing it revokes every
+    link handed out before.
+    """
+    user = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        related_name='calendar_feed'
+    )
+    secret = models.CharField(max_length=32)
+    updated_on = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f'Calendar feed of {self.user} | Updated: {self.updated_on}'
+
+
+class EventTombstone(models.Model):
+    """
+    Records an event whose row has been removed, by its purge, the archive
+    or the admin, so the change feed can tell clients to drop it.
+    """
+    event_id = models.BigIntegerField()
+    deleted_on = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=['deleted_on', 'id'], name='events_tombstone_idx'
+            ),
+        ]
+
+    def __str__(self):
+        return f'Event {self.event_id} | Deleted: {self.deleted_on}'
+
+
+class ArchivedEvent(models.Model):
+    """
+    Past event moved out of the Event table by events.archive, keeping its
+    id so links to it keep working.
+    """
+    id = models.BigIntegerField(primary_key=True)
+    event_name = models.CharField(max_length=75)
+    event_date = models.DateTimeField()
+    is_online = models.BooleanField()
+    url_or_address = models.CharField(max_length=100)
+    maximum_attendees = models.PositiveSmallIntegerField()
+    short_description = models.TextField(max_length=200)
+    image = CloudinaryField('image')
+    long_description = models.TextField(max_length=3000)
+    long_description_html = models.TextField(blank=True)
+    event_organiser = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='archived_events'
+    )
+    # Archived events can't be booked, so the total is stored once
+    tickets_booked = models.PositiveIntegerField(default=0)
+    created_on = models.DateTimeField()
+    updated_on = models.DateTimeField()
+    archived_on = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f'{self.event_name} | Date: {self.event_date} | Archived'
+
+    def image_url(self, width=None):
+        return image_url(self.image, width)
+
+    @property
+    def image_srcset(self):
+        return image_srcset(self.image)
+
+    @property
+    def current_attendees(self):
+        return self.tickets_booked
+
+
+class ArchivedBooking(models.Model):
+    id = models.BigIntegerField(primary_key=True)
+    event = models.ForeignKey(
+        ArchivedEvent, on_delete=models.CASCADE, related_name='bookings')
+    ticketholder = models.ForeignKey(
+        User, on_delete=models.CASCADE, related_name='archived_bookings')
+    tickets = models.PositiveSmallIntegerField(
+        choices=Booking.NO_OF_TICKETS
+    )
+
+    def __str__(self):
+        return (
+            f'An archived booking for {self.event} | '
+            f'Ticketholder: {self.ticketholder}'
+        )
+
+
+class ArchivedReview(models.Model):
+    id = models.BigIntegerField(primary_key=True)
+    event = models.ForeignKey(
+        ArchivedEvent,
+        on_delete=models.CASCADE,
+        related_name='reviews'
+    )
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='archived_reviews'
+    )
+    rating = models.PositiveSmallIntegerField(
+        choices=Review.RATING_CHOICES
+    )
+    content = models.TextField(
+        max_length=300
+    )
+    approved = models.BooleanField(default=False)
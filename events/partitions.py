@@ -0,0 +1,134 @@
+from datetime import date, datetime, timezone
+
+from django.conf import settings
+from django.db import connection as default_connection, transaction
+
+# Migration 0010 partitions the booking table by event_date on PostgreSQL,
+# one partition per month plus a default for dates none of them covers.
+# Other databases keep the plain table.
+TABLE = 'events_booking'
+DEFAULT_PARTITION = f'{TABLE}_default'
+
+DEFAULT_BOOKING_PARTITIONS = {
+    # Partitions are created this many months ahead, so new bookings never
+    # land in the default partition
+    'MONTHS_AHEAD': 12,
+}
+
+
+def booking_partitions_settings():
+    """
+    Returns the BOOKING_PARTITIONS setting merged over the defaults.
+    """
+    options = dict(DEFAULT_BOOKING_PARTITIONS)
+    options.update(getattr(settings, 'BOOKING_PARTITIONS', {}))
+    return options
+
+
+def month_start(value):
+    return date(value.year, value.month, 1)
+
+
+def add_months(month, months):
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(month):
+    return f'{TABLE}_{month:%Y_%m}'
+
+
+def _bound(month):
+    return datetime(
+        month.year, month.month, 1, tzinfo=timezone.utc
+    ).isoformat()
+
+
+def is_partitioned(connection=default_connection):
+    """
+    Returns whether the booking table is partitioned on this database.
+    """
+    if connection.vendor != 'postgresql':
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'SELECT relkind FROM pg_class WHERE oid = to_regclass(%s)',
+            [TABLE],
+        )
+        row = cursor.fetchone()
+    return row is not None and row[0] == 'p'
+
+
+def list_partitions(connection=default_connection):
+    """
+    Returns the name, bounds and estimated row count of each partition.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'SELECT child.relname, '
+            'pg_get_expr(child.relpartbound, child.oid), child.reltuples '
+            'FROM pg_inherits '
+            'JOIN pg_class child ON child.oid = pg_inherits.inhrelid '
+            'WHERE pg_inherits.inhparent = to_regclass(%s) '
+            'ORDER BY child.relname',
+            [TABLE],
+        )
+        return [
+            (name, bounds, max(int(rows), 0))
+            for name, bounds, rows in cursor.fetchall()
+        ]
+
+
+def create_partition(month, connection=default_connection):
+    """
+    Creates the partition for the month starting at ``month`` unless it
+    exists, and returns whether it was created. Bookings for that month
+    that ended up in the default partition are moved into it.
+    """
+    name = partition_name(month)
+    start, end = _bound(month), _bound(add_months(month, 1))
+    with transaction.atomic(using=connection.alias):
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT to_regclass(%s)', [name])
+            if cursor.fetchone()[0] is not None:
+                return False
+            # Holds off bookings for the month until the partition is
+            # attached, so none lands in the default partition meanwhile
+            # and fails the ATTACH's check of it
+            cursor.execute(
+                f'LOCK TABLE {DEFAULT_PARTITION} IN ACCESS EXCLUSIVE MODE'
+            )
+            cursor.execute(
+                f'CREATE TABLE {name} (LIKE {TABLE} INCLUDING DEFAULTS)'
+            )
+            cursor.execute(
+                f'WITH moved AS (DELETE FROM {DEFAULT_PARTITION} '
+                f'WHERE event_date >= %s AND event_date < %s RETURNING *) '
+                f'INSERT INTO {name} SELECT * FROM moved',
+                [start, end],
+            )
+            cursor.execute(
+                f'ALTER TABLE {TABLE} ATTACH PARTITION {name} '
+                f"FOR VALUES FROM ('{start}') TO ('{end}')"
+            )
+    return True
+
+
+def ensure_partitions(first_month=None, months_ahead=None,
+                      connection=default_connection):
+    """
+    Creates any missing monthly partitions from ``first_month``, the
+    current month by default, to MONTHS_AHEAD months from now. Returns the
+    names of the partitions created.
+    """
+    if months_ahead is None:
+        months_ahead = booking_partitions_settings()['MONTHS_AHEAD']
+    current = month_start(datetime.now(timezone.utc))
+    month = first_month or current
+    last = add_months(current, months_ahead)
+    created = []
+    while month <= last:
+        if create_partition(month, connection):
+            created.append(partition_name(month))
+        month = add_months(month, 1)
+    return created
@@ -0,0 +1,196 @@
+import hashlib
+import re
+import threading
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db.utils import InterfaceError, OperationalError
+from django.http import HttpResponse
+from django.template.loader import render_to_string
+
+DEFAULT_CIRCUIT_BREAKER = {
+    'FAILURE_THRESHOLD': 5,
+    'RESET_TIMEOUT': 30,
+    'CACHE_ALIAS': 'default',
+    'STALE_PAGE_TTL': 60 * 60 * 24,
+    'STALE_PAGE_REFRESH': 60,
+}
+
+DATABASE_ERRORS = (OperationalError, InterfaceError)
+
+BANNER_PLACEHOLDER = '<!-- Degraded Mode Banner -->'
+MESSAGES_PATTERN = re.compile(
+    r'<aside id="messages">.*?</aside>', re.DOTALL
+)
+
+
+def circuit_breaker_settings():
+    """
+    Returns the CIRCUIT_BREAKER setting merged over the defaults.
+    """
+    options = dict(DEFAULT_CIRCUIT_BREAKER)
+    options.update(getattr(settings, 'CIRCUIT_BREAKER', {}))
+    return options
+
+
+class CircuitBreaker:
+    """
+    Tracks database failures for this worker. After ``failure_threshold``
+    failures in a row the breaker opens and requests stop reaching the
+    database. Once ``reset_timeout`` seconds have passed a single trial
+    request is let through: if it succeeds the breaker closes again,
+    otherwise it stays open for another timeout.
+    """
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half-open'
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.state = self.CLOSED
+            self.failures = 0
+            self.opened_at = None
+
+    def allow_request(self):
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            reset_timeout = circuit_breaker_settings()['RESET_TIMEOUT']
+            if (
+                self.state == self.OPEN
+                and time.monotonic() - self.opened_at >= reset_timeout
+            ):
+                self.state = self.HALF_OPEN
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.state = self.CLOSED
+            self.failures = 0
+            self.opened_at = None
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            threshold = circuit_breaker_settings()['FAILURE_THRESHOLD']
+            if self.state == self.HALF_OPEN or self.failures >= threshold:
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+
+    @property
+    def is_open(self):
+        return self.state != self.CLOSED
+
+
+database_breaker = CircuitBreaker()
+
+
+def _stale_page_key(request):
+    # The session cookie identifies the visitor without a database query.
+    session_key = request.COOKIES.get(settings.SESSION_COOKIE_NAME, '')
+    visitor = hashlib.md5(session_key.encode()).hexdigest()[:16]
+    path = hashlib.md5(request.get_full_path().encode()).hexdigest()
+    return f'events:stale-page:{path}', f'events:stale-page:{path}:{visitor}'
+
+
+def _store_stale_page(request, response):
+    options = circuit_breaker_settings()
+    cache = caches[options['CACHE_ALIAS']]
+    page_key, visitor_key = _stale_page_key(request)
+    if not cache.add(
+        f'{visitor_key}:fresh', True, options['STALE_PAGE_REFRESH']
+    ):
+        return
+    content = MESSAGES_PATTERN.sub('', response.content.decode())
+    cache.set(visitor_key, content, options['STALE_PAGE_TTL'])
+    if not request.COOKIES.get(settings.SESSION_COOKIE_NAME):
+        cache.set(page_key, content, options['STALE_PAGE_TTL'])
+
+
+def degraded_response(request, message=None):
+    """
+    Returns a 503 page that can be rendered without touching the database.
+    """
+    content = render_to_string('503.html', {'message': message})
+    return HttpResponse(content, status=503, headers={
+        'Retry-After': circuit_breaker_settings()['RESET_TIMEOUT'],
+    })
+
+
+def stale_response(request):
+    """
+    Returns the last render of the requested page stored for this visitor,
+    or for anonymous visitors, with a banner explaining that the content
+    may be out of date. Falls back to the 503 page when there is none.
+    """
+    cache = caches[circuit_breaker_settings()['CACHE_ALIAS']]
+    page_key, visitor_key = _stale_page_key(request)
+    found = cache.get_many([visitor_key, page_key])
+    content = found.get(visitor_key) or found.get(page_key)
+    if content is None:
+        return degraded_response(request)
+    banner = render_to_string('degraded-banner.html')
+    response = HttpResponse(content.replace(BANNER_PLACEHOLDER, banner))
+    response['Cache-Control'] = 'no-store'
+    return response
+
+
+def serve_stale_when_degraded(view):
+    """
+    Decorator for read-only views. Successful GET renders are kept as the
+    last known copy of the page, and that copy is served whenever the
+    database is failing or the circuit breaker is open.
+    """
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if request.method != 'GET':
+            return view(request, *args, **kwargs)
+        if not database_breaker.allow_request():
+            return stale_response(request)
+        try:
+            response = view(request, *args, **kwargs)
+            if hasattr(response, 'render'):
+                response.render()
+        except DATABASE_ERRORS:
+            database_breaker.record_failure()
+            return stale_response(request)
+        database_breaker.record_success()
+        if response.status_code == 200 and not response.streaming:
+            _store_stale_page(request, response)
+        return response
+    return wrapper
+
+
+def fail_fast_when_degraded(view):
+    """
+    Decorator for views that change data. While the circuit breaker is open
+    POSTs are refused straight away with a friendly message rather than
+    waiting on the database.
+    """
+    unavailable_message = (
+        "We're having trouble reaching our database right now, so your "
+        "changes couldn't be saved. Please try again in a few minutes."
+    )
+
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if request.method != 'POST':
+            return view(request, *args, **kwargs)
+        if not database_breaker.allow_request():
+            return degraded_response(request, unavailable_message)
+        try:
+            response = view(request, *args, **kwargs)
+        except DATABASE_ERRORS:
+            database_breaker.record_failure()
+            return degraded_response(request, unavailable_message)
+        database_breaker.record_success()
+        return response
+    return wrapper
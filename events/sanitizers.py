@@ -0,0 +1,67 @@
+import re
+from functools import lru_cache
+
+# Everything the Summernote toolbar can produce that is safe to show to
+# other users. Inline styles are dropped as they can be used to overlay
+# fake page content.
+ALLOWED_TAGS = frozenset({
+    'a', 'b', 'blockquote', 'br', 'code', 'div', 'em', 'h1', 'h2', 'h3',
+    'h4', 'h5', 'h6', 'hr', 'i', 'img', 'li', 'ol', 'p', 'pre', 's', 'span',
+    'strike', 'strong', 'sub', 'sup', 'table', 'tbody', 'td', 'th', 'thead',
+    'tr', 'u', 'ul',
+})
+ALLOWED_ATTRIBUTES = {
+    'a': ['href', 'title', 'target'],
+    'img': ['src', 'alt', 'width', 'height'],
+    'td': ['colspan', 'rowspan'],
+    'th': ['colspan', 'rowspan'],
+}
+ALLOWED_PROTOCOLS = frozenset({'http', 'https', 'mailto'})
+# Links opened in a new tab get no window.opener, so the page they open
+# can't navigate this one to a phishing copy
+TARGET_REL = 'noopener noreferrer'
+
+# bleach keeps the text of tags it strips, which for these would leave
+# code showing on the page
+DROPPED_ELEMENTS = re.compile(
+    r'<(script|style)\b.*?</\1\s*>', re.IGNORECASE | re.DOTALL
+)
+
+
+@lru_cache(maxsize=None)
+def _cleaner():
+    # bleach is only needed when an event is saved, so it is imported here
+    # rather than at startup.
+    import bleach
+    from bleach.html5lib_shim import Filter
+
+    class TargetRelFilter(Filter):
+        # Runs after the whitelist, so the rel it sets is kept while any
+        # rel in the input has already been stripped
+        def __iter__(self):
+            for token in super().__iter__():
+                if (
+                    token['type'] in ('StartTag', 'EmptyTag')
+                    and token['name'] == 'a'
+                    and (None, 'target') in token['data']
+                ):
+                    token['data'][(None, 'rel')] = TARGET_REL
+                yield token
+
+    return bleach.Cleaner(
+        tags=ALLOWED_TAGS,
+        attributes=ALLOWED_ATTRIBUTES,
+        protocols=ALLOWED_PROTOCOLS,
+        strip=True,
+        strip_comments=True,
+        filters=[TargetRelFilter],
+    )
+
+
+def sanitize_description(html):
+    """
+    Returns the Summernote HTML with every tag, attribute and URL scheme
+    outside of the whitelist removed, ready to be output with |safe. Links
+    that open in a new tab are given rel="noopener noreferrer".
+    """
+    return _cleaner().clean(DROPPED_ELEMENTS.sub('', html or ''))
@@ -0,0 +1,101 @@
+from django.contrib.auth.models import User
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from .cache import (
+    forget_missing, get_event_repository, invalidate_event_pages
+)
+from .cdn import EVENT_LIST_KEY, event_key, purge_on_commit
+from .ical import forget_calendar_access, touch_calendars
+from .models import Event, EventTombstone, Booking, Review
+
+
+@receiver(post_save, sender=Event)
+@receiver(post_delete, sender=Event)
+def invalidate_cached_event(sender, instance, **kwargs):
+    """
+    Drops the saved or deleted event from every tier of the event cache.
+    """
+    get_event_repository().invalidate(instance.pk)
+    invalidate_event_pages(instance.pk)
+
+
+@receiver(post_save, sender=Booking)
+@receiver(post_delete, sender=Booking)
+def invalidate_booked_event_pages(sender, instance, **kwargs):
+    """
+    Drops cached pages showing attendee counts for the booked event.
+    """
+    invalidate_event_pages(instance.event_id)
+
+
+@receiver(post_save, sender=Event)
+@receiver(post_save, sender=Booking)
+@receiver(post_save, sender=Review)
+def forget_created_id(sender, instance, created, **kwargs):
+    """
+    Stops treating an id as missing once an object has been created with it.
+    """
+    if created:
+        forget_missing(sender, instance.pk)
+
+
+@receiver(post_save, sender=Event)
+@receiver(post_delete, sender=Event)
+def purge_event_from_cdn(sender, instance, **kwargs):
+    """
+    Purges the event's page and every event list from the CDN.
+    """
+    purge_on_commit([event_key(instance.pk), EVENT_LIST_KEY])
+
+
+@receiver(post_save, sender=Booking)
+@receiver(post_delete, sender=Booking)
+@receiver(post_save, sender=Review)
+@receiver(post_delete, sender=Review)
+def purge_booked_event_from_cdn(sender, instance, **kwargs):
+    """
+    Purges pages showing the attendee count or reviews of the event.
+    """
+    keys = [event_key(instance.event_id)]
+    if sender is Booking:
+        keys.append(EVENT_LIST_KEY)
+    purge_on_commit(keys)
+
+
+@receiver(post_delete, sender=Event)
+def record_event_tombstone(sender, instance, **kwargs):
+    """
+    Leaves a tombstone so the change feed reports the removed event.
+    """
+    EventTombstone.objects.create(event_id=instance.pk)
+
+
+@receiver(post_save, sender=Booking)
+@receiver(post_delete, sender=Booking)
+def touch_ticketholder_calendar(sender, instance, **kwargs):
+    """
+    Makes the ticketholder's calendar feed render again on its next poll.
+    """
+    touch_calendars([instance.ticketholder_id])
+
+
+@receiver(post_save, sender=Event)
+@receiver(post_delete, sender=Event)
+def touch_event_calendars(sender, instance, **kwargs):
+    """
+    Makes the calendar feeds of the organiser and every ticketholder of
+    the event render again on their next poll.
+    """
+    ticketholders = Booking.all_objects.filter(
+        event_id=instance.pk
+    ).values_list('ticketholder_id', flat=True).distinct()
+    touch_calendars([instance.event_organiser_id, *ticketholders])
+
+
+@receiver(post_save, sender=User)
+def check_calendar_access_again(sender, instance, **kwargs):
+    """
+    Makes the next poll of the user's calendar feed check their account
+    again, so a deactivated user's feed stops being served.
+    """
+    forget_calendar_access(instance.pk)
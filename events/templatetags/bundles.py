@@ -0,0 +1,14 @@
+from django import template
+from events.bundles import render_bundles
+
+register = template.Library()
+
+
+@register.simple_tag
+def bundle(*names):
+    """
+    Renders the stylesheets and deferred scripts of the named bundles.
+
+    Usage: {% bundle 'datepicker' 'ratings' %}
+    """
+    return render_bundles(names)
@@ -0,0 +1,48 @@
+from django import template
+from django.utils.html import format_html
+from events.images import (
+    event_images_settings, image_srcset, image_url, is_pending
+)
+
+register = template.Library()
+
+# Sizes hint for the three/two/one column card grids
+CARD_SIZES = '(min-width: 992px) 33vw, (min-width: 768px) 50vw, 100vw'
+
+
+@register.simple_tag
+def responsive_image(image, alt='', css_class='', sizes=CARD_SIZES,
+                     loading='lazy'):
+    """
+    Renders an img tag offering the browser resized variants of an event
+    image through srcset, lazily loaded unless told otherwise.
+
+    Usage: {% responsive_image event.image alt=event.event_name %}
+    """
+    return format_html(
+        '<img class="{}" src="{}" srcset="{}" sizes="{}" alt="{}" '
+        'loading="{}" decoding="async">',
+        css_class,
+        image_url(image, event_images_settings()['DEFAULT_WIDTH']),
+        image_srcset(image),
+        sizes,
+        alt,
+        loading,
+    )
+
+
+@register.simple_tag
+def preload_image(image, sizes=CARD_SIZES):
+    """
+    Renders a preload hint for an image that is the largest element above
+    the fold, so the browser starts fetching it before the img is parsed.
+    """
+    if not image or is_pending(image):
+        return ''
+    return format_html(
+        '<link rel="preload" as="image" href="{}" imagesrcset="{}" '
+        'imagesizes="{}" fetchpriority="high">',
+        image_url(image, event_images_settings()['DEFAULT_WIDTH']),
+        image_srcset(image),
+        sizes,
+    )
@@ -0,0 +1,222 @@
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from .api import encode_cursor
+from .models import Event, Booking, Review
+
+
+@override_settings(EVENTS_API={'PAGE_SIZE': 2})
+class EventsApiTests(TestCase):
+    """
+    TestCase for the read-only JSON API over events, bookings and reviews.
+    """
+
+    def setUp(self):
+        self.organiser = User.objects.create_user(
+            username='organiser', password='pass'
+        )
+        self.attendee = User.objects.create_user(
+            username='attendee', password='pass'
+        )
+        # Two events on the same date, so pages have to break ties by id
+        date = timezone.now() + timezone.timedelta(days=3)
+        self.events = [
+            self.create_event('First', date),
+            self.create_event('Second', date),
+            self.create_event('Third', date + timezone.timedelta(days=1)),
+        ]
+        self.create_event('Past', timezone.now() - timezone.timedelta(days=1))
+        Booking.objects.create(
+            event=self.events[0], ticketholder=self.attendee, tickets=2
+        )
+        Review.objects.create(
+            event=self.events[0], author=self.attendee, rating=5,
+            content='Great', approved=True,
+        )
+        Review.objects.create(
+            event=self.events[0], author=self.organiser, rating=1,
+            content='Pending', approved=False,
+        )
+
+    def create_event(self, name, date):
+        return Event.objects.create(
+            event_name=name,
+            event_date=date,
+            image='test.jpg',
+            event_organiser=self.organiser,
+            is_online=True,
+            maximum_attendees=10,
+            short_description='Short description',
+            long_description='Long description',
+        )
+
+    def test_cursor_pagination(self):
+        """
+        Tests whether following the next cursor walks every upcoming event
+        once, in date order.
+        """
+        url = reverse('api-events')
+        names = []
+        params = {'fields': 'event_name'}
+        while True:
+            data = self.client.get(url, params).json()
+            names += [event['event_name'] for event in data['results']]
+            if not data['next']:
+                break
+            params['cursor'] = data['next']
+        self.assertEqual(names, ['First', 'Second', 'Third'])
+
+    def test_sparse_fields(self):
+        """
+        Tests whether only the requested fields are returned, and unknown
+        fields are rejected.
+        """
+        url = reverse('api-event', args=[self.events[0].id])
+        response = self.client.get(url, {'fields': 'id,tickets_booked'})
+        self.assertEqual(
+            response.json(), {'id': self.events[0].id, 'tickets_booked': 2}
+        )
+        self.assertEqual(response.content.count(b' '), 0)
+        response = self.client.get(url, {'fields': 'id,secret'})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), {'error': 'Unknown fields: secret'})
+
+    def test_etag_revalidation(self):
+        """
+        Tests whether a request with a matching ETag gets an empty 304.
+        """
+        url = reverse('api-event', args=[self.events[1].id])
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        response = self.client.get(
+            url, HTTP_IF_NONE_MATCH=response['ETag']
+        )
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b'')
+
+    def test_reviews_are_approved_only(self):
+        """
+        Tests whether an event's reviews leave out unapproved ones.
+        """
+        response = self.client.get(
+            reverse('api-event-reviews', args=[self.events[0].id])
+        )
+        self.assertEqual(
+            [review['content'] for review in response.json()['results']],
+            ['Great'],
+        )
+
+    def test_bookings_are_the_users_own(self):
+        """
+        Tests whether bookings need a signed in user and only list theirs.
+        """
+        url = reverse('api-bookings')
+        self.assertEqual(self.client.get(url).status_code, 401)
+        self.client.login(username='attendee', password='pass')
+        response = self.client.get(url)
+        self.assertEqual(response.json()['results'], [{
+            'id': Booking.objects.get().id,
+            'event': self.events[0].id,
+            'event_name': 'First',
+            'event_date': response.json()['results'][0]['event_date'],
+            'tickets': 2,
+        }])
+        self.assertIn('private', response['Cache-Control'])
+
+    def test_invalid_cursor(self):
+        """
+        Tests whether a tampered cursor is rejected.
+        """
+        response = self.client.get(reverse('api-events'), {'cursor': 'abc'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_naive_cursor_date(self):
+        """
+        Tests whether a cursor with a date lacking a UTC offset is rejected
+        rather than compared with aware dates.
+        """
+        cursor = encode_cursor(['2030-01-01T00:00:00', 1])
+        response = self.client.get(reverse('api-events'), {'cursor': cursor})
+        self.assertEqual(response.status_code, 400)
+        cursor = encode_cursor(['2030-01-01T00:00:00', [None, 0], [None, 0]])
+        response = self.client.get(
+            reverse('api-event-changes'), {'cursor': cursor}
+        )
+        self.assertEqual(response.status_code, 400)
+
+
+@override_settings(
+    EVENTS_API={'PAGE_SIZE': 2}, EVENT_CHANGES={'SETTLE_SECONDS': 0}
+)
+class EventChangesApiTests(TestCase):
+    """
+    TestCase for syncing the event catalogue through the change feed.
+    """
+
+    def setUp(self):
+        self.organiser = User.objects.create_user(username='organiser')
+        self.events = [self.create_event(name) for name in 'ABC']
+
+    def create_event(self, name):
+        return Event.objects.create(
+            event_name=name,
+            event_date=timezone.now() + timezone.timedelta(days=3),
+            image='test.jpg',
+            event_organiser=self.organiser,
+            is_online=True,
+            maximum_attendees=10,
+            short_description='Short description',
+            long_description='Long description',
+        )
+
+    def sync(self, cursor=None):
+        """
+        Follows the feed until it has caught up, returning the changed
+        names, deleted ids and the cursor for the next sync.
+        """
+        changed, deleted = [], []
+        while True:
+            params = {'fields': 'event_name'}
+            if cursor:
+                params['cursor'] = cursor
+            data = self.client.get(
+                reverse('api-event-changes'), params
+            ).json()
+            changed += [event['event_name'] for event in data['changed']]
+            deleted += data['deleted']
+            cursor = data['next']
+            if not data['more']:
+                return changed, deleted, cursor
+
+    def test_sync_returns_only_changes(self):
+        """
+        Tests whether a sync from a cursor returns just the events updated
+        or deleted since, including soft deleted and removed ones.
+        """
+        changed, deleted, cursor = self.sync()
+        self.assertEqual(changed, ['A', 'B', 'C'])
+        self.assertEqual(deleted, [])
+
+        self.assertEqual(self.sync(cursor)[:2], ([], []))
+
+        self.events[1].event_name = 'B2'
+        self.events[1].save()
+        self.events[0].deleted_on = timezone.now()
+        self.events[0].save()
+        removed_id = self.events[2].id
+        self.events[2].delete()
+        changed, deleted, cursor = self.sync(cursor)
+        self.assertEqual(changed, ['B2'])
+        self.assertEqual(sorted(deleted), [self.events[0].id, removed_id])
+
+    def test_expired_cursor(self):
+        """
+        Tests whether a cursor older than the tombstones kept is refused.
+        """
+        cursor = self.sync()[2]
+        with self.settings(EVENT_CHANGES={'TOMBSTONE_DAYS': -1}):
+            response = self.client.get(
+                reverse('api-event-changes'), {'cursor': cursor}
+            )
+        self.assertEqual(response.status_code, 410)
@@ -0,0 +1,134 @@
+from io import StringIO
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from .models import (
+    ArchivedBooking, ArchivedEvent, ArchivedReview, Booking, Event, Review
+)
+
+
+@override_settings(EVENT_ARCHIVE={'AFTER_DAYS': 30})
+class EventArchiveTests(TestCase):
+    """
+    TestCase for moving past events into the archive tables and reading
+    them back from the detail page and dashboard.
+    """
+
+    def setUp(self):
+        self.organiser = User.objects.create_user(
+            username='organiser', password='pass'
+        )
+        self.attendee = User.objects.create_user(
+            username='attendee', password='pass'
+        )
+        self.old_event = self.create_event('Old Event', days_ago=60)
+        self.recent_event = self.create_event('Recent Event', days_ago=5)
+        Booking.objects.create(
+            event=self.old_event, ticketholder=self.attendee, tickets=3
+        )
+        Review.objects.create(
+            event=self.old_event, author=self.attendee, rating=4,
+            content='A night to remember', approved=True,
+        )
+
+    def create_event(self, name, days_ago):
+        return Event.objects.create(
+            event_name=name,
+            event_date=timezone.now() - timezone.timedelta(days=days_ago),
+            image='test.jpg',
+            event_organiser=self.organiser,
+            is_online=True,
+            maximum_attendees=10,
+            short_description='Short description',
+            long_description='Long description',
+        )
+
+    def archive(self):
+        out = StringIO()
+        call_command('archive_events', stdout=out)
+        return out.getvalue()
+
+    def test_events_past_horizon_are_moved(self):
+        """
+        Tests whether only events past the retention horizon are moved to
+        the archive, along with their bookings and reviews, keeping their
+        ids.
+        """
+        self.assertIn('Archived 1 events', self.archive())
+        self.assertFalse(
+            Event.all_objects.filter(pk=self.old_event.pk).exists()
+        )
+        self.assertTrue(Event.objects.filter(pk=self.recent_event.pk).exists())
+        self.assertEqual(Booking.all_objects.count(), 0)
+        self.assertEqual(Review.all_objects.count(), 0)
+        archived = ArchivedEvent.objects.get(pk=self.old_event.pk)
+        self.assertEqual(archived.event_name, 'Old Event')
+        self.assertEqual(archived.tickets_booked, 3)
+        self.assertEqual(ArchivedBooking.objects.get().event, archived)
+        self.assertTrue(ArchivedReview.objects.get().approved)
+
+    def test_detail_page_falls_back_to_archive(self):
+        """
+        Tests whether the detail page of an archived event is served from
+        the archive with its reviews, and can't be reviewed again.
+        """
+        self.archive()
+        self.client.login(username='attendee', password='pass')
+        response = self.client.get(
+            reverse('event-detail', args=[self.old_event.id])
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.context['archived'])
+        self.assertContains(response, 'A night to remember')
+        self.assertContains(response, '3/10')
+        self.assertNotContains(response, 'Edit Review')
+
+    def test_archived_page_has_no_attendee_list(self):
+        """
+        Tests whether the organiser isn't offered the attendee list of an
+        archived event, whose bookings have left the Booking table.
+        """
+        self.archive()
+        self.client.login(username='organiser', password='pass')
+        response = self.client.get(
+            reverse('event-detail', args=[self.old_event.id])
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertNotContains(response, 'Show Attendees')
+        self.assertNotContains(
+            response, reverse('event-attendees', args=[self.old_event.id])
+        )
+
+    def test_archived_reviews_are_read_only(self):
+        """
+        Tests whether the author of an archived review is sent back to the
+        event page when editing or deleting it, and the review is kept.
+        """
+        review_id = Review.objects.get().id
+        self.archive()
+        self.client.login(username='attendee', password='pass')
+        event_url = reverse('event-detail', args=[self.old_event.id])
+        response = self.client.get(reverse('edit-review', args=[review_id]))
+        self.assertRedirects(response, event_url)
+        response = self.client.post(
+            reverse('delete-review', args=[review_id]), follow=True
+        )
+        self.assertRedirects(response, event_url)
+        self.assertContains(response, 'reviews can no longer be changed')
+        self.assertTrue(ArchivedReview.objects.filter(pk=review_id).exists())
+        response = self.client.get(reverse('edit-review', args=[987654]))
+        self.assertEqual(response.status_code, 404)
+
+    def test_dashboard_lists_archived_bookings(self):
+        """
+        Tests whether the dashboard lists the user's archived bookings.
+        """
+        self.archive()
+        self.client.login(username='attendee', password='pass')
+        response = self.client.get(reverse('my-events'))
+        self.assertContains(response, 'Your Archived Events')
+        booking = response.context['archived_bookings'][0]
+        self.assertEqual(booking.event.event_name, 'Old Event')
+        self.assertTrue(booking.has_review)
@@ -0,0 +1,65 @@
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from .bundles import render_bundles
+from .models import Event
+
+
+class BundleTests(TestCase):
+    """
+    TestCase for per-page static bundles.
+    """
+
+    def setUp(self):
+        self.organiser = User.objects.create_user(
+            username='org', password='pass'
+        )
+        self.event = Event.objects.create(
+            event_name='Preloaded Event',
+            event_date=timezone.now() + timezone.timedelta(days=3),
+            image='test.jpg',
+            event_organiser=self.organiser,
+            is_online=True,
+            maximum_attendees=10,
+            short_description='Short description',
+            long_description='Long description',
+        )
+
+    def test_scripts_are_deferred_after_stylesheets(self):
+        """
+        Tests whether a bundle renders its stylesheets before its scripts,
+        and loads the scripts with defer.
+        """
+        html = render_bundles(('datepicker',))
+        self.assertLess(html.index('flatpickr.min.css'), html.index('<script'))
+        self.assertIn('<script defer src="/static/js/datepicker.js">', html)
+
+    @override_settings(STATIC_BUNDLES={'extra': {'js': ['js/extra.js']}})
+    def test_bundles_can_be_added_in_settings(self):
+        """
+        Tests whether bundles from the STATIC_BUNDLES setting are used.
+        """
+        self.assertIn('js/extra.js', render_bundles(('extra',)))
+
+    def test_pages_only_load_their_bundles(self):
+        """
+        Tests whether the date picker is only loaded on the pages with a date
+        field.
+        """
+        self.client.login(username='org', password='pass')
+        self.assertNotContains(self.client.get(reverse('index')), 'flatpickr')
+        self.assertContains(
+            self.client.get(reverse('create-event')), 'js/datepicker.js'
+        )
+
+    def test_event_detail_preloads_hero_image(self):
+        """
+        Tests whether the event detail page asks the browser to preload the
+        event image.
+        """
+        response = self.client.get(
+            reverse('event-detail', args=[self.event.id])
+        )
+        self.assertContains(response, 'rel="preload" as="image"')
+        self.assertContains(response, 'js/ratings.js')
@@ -0,0 +1,376 @@
+from django.contrib.auth.models import User
+import os
+import shutil
+import tempfile
+import threading
+from django.core.cache import caches
+from django.core.cache.backends.filebased import FileBasedCache
+from django.http import Http404
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from unittest.mock import patch
+from . import cache as event_cache
+from .cache import (
+    CacheBroker, EventRepository, LocalLRUCache, acquire_lock,
+    bump_list_generation, get_event_or_404, get_event_repository,
+    get_or_rebuild, list_generation, release_lock
+)
+from .models import Event, Booking
+
+LOCMEM_CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'event-cache-tests',
+    },
+    'volatile': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'event-cache-tests-volatile',
+    },
+}
+
+
+class LocalLRUCacheTests(TestCase):
+    """
+    TestCase for the per-worker LRU cache.
+    """
+
+    def test_evicts_least_recently_used(self):
+        """
+        Tests whether the oldest unread entry is evicted once the cache is
+        full.
+        """
+        lru = LocalLRUCache(max_entries=2, ttl=60)
+        lru.set(1, 'a')
+        lru.set(2, 'b')
+        lru.get(1)
+        lru.set(3, 'c')
+        self.assertEqual(lru.get(1), 'a')
+        self.assertIsNone(lru.get(2, None))
+        self.assertEqual(len(lru), 2)
+
+    def test_entries_expire_after_ttl(self):
+        """
+        Tests whether entries are dropped once their TTL has passed.
+        """
+        lru = LocalLRUCache(max_entries=2, ttl=30)
+        with patch('events.cache.time.monotonic', return_value=100):
+            lru.set(1, 'a')
+        with patch('events.cache.time.monotonic', return_value=131):
+            self.assertIsNone(lru.get(1, None))
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class EventRepositoryTests(TestCase):
+    """
+    TestCase for the two-tier EventRepository.
+    """
+
+    def setUp(self):
+        caches['default'].clear()
+        get_event_repository().local.clear()
+        self.organiser = User.objects.create_user(
+            username='organiser',
+            password='pass'
+        )
+        self.event = Event.objects.create(
+            event_name='Cached Event',
+            event_date=timezone.now() + timezone.timedelta(days=3),
+            image='test.jpg',
+            event_organiser=self.organiser,
+            is_online=True,
+            maximum_attendees=10,
+            short_description='Short description',
+            long_description='Long description',
+        )
+
+    def make_worker(self):
+        broker = CacheBroker(poll_interval=0)
+        return EventRepository(broker=broker, stats_publish_every=0)
+
+    def test_tiers_are_used_in_order(self):
+        """
+        Tests whether the first lookup hits the database, the next one the
+        local LRU, and a second worker the shared cache.
+        """
+        worker = self.make_worker()
+        with self.assertNumQueries(1):
+            worker.get(self.event.id)
+        with self.assertNumQueries(0):
+            event = worker.get(self.event.id)
+        self.assertEqual(event.event_name, 'Cached Event')
+        other_worker = self.make_worker()
+        with self.assertNumQueries(0):
+            other_worker.get(self.event.id)
+        self.assertEqual(worker.stats()['local_hits'], 1)
+        self.assertEqual(worker.stats()['misses'], 1)
+        self.assertEqual(other_worker.stats()['shared_hits'], 1)
+        self.assertEqual(worker.stats()['hit_ratio'], 0.5)
+
+    def test_concurrent_publishes_are_all_logged(self):
+        """
+        Tests whether workers publishing at once through the file cache
+        each get their own place in the log, so no message is lost.
+        """
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        with override_settings(CACHES={'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': directory,
+        }}):
+            publishers = [CacheBroker(lock_wait=10) for _ in range(4)]
+            threads = [
+                threading.Thread(target=lambda broker=broker: [
+                    broker.publish(n) for n in range(10)
+                ])
+                for broker in publishers
+            ]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            cache = publishers[0].cache
+            self.assertEqual(cache.get('events:broker:seq'), 40)
+            messages = cache.get_many(
+                [f'events:broker:msg:{seq}' for seq in range(1, 41)]
+            )
+            self.assertEqual(len(messages), 40)
+
+    def test_returned_events_are_copies(self):
+        """
+        Tests whether changing a returned event leaves the cached copy
+        untouched.
+        """
+        worker = self.make_worker()
+        worker.get(self.event.id).event_name = 'Changed'
+        self.assertEqual(worker.get(self.event.id).event_name, 'Cached Event')
+
+    def test_invalidation_reaches_other_workers(self):
+        """
+        Tests whether an invalidation published by one worker removes the
+        event from another worker's local cache.
+        """
+        worker = self.make_worker()
+        other_worker = self.make_worker()
+        worker.get(self.event.id)
+        other_worker.get(self.event.id)
+        Event.objects.filter(id=self.event.id).update(event_name='Renamed')
+        worker.invalidate(self.event.id)
+        self.assertEqual(
+            other_worker.get(self.event.id).event_name,
+            'Renamed'
+        )
+
+    @override_settings(EVENT_CACHE={'ENABLED': True})
+    def test_saving_an_event_invalidates_it(self):
+        """
+        Tests whether saving an event through the ORM refreshes the cached
+        copy.
+        """
+        get_event_repository().get(self.event.id)
+        self.event.event_name = 'Saved Name'
+        self.event.save()
+        self.assertEqual(
+            get_event_or_404(self.event.id).event_name,
+            'Saved Name'
+        )
+
+    def test_missing_event_raises_404(self):
+        """
+        Tests whether an unknown id raises Http404.
+        """
+        with self.assertRaises(Http404):
+            get_event_or_404(self.event.id + 100)
+
+
+@override_settings(CACHES=LOCMEM_CACHES, EVENT_CACHE={'ENABLED': True})
+class GetOrRebuildTests(TestCase):
+    """
+    TestCase for single-flight, stale-while-revalidate page caching.
+    """
+
+    def setUp(self):
+        caches['default'].clear()
+        get_event_repository().local.clear()
+
+    def test_fresh_value_is_not_rebuilt(self):
+        """
+        Tests whether a fresh cached value is returned without calling the
+        rebuild function again.
+        """
+        calls = []
+        get_or_rebuild('key', lambda: calls.append(1) or 'value', 60)
+        value = get_or_rebuild('key', lambda: calls.append(1) or 'new', 60)
+        self.assertEqual(value, 'value')
+        self.assertEqual(len(calls), 1)
+
+    def test_stale_value_served_while_another_request_rebuilds(self):
+        """
+        Tests whether a stale value is returned, without rebuilding, while
+        another request holds the rebuild lock.
+        """
+        get_or_rebuild('key', lambda: 'old', timeout=0, stale_timeout=60)
+        caches['default'].add('key:rebuilding', True)
+        value = get_or_rebuild('key', lambda: 'new', 0, 60)
+        self.assertEqual(value, 'old')
+
+    def test_stale_value_rebuilt_by_first_request(self):
+        """
+        Tests whether the first request to see a stale value rebuilds it.
+        """
+        get_or_rebuild('key', lambda: 'old', timeout=0, stale_timeout=60)
+        self.assertEqual(get_or_rebuild('key', lambda: 'new', 60), 'new')
+        self.assertEqual(get_or_rebuild('key', lambda: 'newer', 60), 'new')
+
+    @override_settings(EVENT_CACHE={'ENABLED': True, 'REBUILD_WAIT': 1})
+    def test_miss_waits_for_rebuilding_request(self):
+        """
+        Tests whether a request that misses while another is rebuilding
+        waits for its value rather than rebuilding too.
+        """
+        caches['default'].add('key:rebuilding', True)
+
+        def finish_rebuild(seconds):
+            caches['default'].set(
+                'key', {'value': 'shared', 'fresh_until': 2 ** 40}
+            )
+
+        with patch('events.cache.time.sleep', side_effect=finish_rebuild):
+            value = get_or_rebuild('key', lambda: 'duplicate', 60)
+        self.assertEqual(value, 'shared')
+
+    def test_flight_locks_are_dropped(self):
+        """
+        Tests whether rebuilding leaves no per-key lock behind, so distinct
+        search keys don't pile up in every worker.
+        """
+        for number in range(3):
+            get_or_rebuild(f'search:{number}', lambda: 'value', 60)
+        self.assertEqual(event_cache._flights, {})
+
+    def test_file_cache_lock_is_exclusive(self):
+        """
+        Tests whether the rebuild lock on the file cache can only be held
+        once, is free again after release, and expires if never released.
+        """
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        cache = FileBasedCache(os.path.join(directory, 'cache'), {})
+        lock_dir = os.path.join(directory, 'locks')
+        with self.settings(EVENT_CACHE={'LOCK_DIR': lock_dir}):
+            self.assertTrue(acquire_lock(cache, 'key:rebuilding', 10))
+            self.assertFalse(acquire_lock(cache, 'key:rebuilding', 10))
+            self.assertEqual(len(os.listdir(lock_dir)), 1)
+            release_lock(cache, 'key:rebuilding')
+            self.assertTrue(acquire_lock(cache, 'key:rebuilding', 10))
+            lock_file = event_cache._lock_file('key:rebuilding')
+            os.utime(lock_file, (0, 0))
+            self.assertTrue(acquire_lock(cache, 'key:rebuilding', 10))
+
+    def test_culled_list_generation_is_not_reused(self):
+        """
+        Tests whether a list generation dropped from the cache is replaced
+        by a new one, so lists cached under earlier ones stay unreachable.
+        """
+        first = list_generation()
+        bump_list_generation()
+        second = list_generation()
+        self.assertNotEqual(second, first)
+        caches['default'].delete('events:list-generation')
+        self.assertNotIn(list_generation(), (first, second))
+
+    def test_new_booking_refreshes_cached_detail_page(self):
+        """
+        Tests whether the cached attendee count on the event detail page is
+        refreshed once a booking is made.
+        """
+        organiser = User.objects.create_user(username='org', password='pass')
+        attendee = User.objects.create_user(username='att', password='pass')
+        event = Event.objects.create(
+            event_name='Popular Event',
+            event_date=timezone.now() + timezone.timedelta(days=3),
+            image='test.jpg',
+            event_organiser=organiser,
+            is_online=True,
+            maximum_attendees=10,
+            short_description='Short description',
+            long_description='Long description',
+        )
+        url = reverse('event-detail', args=[event.id])
+        self.assertEqual(
+            self.client.get(url).context['event'].current_attendees, 0
+        )
+        Booking.objects.create(event=event, ticketholder=attendee, tickets=3)
+        self.assertEqual(
+            self.client.get(url).context['event'].current_attendees, 3
+        )
+
+
+@override_settings(CACHES=LOCMEM_CACHES, EVENT_CACHE={'ENABLED': True})
+class NegativeCacheTests(TestCase):
+    """
+    TestCase for remembering ids that don't exist.
+    """
+
+    def setUp(self):
+        for alias in LOCMEM_CACHES:
+            caches[alias].clear()
+        get_event_repository().local.clear()
+        self.user = User.objects.create_user(username='user', password='pass')
+        self.client.login(username='user', password='pass')
+
+    def test_missing_event_is_rejected_without_a_query(self):
+        """
+        Tests whether a second request for a nonexistent event is answered
+        with a 404 without querying the database for the event.
+        """
+        url = reverse('event-detail', args=[987654])
+        self.assertEqual(self.client.get(url).status_code, 404)
+        with patch.object(Event.objects, 'get') as mock_get:
+            self.assertEqual(self.client.get(url).status_code, 404)
+        mock_get.assert_not_called()
+
+    def test_missing_review_is_remembered(self):
+        """
+        Tests whether a nonexistent review id is remembered after the first
+        lookup.
+        """
+        url = reverse('edit-review', args=[987654])
+        self.assertEqual(self.client.get(url).status_code, 404)
+        self.assertTrue(caches['default'].get('events:missing:review:987654'))
+
+    def test_creating_an_event_forgets_its_id(self):
+        """
+        Tests whether an id remembered as missing is served once an event
+        with that id is created.
+        """
+        url = reverse('event-detail', args=[987654])
+        self.client.get(url)
+        Event.objects.create(
+            id=987654,
+            event_name='Late Event',
+            event_date=timezone.now() + timezone.timedelta(days=3),
+            image='test.jpg',
+            event_organiser=self.user,
+            is_online=True,
+            maximum_attendees=10,
+            short_description='Short description',
+            long_description='Long description',
+        )
+        self.assertEqual(self.client.get(url).status_code, 200)
+
+    @override_settings(
+        EVENT_CACHE={'ENABLED': True, 'NEGATIVE_CACHE_ALIAS': 'volatile'}
+    )
+    def test_missing_ids_kept_in_their_own_cache(self):
+        """
+        Tests whether missing ids are remembered in the negative cache
+        alias, leaving the event cache to the events.
+        """
+        url = reverse('event-detail', args=[987654])
+        self.assertEqual(self.client.get(url).status_code, 404)
+        self.assertIsNone(caches['default'].get('events:missing:event:987654'))
+        self.assertTrue(caches['volatile'].get('events:missing:event:987654'))
+        with patch.object(Event.objects, 'get') as mock_get:
+            self.assertEqual(self.client.get(url).status_code, 404)
+        mock_get.assert_not_called()
@@ -0,0 +1,139 @@
+from django.contrib.auth.models import User
+from django.core.cache import caches
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from .ical import calendar_token, fold
+from .models import Event, Booking
+
+
+class CalendarFeedTests(TestCase):
+    """
+    TestCase for the per-user iCalendar feed of bookings and organised
+    events.
+    """
+
+    def setUp(self):
+        # Test databases reuse user ids, so cached secrets would be stale
+        caches['default'].clear()
+        self.user = User.objects.create_user(
+            username='test', password='pass'
+        )
+        self.organiser = User.objects.create_user(username='organiser')
+        self.booked_event = self.create_event('Booked, Event', self.organiser)
+        self.own_event = self.create_event('Own Event', self.user)
+        self.booking = Booking.objects.create(
+            event=self.booked_event, ticketholder=self.user, tickets=2
+        )
+        self.url = reverse('calendar-feed', args=[calendar_token(self.user)])
+
+    def create_event(self, name, organiser):
+        return Event.objects.create(
+            event_name=name,
+            event_date=timezone.now() + timezone.timedelta(days=3),
+            image='test.jpg',
+            event_organiser=organiser,
+            is_online=True,
+            maximum_attendees=10,
+            short_description='Short description',
+            long_description='Long description',
+        )
+
+    def fetch(self, **headers):
+        response = self.client.get(self.url, headers=headers)
+        if response.streaming:
+            response.feed = b''.join(response.streaming_content).decode()
+        else:
+            response.feed = response.content.decode()
+        return response
+
+    def test_feed_lists_bookings_and_organised_events(self):
+        """
+        Tests whether the feed has an entry for the user's booking and
+        their own event, with text escaped.
+        """
+        response = self.fetch()
+        self.assertEqual(
+            response['Content-Type'], 'text/calendar; charset=utf-8'
+        )
+        self.assertTrue(response.feed.startswith('BEGIN:VCALENDAR\r\n'))
+        self.assertIn('SUMMARY:Booked\\, Event (2 tickets)', response.feed)
+        self.assertIn('SUMMARY:Own Event (organiser)', response.feed)
+        self.assertIn(f'UID:event-{self.own_event.id}@ourglass', response.feed)
+
+    def test_polls_are_served_from_cache(self):
+        """
+        Tests whether repeated polls need no queries, and an up to date
+        client gets an empty 304.
+        """
+        etag = self.fetch()['ETag']
+        with self.assertNumQueries(0):
+            response = self.fetch()
+            self.assertIn('Own Event', response.feed)
+            response = self.fetch(if_none_match=etag)
+        self.assertEqual(response.status_code, 304)
+
+    def test_booking_change_renders_feed_again(self):
+        """
+        Tests whether changing a booking gives the feed a new version.
+        """
+        etag = self.fetch()['ETag']
+        self.booking.tickets = 1
+        self.booking.save()
+        response = self.fetch(if_none_match=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('(1 ticket)', response.feed)
+
+    def test_event_change_renders_attendee_feeds_again(self):
+        """
+        Tests whether renaming an event updates its attendees' feeds.
+        """
+        etag = self.fetch()['ETag']
+        self.booked_event.event_name = 'Renamed'
+        self.booked_event.save()
+        response = self.fetch(if_none_match=etag)
+        self.assertIn('SUMMARY:Renamed (2 tickets)', response.feed)
+
+    def test_invalid_token(self):
+        """
+        Tests whether a tampered token is refused.
+        """
+        response = self.client.get(
+            reverse('calendar-feed', args=[f'{self.organiser.id}:forged'])
+        )
+        self.assertEqual(response.status_code, 404)
+
+    def test_long_lines_are_folded(self):
+        """
+        Tests whether content lines are folded at 75 octets.
+        """
+        folded = fold('DESCRIPTION:' + 'é' * 80)
+        lines = folded.rstrip('\r\n').split('\r\n')
+        self.assertTrue(all(len(line.encode()) <= 75 for line in lines))
+        self.assertEqual(
+            ''.join(line[1:] if n else line for n, line in enumerate(lines)),
+            'DESCRIPTION:' + 'é' * 80,
+        )
+
+    def test_reset_link_revokes_the_old_one(self):
+        """
+        Tests whether resetting the calendar link stops the old one from
+        working, even once its feed has been cached, and the new one works.
+        """
+        self.fetch()
+        self.client.login(username='test', password='pass')
+        response = self.client.post(reverse('reset-calendar'))
+        self.assertRedirects(response, reverse('my-events'))
+        self.assertEqual(self.client.get(self.url).status_code, 404)
+        new_url = reverse('calendar-feed', args=[calendar_token(self.user)])
+        self.assertNotEqual(new_url, self.url)
+        self.assertEqual(self.client.get(new_url).status_code, 200)
+
+    def test_deactivated_user_feed_is_refused(self):
+        """
+        Tests whether a deactivated user's cached feed is no longer served.
+        """
+        self.fetch()
+        self.user.is_active = False
+        self.user.save()
+        self.assertEqual(self.client.get(self.url).status_code, 404)
@@ -0,0 +1,97 @@
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from .models import Event, Booking
+
+
+class PurgeHandler(BaseHTTPRequestHandler):
+    """
+    Stand-in for a CDN purge API that records the keys it was sent.
+    """
+
+    def do_POST(self):
+        self.server.purged.append(self.headers['Surrogate-Key'])
+        self.send_response(200)
+        self.end_headers()
+        self.wfile.write(b'{"status": "ok"}')
+
+    def log_message(self, format, *args):
+        pass
+
+
+class CDNTests(TestCase):
+    """
+    TestCase for CDN cache headers and purging by surrogate key.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.server = HTTPServer(('127.0.0.1', 0), PurgeHandler)
+        cls.server.purged = []
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+        super().tearDownClass()
+
+    def setUp(self):
+        self.server.purged.clear()
+        self.user = User.objects.create_user(username='test', password='pass')
+        self.event = Event.objects.create(
+            event_name='Cached Event',
+            event_date=timezone.now() + timezone.timedelta(days=3),
+            image='test.jpg',
+            event_organiser=self.user,
+            is_online=True,
+            maximum_attendees=10,
+            short_description='Short description',
+            long_description='Long description',
+        )
+        self.url = reverse('event-detail', args=[self.event.id])
+
+    def test_anonymous_pages_are_tagged(self):
+        """
+        Tests whether anonymous event pages can be cached by the CDN and
+        carry the event's surrogate key.
+        """
+        response = self.client.get(self.url)
+        self.assertIn('public', response['Cache-Control'])
+        self.assertIn('s-maxage=300', response['Cache-Control'])
+        self.assertEqual(response['Surrogate-Key'], f'event-{self.event.id}')
+        response = self.client.get(reverse('search-events'))
+        self.assertEqual(response['Surrogate-Key'], 'event-list')
+
+    def test_logged_in_pages_are_private(self):
+        """
+        Tests whether pages rendered for a logged in user are kept out of
+        the CDN.
+        """
+        self.client.login(username='test', password='pass')
+        response = self.client.get(self.url)
+        self.assertIn('private', response['Cache-Control'])
+        self.assertFalse(response.has_header('Surrogate-Key'))
+
+    def test_booking_purges_event_and_lists(self):
+        """
+        Tests whether a new booking purges the event page and the event
+        lists through the configured purge endpoint.
+        """
+        attendee = User.objects.create_user(username='att', password='pass')
+        purge_settings = {
+            'BACKEND': 'events.cdn.HTTPPurger',
+            'PURGE_URL': 'http://127.0.0.1:%d/purge' % self.server.server_port,
+        }
+        with override_settings(CDN=purge_settings):
+            with self.captureOnCommitCallbacks(execute=True):
+                Booking.objects.create(
+                    event=self.event, ticketholder=attendee, tickets=1
+                )
+        self.assertEqual(
+            self.server.purged, [f'event-{self.event.id} event-list']
+        )
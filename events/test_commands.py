@@ -0,0 +1,181 @@
+from io import StringIO
+from django.contrib.auth.models import User
+from django.core.cache import caches
+from django.core.management import call_command
+from django.template import engines
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+from .cache import event_detail_key, list_generation
+from .management.commands.profile_imports import (
+    import_script, parse_importtime
+)
+from .models import Event
+
+LOCMEM_CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'warm-caches-tests',
+    },
+    'volatile': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'warm-caches-tests-volatile',
+    },
+}
+
+
+class SanitizeDescriptionsCommandTests(TestCase):
+    """
+    TestCase for the sanitize_descriptions management command.
+    """
+
+    def setUp(self):
+        organiser = User.objects.create_user(
+            username='organiser',
+            password='pass'
+        )
+        self.event = Event.objects.create(
+            event_name='Old Event',
+            event_date=timezone.now() + timezone.timedelta(days=3),
+            image='test.jpg',
+            event_organiser=organiser,
+            is_online=True,
+            maximum_attendees=10,
+            short_description='Short description',
+            long_description='<p>Hello</p><script>alert(1)</script>',
+        )
+        # Simulates a row saved before descriptions were sanitized
+        Event.objects.filter(pk=self.event.pk).update(
+            long_description_html=''
+        )
+
+    def test_backfills_missing_descriptions(self):
+        """
+        Tests whether events without a sanitized description get one.
+        """
+        out = StringIO()
+        call_command('sanitize_descriptions', stdout=out)
+        self.event.refresh_from_db()
+        self.assertEqual(self.event.long_description_html, '<p>Hello</p>')
+        self.assertIn('Sanitized 1 event', out.getvalue())
+
+    def test_skips_sanitized_descriptions_by_default(self):
+        """
+        Tests whether events that already have a sanitized description are
+        left alone unless --all is passed.
+        """
+        Event.objects.filter(pk=self.event.pk).update(
+            long_description_html='<p>Kept</p>'
+        )
+        call_command('sanitize_descriptions', stdout=StringIO())
+        self.event.refresh_from_db()
+        self.assertEqual(self.event.long_description_html, '<p>Kept</p>')
+        call_command('sanitize_descriptions', '--all', stdout=StringIO())
+        self.event.refresh_from_db()
+        self.assertEqual(self.event.long_description_html, '<p>Hello</p>')
+
+
+class CompileTemplatesCommandTests(SimpleTestCase):
+    """
+    TestCase for the compile_templates management command.
+    """
+
+    def test_templates_are_compiled_into_the_cache(self):
+        """
+        Tests whether the project templates are held by the cached loader
+        after the command runs, and the compile time is reported.
+        """
+        out = StringIO()
+        call_command('compile_templates', stdout=out)
+        self.assertIn('Compiled', out.getvalue())
+        loader = engines['django'].engine.template_loaders[0]
+        cached = {
+            template.origin.template_name
+            for template in loader.get_template_cache.values()
+            if hasattr(template, 'origin')
+        }
+        self.assertIn('base.html', cached)
+        self.assertIn('events/event-detail.html', cached)
+        self.assertIn('contact/contact.html', cached)
+
+
+class ProfileImportsCommandTests(SimpleTestCase):
+    """
+    TestCase for the profile_imports management command.
+    """
+
+    def test_self_time_is_summed_by_package(self):
+        """
+        Tests whether the self time of submodules is added to their
+        top-level package, and the header line is ignored.
+        """
+        output = (
+            'import time: self [us] | cumulative | imported package\n'
+            'import time:       100 |        100 |     events.images\n'
+            'import time:       250 |        350 |   events.models\n'
+            'import time:        40 |         40 | bleach\n'
+        )
+        self.assertEqual(
+            parse_importtime(output), {'events': 350, 'bleach': 40}
+        )
+
+    def test_django_is_set_up_before_the_module(self):
+        """
+        Tests whether Django is set up on its own by default, and before
+        the module when one is given.
+        """
+        self.assertEqual(import_script(), 'import django; django.setup()')
+        self.assertEqual(
+            import_script('ourglass.urls'),
+            'import django; django.setup(); import ourglass.urls'
+        )
+
+
+@override_settings(CACHES=LOCMEM_CACHES, EVENT_CACHE={'ENABLED': True})
+class WarmCachesCommandTests(TestCase):
+    """
+    TestCase for the warm_caches management command.
+    """
+
+    def setUp(self):
+        caches['default'].clear()
+        organiser = User.objects.create_user(
+            username='organiser',
+            password='pass'
+        )
+        self.event = Event.objects.create(
+            event_name='Upcoming Event',
+            event_date=timezone.now() + timezone.timedelta(days=3),
+            image='test.jpg',
+            event_organiser=organiser,
+            is_online=True,
+            maximum_attendees=10,
+            short_description='Short description',
+            long_description='Long description',
+        )
+
+    def test_pages_are_rendered_into_the_cache(self):
+        """
+        Tests whether the index, upcoming event and search pages are cached
+        after the command runs.
+        """
+        out = StringIO()
+        call_command(
+            'warm_caches', workers=1, host='testserver', search=['upcoming'],
+            stdout=out
+        )
+        self.assertIn('Warmed 3 of 3 pages', out.getvalue())
+        cache = caches['default']
+        self.assertIsNotNone(cache.get(f'events:latest:{list_generation()}'))
+        self.assertIsNotNone(cache.get(event_detail_key(self.event.id)))
+
+    def test_nothing_is_started_after_the_deadline(self):
+        """
+        Tests whether pages are skipped once the deadline has passed.
+        """
+        out = StringIO()
+        call_command(
+            'warm_caches', workers=1, deadline=-1, host='testserver',
+            stdout=out
+        )
+        self.assertIn('Warmed 0 of 3 pages', out.getvalue())
+        self.assertIn('3 skipped', out.getvalue())
@@ -0,0 +1,109 @@
+import gzip
+from unittest import skipUnless
+from django.contrib.auth.models import User
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from ourglass.compression import brotli
+from ourglass.templates import collapse_whitespace
+from .models import Event
+
+
+class CollapseWhitespaceTests(SimpleTestCase):
+    """
+    TestCase for collapsing template whitespace at load time.
+    """
+
+    def test_indentation_and_blank_lines_are_removed(self):
+        """
+        Tests whether indentation and blank lines are collapsed into a
+        single newline.
+        """
+        self.assertEqual(
+            collapse_whitespace('<div>\n    <p>A  b</p>\n\n    </div>\n'),
+            '<div>\n<p>A  b</p>\n</div>\n'
+        )
+
+    def test_significant_whitespace_is_kept(self):
+        """
+        Tests whether pre, textarea and script blocks are left untouched.
+        """
+        source = (
+            '<pre>\n    code\n</pre>\n  <textarea>\n  text</textarea>'
+            '<script>\n    let a;\n</script>'
+        )
+        self.assertEqual(
+            collapse_whitespace(source),
+            '<pre>\n    code\n</pre>\n<textarea>\n  text</textarea>'
+            '<script>\n    let a;\n</script>'
+        )
+
+
+class CompressionMiddlewareTests(TestCase):
+    """
+    TestCase for compressing responses.
+    """
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='test', password='pass')
+        Event.objects.create(
+            event_name='Compressed Event',
+            event_date=timezone.now() + timezone.timedelta(days=3),
+            image='test.jpg',
+            event_organiser=self.user,
+            is_online=True,
+            maximum_attendees=10,
+            short_description='Short description',
+            long_description='Long description',
+        )
+
+    def test_html_is_gzipped(self):
+        """
+        Tests whether pages are gzipped for browsers that accept it, and
+        still decompress to the page.
+        """
+        response = self.client.get(
+            reverse('index'), HTTP_ACCEPT_ENCODING='gzip'
+        )
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', response['Vary'])
+        self.assertIn(b'Ourglass', gzip.decompress(response.content))
+
+    @override_settings(RESPONSE_COMPRESSION={'MIN_SIZE': 10 ** 7})
+    def test_small_responses_are_not_compressed(self):
+        """
+        Tests whether responses under the size threshold are left alone.
+        """
+        response = self.client.get(
+            reverse('index'), HTTP_ACCEPT_ENCODING='gzip'
+        )
+        self.assertFalse(response.has_header('Content-Encoding'))
+
+    @override_settings(RESPONSE_COMPRESSION={'CSRF_PAGES': 'skip'})
+    def test_pages_with_csrf_tokens_can_be_skipped(self):
+        """
+        Tests whether pages with a CSRF token are sent uncompressed when
+        configured to, while other pages are still compressed.
+        """
+        self.client.login(username='test', password='pass')
+        form_page = self.client.get(
+            reverse('create-event'), HTTP_ACCEPT_ENCODING='gzip, br'
+        )
+        self.assertFalse(form_page.has_header('Content-Encoding'))
+        self.assertContains(form_page, 'csrfmiddlewaretoken')
+
+    @skipUnless(brotli, 'Brotli is not installed')
+    def test_pages_with_csrf_tokens_are_not_brotli_compressed(self):
+        """
+        Tests whether pages with a CSRF token fall back to padded gzip while
+        other pages use Brotli.
+        """
+        self.client.login(username='test', password='pass')
+        form_page = self.client.get(
+            reverse('create-event'), HTTP_ACCEPT_ENCODING='gzip, br'
+        )
+        self.assertEqual(form_page['Content-Encoding'], 'gzip')
+        index = self.client.get(
+            reverse('index'), HTTP_ACCEPT_ENCODING='gzip, br'
+        )
+        self.assertEqual(index['Content-Encoding'], 'br')
@@ -0,0 +1,101 @@
+from io import StringIO
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from jobs.models import Job
+from jobs.queue import work
+from .models import Event, Booking, Review
+
+
+@override_settings(
+    JOBS={'EAGER': False},
+    EVENT_DELETION={'BATCH_SIZE': 2, 'TIME_LIMIT': 0},
+)
+class EventDeletionTests(TestCase):
+    """
+    TestCase for hiding deleted events and purging their rows in batches.
+    """
+
+    def setUp(self):
+        self.organiser = User.objects.create_user(
+            username='organiser', password='pass'
+        )
+        self.event = Event.objects.create(
+            event_name='Large Event',
+            event_date=timezone.now() - timezone.timedelta(days=1),
+            image='test.jpg',
+            event_organiser=self.organiser,
+            is_online=True,
+            maximum_attendees=100,
+            short_description='Short description',
+            long_description='Long description',
+        )
+        for number in range(5):
+            attendee = User.objects.create_user(username=f'attendee{number}')
+            Booking.objects.create(
+                event=self.event, ticketholder=attendee, tickets=1
+            )
+            if number < 3:
+                Review.objects.create(
+                    event=self.event, author=attendee, rating=5,
+                    content='Great', approved=True,
+                )
+
+    def delete(self):
+        self.client.login(username='organiser', password='pass')
+        return self.client.get(reverse('delete-event', args=[self.event.id]))
+
+    def test_deleted_event_is_hidden_immediately(self):
+        """
+        Tests whether deleting an event hides it and its bookings and
+        reviews from the default managers before any rows are removed.
+        """
+        self.delete()
+        self.assertFalse(Event.objects.filter(pk=self.event.pk).exists())
+        self.assertEqual(Booking.objects.count(), 0)
+        self.assertEqual(Review.objects.count(), 0)
+        self.assertEqual(Booking.all_objects.count(), 5)
+        response = self.client.get(
+            reverse('event-detail', args=[self.event.id])
+        )
+        self.assertEqual(response.status_code, 404)
+
+    def test_purge_resumes_in_batches(self):
+        """
+        Tests whether the purge job removes one batch at a time, queuing
+        itself again past its time limit, and finally removes the event.
+        """
+        self.delete()
+        self.assertEqual(work(burst=True, max_jobs=1), 1)
+        self.assertEqual(Review.all_objects.count(), 1)
+        job = Job.objects.get(task='events.deletion.purge_deleted_event')
+        self.assertEqual(job.status, Job.QUEUED)
+
+        out = StringIO()
+        call_command('purge_deleted_events', stdout=out)
+        self.assertIn('5 bookings and 1 reviews left, purge queued',
+                      out.getvalue())
+
+        work(burst=True)
+        self.assertEqual(Booking.all_objects.count(), 0)
+        self.assertEqual(Review.all_objects.count(), 0)
+        self.assertFalse(Event.all_objects.filter(pk=self.event.pk).exists())
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.DONE)
+        self.assertEqual(job.attempts, 1)
+
+    def test_resume_requeues_failed_purges(self):
+        """
+        Tests whether the command queues the purge again for a deleted
+        event whose purge job failed.
+        """
+        self.delete()
+        Job.objects.update(status=Job.FAILED)
+        out = StringIO()
+        call_command('purge_deleted_events', resume=True, stdout=out)
+        self.assertIn(f'Queued a purge for event {self.event.id}',
+                      out.getvalue())
+        work(burst=True)
+        self.assertFalse(Event.all_objects.filter(pk=self.event.pk).exists())
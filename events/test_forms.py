@@ -3,10 +3,17 @@ from django.core.files.uploadedfile import SimpleUploadedFile
 from django.test import TestCase
 from django.utils import timezone
 from datetime import timedelta
+from unittest.mock import patch
 from .forms import EventForm, ReviewForm, BookingForm
 from .models import Event, Booking
 # Create your tests here.
 
+# Header of an 800x600 PNG, enough for the upload validation
+TEST_IMAGE = (
+    b'\x89PNG\r\n\x1a\n\x00\x00\x00\rIHDR'
+    b'\x00\x00\x03\x20\x00\x00\x02\x58\x08\x02\x00\x00\x00'
+)
+
 
 class TestEventForm(TestCase):
     """
@@ -19,7 +26,7 @@ class TestEventForm(TestCase):
         """
         self.image = SimpleUploadedFile(
             name='test_image.jpg',
-            content=b'test',
+            content=TEST_IMAGE,
             content_type='image/jpeg'
         )
         self.form_data = {
@@ -131,6 +138,50 @@ class TestEventForm(TestCase):
         form = EventForm(data=data, files={'image': self.image})
         self.assertTrue(form.is_valid())
 
+    @patch('cloudinary.uploader.upload')
+    def test_saved_description_is_sanitized(self, mock_upload):
+        """
+        Tests whether saving the form stores a sanitized copy of the long
+        description with scripts, event handlers and javascript links
+        removed and links opening a new tab given rel="noopener
+        noreferrer", while keeping the formatting.
+        """
+        mock_upload.return_value = {
+            'public_id': 'fake-id',
+            'version': 1,
+            'type': 'upload',
+            'format': 'jpg',
+            'resource_type': 'image',
+        }
+        organiser = User.objects.create_user(
+            username='organiser',
+            password='pass'
+        )
+        data = self.form_data.copy()
+        data['long_description'] = (
+            '<p onclick="steal()"><b>Bold</b> text</p>'
+            '<script>alert(1)</script>'
+            '<a href="javascript:steal()">link</a>'
+            '<a href="https://example.com" target="_blank" rel="opener">'
+            'site</a>'
+        )
+        form = EventForm(data=data, files={'image': self.image})
+        self.assertTrue(form.is_valid(), msg='Form is invalid')
+        event = form.save(commit=False)
+        event.event_organiser = organiser
+        event.save()
+        event.refresh_from_db()
+        self.assertEqual(event.long_description, data['long_description'])
+        self.assertIn('<b>Bold</b>', event.long_description_html)
+        self.assertNotIn('<script', event.long_description_html)
+        self.assertNotIn('onclick', event.long_description_html)
+        self.assertNotIn('javascript:', event.long_description_html)
+        self.assertIn(
+            '<a href="https://example.com" target="_blank" '
+            'rel="noopener noreferrer">site</a>',
+            event.long_description_html
+        )
+
 
 class TestReviewForm(TestCase):
     """
@@ -0,0 +1,88 @@
+from django.template import Context, Template
+from django.test import TestCase, override_settings
+from unittest.mock import patch
+from .images import CloudinaryImageBackend, image_srcset, image_url
+
+LOCAL_IMAGES = {
+    'BACKEND': 'events.images.LocalImageBackend',
+    'WIDTHS': (320, 640),
+    'DEFAULT_WIDTH': 320,
+}
+
+
+class ImageUrlTests(TestCase):
+    """
+    TestCase for building event image URLs.
+    """
+
+    def test_cloudinary_url_is_resized_and_auto_formatted(self):
+        """
+        Tests whether Cloudinary URLs ask the CDN for a resized, automatic
+        format and quality variant.
+        """
+        url = image_url('sample', 640)
+        self.assertIn('f_auto', url)
+        self.assertIn('q_auto', url)
+        self.assertIn('w_640', url)
+
+    @override_settings(EVENT_IMAGES={'WIDTHS': (100, 200)})
+    def test_urls_are_memoized(self):
+        """
+        Tests whether the backend is only asked once for the same image and
+        width.
+        """
+        with patch.object(
+            CloudinaryImageBackend, 'url', return_value='/img'
+        ) as mock_url:
+            image_srcset('memoized')
+            image_srcset('memoized')
+        self.assertEqual(mock_url.call_count, 2)
+
+    @override_settings(EVENT_IMAGES=LOCAL_IMAGES, MEDIA_URL='/media/')
+    def test_local_backend_srcset(self):
+        """
+        Tests whether the local backend lists a variant for each configured
+        width.
+        """
+        self.assertEqual(
+            image_srcset('test.jpg'),
+            '/media/test.jpg?w=320 320w, /media/test.jpg?w=640 640w'
+        )
+
+    def test_empty_image_has_no_url(self):
+        """
+        Tests whether an event without an image gets an empty URL.
+        """
+        self.assertEqual(image_url(None), '')
+
+
+@override_settings(EVENT_IMAGES=LOCAL_IMAGES, MEDIA_URL='/media/')
+class ResponsiveImageTagTests(TestCase):
+    """
+    TestCase for the responsive_image template tag.
+    """
+
+    def render(self, arguments):
+        template = Template(
+            '{% load event_images %}{% responsive_image image ' +
+            arguments + ' %}'
+        )
+        return template.render(
+            Context({'image': 'test.jpg', 'name': 'A <b>event'})
+        )
+
+    def test_renders_lazy_img_with_srcset(self):
+        """
+        Tests whether the tag renders a lazily loaded img with a srcset.
+        """
+        html = self.render('alt=name')
+        self.assertIn('src="/media/test.jpg?w=320"', html)
+        self.assertIn('320w, /media/test.jpg?w=640 640w', html)
+        self.assertIn('loading="lazy"', html)
+        self.assertIn('alt="A &lt;b&gt;event"', html)
+
+    def test_eager_loading(self):
+        """
+        Tests whether images above the fold can opt out of lazy loading.
+        """
+        self.assertIn('loading="eager"', self.render('loading="eager"'))
@@ -0,0 +1,149 @@
+from datetime import date, datetime, timezone as dt_timezone
+from importlib import import_module
+from io import StringIO
+from unittest import skipUnless
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.utils import timezone
+from .models import Event, Booking
+from .partitions import (
+    DEFAULT_PARTITION, add_months, create_partition, is_partitioned,
+    list_partitions, month_start, partition_name
+)
+
+
+class BookingPartitionTests(TestCase):
+    """
+    TestCase for keeping the partition key of bookings in step with their
+    event.
+    """
+
+    def setUp(self):
+        self.organiser = User.objects.create_user(username='organiser')
+        self.attendee = User.objects.create_user(username='attendee')
+        self.event = Event.objects.create(
+            event_name='Test Event',
+            event_date=timezone.now() + timezone.timedelta(days=10),
+            image='test.jpg',
+            event_organiser=self.organiser,
+            is_online=True,
+            maximum_attendees=10,
+            short_description='Short description',
+            long_description='Long description',
+        )
+        self.booking = Booking.objects.create(
+            event=self.event, ticketholder=self.attendee, tickets=1
+        )
+
+    def test_booking_copies_event_date(self):
+        """
+        Tests whether a new booking takes its event's date.
+        """
+        self.assertEqual(self.booking.event_date, self.event.event_date)
+
+    def test_bookings_follow_rescheduled_event(self):
+        """
+        Tests whether rescheduling an event moves its bookings along.
+        """
+        self.event.event_date += timezone.timedelta(days=45)
+        self.event.save()
+        self.booking.refresh_from_db()
+        self.assertEqual(self.booking.event_date, self.event.event_date)
+
+    def test_month_arithmetic(self):
+        """
+        Tests whether months are added across year ends and partitions are
+        named after their month.
+        """
+        self.assertEqual(add_months(date(2024, 11, 1), 3), date(2025, 2, 1))
+        self.assertEqual(add_months(date(2024, 1, 1), -1), date(2023, 12, 1))
+        self.assertEqual(
+            partition_name(date(2025, 2, 1)), 'events_booking_2025_02'
+        )
+
+    def test_command_without_partitioning(self):
+        """
+        Tests whether the maintenance command leaves a plain table alone.
+        """
+        out = StringIO()
+        call_command('booking_partitions', stdout=out)
+        self.assertIn('no partitions to maintain', out.getvalue())
+
+
+@skipUnless(
+    connection.vendor == 'postgresql', 'Partitioning needs PostgreSQL'
+)
+class PostgreSQLPartitionTests(TestCase):
+    """
+    TestCase for the partitioned booking table, run when the tests are
+    pointed at PostgreSQL with TEST_DATABASE_URL.
+    """
+
+    def setUp(self):
+        self.organiser = User.objects.create_user(username='organiser')
+        self.attendee = User.objects.create_user(username='attendee')
+
+    def book(self, event_date):
+        event = Event.objects.create(
+            event_name='Test Event',
+            event_date=event_date,
+            image='test.jpg',
+            event_organiser=self.organiser,
+            is_online=True,
+            maximum_attendees=10,
+            short_description='Short description',
+            long_description='Long description',
+        )
+        return Booking.objects.create(
+            event=event, ticketholder=self.attendee, tickets=1
+        )
+
+    def count_rows(self, table):
+        with connection.cursor() as cursor:
+            cursor.execute(f'SELECT COUNT(*) FROM {table}')
+            return cursor.fetchone()[0]
+
+    def test_migrated_table_is_partitioned(self):
+        """
+        Tests whether the migrations leave the booking table partitioned,
+        with a partition for the current month.
+        """
+        self.assertTrue(is_partitioned())
+        names = [name for name, _, _ in list_partitions()]
+        self.assertIn(DEFAULT_PARTITION, names)
+        self.assertIn(partition_name(month_start(timezone.now())), names)
+
+    def test_new_partition_takes_rows_from_default(self):
+        """
+        Tests whether creating a partition moves the month's bookings out
+        of the default partition.
+        """
+        month = add_months(month_start(timezone.now()), 60)
+        booking = self.book(datetime(
+            month.year, month.month, 15, tzinfo=dt_timezone.utc
+        ))
+        self.assertEqual(self.count_rows(DEFAULT_PARTITION), 1)
+        self.assertTrue(create_partition(month))
+        self.assertEqual(self.count_rows(DEFAULT_PARTITION), 0)
+        self.assertEqual(self.count_rows(partition_name(month)), 1)
+        self.assertEqual(Booking.objects.get().pk, booking.pk)
+        self.assertFalse(create_partition(month))
+
+    def test_migration_rebuild_keeps_bookings(self):
+        """
+        Tests whether the migration's table rebuild keeps every booking
+        and the id sequence, both ways.
+        """
+        migration = import_module('events.migrations.0010_partition_bookings')
+        booking = self.book(timezone.now() + timezone.timedelta(days=3))
+        with connection.schema_editor() as schema_editor:
+            migration._rebuild(schema_editor, partitioned=False)
+        self.assertFalse(is_partitioned())
+        self.assertEqual(Booking.objects.get().pk, booking.pk)
+        with connection.schema_editor() as schema_editor:
+            migration._rebuild(schema_editor, partitioned=True)
+        self.assertTrue(is_partitioned())
+        self.assertEqual(Booking.objects.get().pk, booking.pk)
+        self.assertGreater(self.book(timezone.now()).pk, booking.pk)
@@ -0,0 +1,150 @@
+from django.contrib.auth.models import User
+from django.core.cache import caches
+from django.db.utils import OperationalError
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from unittest.mock import patch
+from .models import Event, Booking
+from .resilience import CircuitBreaker, database_breaker
+
+
+class CircuitBreakerTests(TestCase):
+    """
+    TestCase for the database CircuitBreaker.
+    """
+
+    @override_settings(CIRCUIT_BREAKER={'FAILURE_THRESHOLD': 2})
+    def test_opens_after_threshold_failures(self):
+        """
+        Tests whether the breaker only opens once the failure threshold is
+        reached.
+        """
+        breaker = CircuitBreaker()
+        breaker.record_failure()
+        self.assertTrue(breaker.allow_request())
+        breaker.record_failure()
+        self.assertFalse(breaker.allow_request())
+
+    @override_settings(
+        CIRCUIT_BREAKER={'FAILURE_THRESHOLD': 1, 'RESET_TIMEOUT': 30}
+    )
+    def test_half_open_after_reset_timeout(self):
+        """
+        Tests whether a single trial request is allowed once the reset
+        timeout has passed, and whether a success closes the breaker.
+        """
+        breaker = CircuitBreaker()
+        with patch('events.resilience.time.monotonic', return_value=100):
+            breaker.record_failure()
+        with patch('events.resilience.time.monotonic', return_value=131):
+            self.assertTrue(breaker.allow_request())
+            self.assertFalse(breaker.allow_request())
+        breaker.record_success()
+        self.assertTrue(breaker.allow_request())
+
+
+class DegradedModeViewTests(TestCase):
+    """
+    TestCase for serving stale pages and failing fast while the database is
+    unavailable.
+    """
+
+    def setUp(self):
+        for alias in ('default', 'volatile'):
+            caches[alias].clear()
+        database_breaker.reset()
+        self.organiser = User.objects.create_user(
+            username='organiser',
+            password='pass'
+        )
+        self.user = User.objects.create_user(username='user', password='pass')
+        self.event = Event.objects.create(
+            event_name='Resilient Event',
+            event_date=timezone.now() + timezone.timedelta(days=3),
+            image='test.jpg',
+            event_organiser=self.organiser,
+            is_online=True,
+            maximum_attendees=10,
+            short_description='Short description',
+            long_description='Long description',
+        )
+        self.url = reverse('event-detail', args=[self.event.id])
+
+    def tearDown(self):
+        database_breaker.reset()
+
+    def test_stale_page_served_when_database_fails(self):
+        """
+        Tests whether the last render of a page is served with a banner when
+        the database raises an error.
+        """
+        self.client.get(self.url)
+        with patch(
+            'events.views.get_or_rebuild',
+            side_effect=OperationalError('canceling statement'),
+        ):
+            response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'Resilient Event')
+        self.assertContains(response, 'degraded-banner')
+
+    def test_503_when_no_stale_page_exists(self):
+        """
+        Tests whether a 503 page is returned when the database fails and
+        there is no earlier render of the page.
+        """
+        with patch(
+            'events.views.get_or_rebuild',
+            side_effect=OperationalError('canceling statement'),
+        ):
+            response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 503)
+        self.assertIn('Retry-After', response.headers)
+
+    @override_settings(CIRCUIT_BREAKER={'FAILURE_THRESHOLD': 1})
+    def test_open_breaker_skips_the_database(self):
+        """
+        Tests whether an open breaker serves the stale page without calling
+        the view at all.
+        """
+        self.client.get(self.url)
+        database_breaker.record_failure()
+        with patch('events.views.get_or_rebuild') as mock_rebuild:
+            response = self.client.get(self.url)
+        mock_rebuild.assert_not_called()
+        self.assertContains(response, 'degraded-banner')
+
+    @override_settings(CIRCUIT_BREAKER={'FAILURE_THRESHOLD': 1})
+    def test_booking_post_fails_fast_when_breaker_open(self):
+        """
+        Tests whether booking tickets is refused with a friendly message
+        while the breaker is open, and no booking is created.
+        """
+        self.client.login(username='user', password='pass')
+        database_breaker.record_failure()
+        response = self.client.post(
+            reverse('book-event', args=[self.event.id]),
+            {'tickets': 1}
+        )
+        database_breaker.reset()
+        self.assertEqual(response.status_code, 503)
+        self.assertContains(
+            response, 'trouble reaching our database', status_code=503
+        )
+        self.assertFalse(Booking.objects.exists())
+
+    @override_settings(CIRCUIT_BREAKER={'FAILURE_THRESHOLD': 1})
+    def test_delete_fails_fast_when_breaker_open(self):
+        """
+        Tests whether deleting an event is refused while the breaker is
+        open, leaving the event in place.
+        """
+        self.client.login(username='organiser', password='pass')
+        database_breaker.record_failure()
+        response = self.client.post(
+            reverse('delete-event', args=[self.event.id])
+        )
+        database_breaker.reset()
+        self.assertEqual(response.status_code, 503)
+        self.assertTrue(Event.objects.filter(pk=self.event.pk).exists())
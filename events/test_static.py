@@ -0,0 +1,51 @@
+import shutil
+import tempfile
+from django.conf import settings
+from django.core.management import call_command
+from django.templatetags.static import static
+from django.test import SimpleTestCase, override_settings
+
+MANIFEST_STORAGES = {
+    **settings.STORAGES,
+    'staticfiles': {
+        'BACKEND': 'whitenoise.storage.CompressedManifestStaticFilesStorage',
+    },
+}
+
+
+class StaticPipelineTests(SimpleTestCase):
+    """
+    TestCase for fingerprinted, precompressed static files.
+    """
+
+    def setUp(self):
+        static_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, static_root)
+        self.settings = self.settings(
+            STATIC_ROOT=static_root, STORAGES=MANIFEST_STORAGES
+        )
+        self.settings.enable()
+        self.addCleanup(self.settings.disable)
+        call_command('collectstatic', interactive=False, verbosity=0)
+
+    def test_hashed_files_are_immutable(self):
+        """
+        Tests whether the stylesheet is served under a hashed name with a
+        far-future, immutable Cache-Control header.
+        """
+        url = static('css/style.css')
+        self.assertRegex(url, r'style\.[0-9a-f]{12}\.css$')
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('immutable', response['Cache-Control'])
+        self.assertIn('max-age=315360000', response['Cache-Control'])
+
+    def test_compressed_copy_is_served(self):
+        """
+        Tests whether a precompressed copy is served to browsers that
+        accept it.
+        """
+        response = self.client.get(
+            static('css/style.css'), HTTP_ACCEPT_ENCODING='gzip'
+        )
+        self.assertIn(response['Content-Encoding'], ('br', 'gzip'))
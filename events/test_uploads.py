@@ -0,0 +1,191 @@
+import io
+import os
+import shutil
+import struct
+import tempfile
+from django.contrib.auth.models import User
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from .forms import EventForm
+from .images import image_url, is_pending
+from .models import Event, StagedUpload
+from jobs.models import Job
+from jobs.queue import work
+from .uploads import InvalidImage, read_image_header
+
+
+def png(width, height):
+    return (
+        b'\x89PNG\r\n\x1a\n\x00\x00\x00\rIHDR'
+        + struct.pack('>II', width, height)
+        + b'\x08\x02\x00\x00\x00'
+    )
+
+
+class ReadImageHeaderTests(TestCase):
+    """
+    TestCase for reading image dimensions without decoding the image.
+    """
+
+    def test_png(self):
+        """
+        Tests whether the size of a PNG is read from its IHDR chunk.
+        """
+        self.assertEqual(
+            read_image_header(io.BytesIO(png(800, 600))), ('png', 800, 600)
+        )
+
+    def test_gif(self):
+        """
+        Tests whether the size of a GIF is read from its screen descriptor.
+        """
+        header = b'GIF89a' + struct.pack('<HH', 320, 240) + b'\x00' * 4
+        self.assertEqual(
+            read_image_header(io.BytesIO(header)), ('gif', 320, 240)
+        )
+
+    def test_jpeg_frame_after_other_segments(self):
+        """
+        Tests whether the size of a JPEG is found after skipping the
+        segments that come before its frame header.
+        """
+        app0 = b'\xff\xe0' + struct.pack('>H', 16) + b'JFIF\x00' + b'\x00' * 9
+        sof0 = (
+            b'\xff\xc0' + struct.pack('>HBHH', 17, 8, 480, 640) + b'\x00' * 10
+        )
+        header = b'\xff\xd8' + app0 + sof0
+        self.assertEqual(
+            read_image_header(io.BytesIO(header)), ('jpeg', 640, 480)
+        )
+
+    def test_webp_lossless(self):
+        """
+        Tests whether the size of a lossless WebP is read from its bitstream
+        header.
+        """
+        bits = (1024 - 1) | ((768 - 1) << 14)
+        header = (
+            b'RIFF\x00\x00\x00\x00WEBPVP8L\x00\x00\x00\x00\x2f'
+            + struct.pack('<I', bits) + b'\x00' * 8
+        )
+        self.assertEqual(
+            read_image_header(io.BytesIO(header)), ('webp', 1024, 768)
+        )
+
+    def test_not_an_image(self):
+        """
+        Tests whether a file that isn't an image raises InvalidImage.
+        """
+        with self.assertRaises(InvalidImage):
+            read_image_header(io.BytesIO(b'<html>not an image</html>'))
+
+
+class UploadPipelineTests(TestCase):
+    """
+    TestCase for staging uploads and transferring them in the background.
+    """
+
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.staging_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root)
+        self.addCleanup(shutil.rmtree, self.staging_dir, True)
+        overrides = self.settings(
+            MEDIA_ROOT=self.media_root,
+            MEDIA_URL='/media/',
+            EVENT_IMAGES={'BACKEND': 'events.images.LocalImageBackend'},
+            EVENT_UPLOADS={'STAGING_DIR': self.staging_dir},
+            JOBS={'EAGER': False},
+        )
+        overrides.enable()
+        self.addCleanup(overrides.disable)
+        self.user = User.objects.create_user(username='test', password='pass')
+        self.form_data = {
+            'event_name': 'Uploaded Event',
+            'event_date': (
+                timezone.now() + timezone.timedelta(days=5)
+            ).strftime('%Y-%m-%d %H:%M:%S'),
+            'url_or_address': '123 Test Street',
+            'is_online': False,
+            'maximum_attendees': 10,
+            'short_description': 'Test short description',
+            'long_description': 'Test long description',
+        }
+
+    def upload(self, content):
+        return SimpleUploadedFile(
+            'photo.png', content, content_type='image/png'
+        )
+
+    def test_invalid_images_are_rejected(self):
+        """
+        Tests whether files that aren't images, and images that are too
+        small, are rejected by the form.
+        """
+        for content in (b'not an image', png(50, 50)):
+            form = EventForm(
+                data=self.form_data, files={'image': self.upload(content)}
+            )
+            self.assertFalse(form.is_valid())
+            self.assertIn('image', form.errors)
+
+    @override_settings(EVENT_UPLOADS={'MAX_BYTES': 10})
+    def test_large_files_are_rejected(self):
+        """
+        Tests whether files over the size limit are rejected.
+        """
+        form = EventForm(
+            data=self.form_data, files={'image': self.upload(png(800, 600))}
+        )
+        self.assertFalse(form.is_valid())
+        self.assertIn('smaller than', form.errors['image'][0])
+
+    def create_event(self):
+        self.client.login(username='test', password='pass')
+        self.client.post(reverse('create-event'), {
+            **self.form_data, 'image': self.upload(png(800, 600)),
+        })
+        return Event.objects.get(event_name='Uploaded Event')
+
+    def assert_transferred(self, event):
+        event.refresh_from_db()
+        self.assertFalse(is_pending(event.image))
+        self.assertEqual(event.image_pending, '')
+        self.assertFalse(StagedUpload.objects.exists())
+        self.assertTrue(image_url(event.image).startswith('/media/events/'))
+        stored = os.listdir(os.path.join(self.media_root, 'events'))
+        self.assertEqual(len(stored), 1)
+
+    def test_event_shows_placeholder_until_transferred(self):
+        """
+        Tests whether a new event is saved with a placeholder image and a
+        staged upload, and points at the stored image once a worker has run
+        the queued transfer.
+        """
+        event = self.create_event()
+        self.assertTrue(is_pending(event.image))
+        self.assertIn('event-placeholder', image_url(event.image))
+        staged = StagedUpload.objects.get(pk=event.image_pending)
+        self.assertEqual(bytes(staged.data), png(800, 600))
+        self.assertEqual(os.listdir(self.staging_dir), [])
+        job = Job.objects.get(idempotency_key=f'transfer-image:{event.id}')
+        self.assertEqual(job.status, Job.QUEUED)
+
+        self.assertEqual(work(burst=True), 1)
+        self.assert_transferred(event)
+
+    def test_worker_without_the_web_staging_dir(self):
+        """
+        Tests whether a worker on another machine, which can't see the web
+        process's staging directory, still transfers the image.
+        """
+        event = self.create_event()
+        shutil.rmtree(self.staging_dir)
+        worker_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, worker_dir)
+        with self.settings(EVENT_UPLOADS={'STAGING_DIR': worker_dir}):
+            self.assertEqual(work(burst=True), 1)
+        self.assert_transferred(event)
+        self.assertEqual(os.listdir(worker_dir), [])
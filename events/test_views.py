@@ -9,6 +9,12 @@ from .models import Event, Booking, Review
 from .forms import EventForm, ReviewForm, BookingForm
 # Create your tests here.
 
+# Header of an 800x600 PNG, enough for the upload validation
+TEST_IMAGE = (
+    b'\x89PNG\r\n\x1a\n\x00\x00\x00\rIHDR'
+    b'\x00\x00\x03\x20\x00\x00\x02\x58\x08\x02\x00\x00\x00'
+)
+
 
 class LatestEventListTests(TestCase):
     """
@@ -390,7 +396,7 @@ class TestCreateEventView(TestCase):
         }
         image = SimpleUploadedFile(
             name='test.jpg',
-            content=b'test',
+            content=TEST_IMAGE,
             content_type='image/jpeg'
         )
         form_data = {
@@ -661,6 +667,155 @@ class TestDeleteEventView(TestCase):
         )
 
 
+class TestEventAttendeesView(TestCase):
+    """
+    TestCase for the event_attendees view.
+    """
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='test',
+            password='pass',
+        )
+        self.event = Event.objects.create(
+            event_name='Test Event',
+            event_date=timezone.now() + timezone.timedelta(days=3),
+            image='test.jpg',
+            event_organiser=self.user,
+            is_online=True,
+            maximum_attendees=1000,
+            short_description='Short description',
+            long_description='Long description',
+        )
+        for number in range(60):
+            Booking.objects.create(
+                event=self.event,
+                ticketholder=User.objects.create_user(
+                    username=f'attendee{number}'
+                ),
+                tickets=2,
+            )
+        self.url = reverse('event-attendees', args=[self.event.id])
+
+    def test_event_page_loads_attendees_on_demand(self):
+        """
+        Tests whether the organiser's event page links to the attendee list
+        instead of rendering it.
+        """
+        self.client.login(username='test', password='pass')
+        response = self.client.get(
+            reverse('event-detail', args=[self.event.id])
+        )
+        self.assertContains(response, self.url)
+        self.assertNotContains(response, 'attendee0')
+
+    def test_attendees_are_paginated_with_totals(self):
+        """
+        Tests whether a page of attendees is served with the event's totals
+        in a constant number of queries, as a fragment when fetched by the
+        event page.
+        """
+        self.client.login(username='test', password='pass')
+        self.client.get(self.url)
+        # The event, session and user, the totals and a page of bookings
+        with self.assertNumQueries(5):
+            response = self.client.get(
+                self.url, {'page': 2},
+                headers={'X-Requested-With': 'XMLHttpRequest'},
+            )
+        self.assertTemplateUsed(response, 'events/attendee-list.html')
+        self.assertTemplateNotUsed(response, 'base.html')
+        self.assertContains(response, '60 bookings, 120 tickets booked')
+        self.assertContains(response, 'Page 2 of 2')
+        self.assertEqual(len(response.context['attendees']), 10)
+        self.assertIn('X-Requested-With', response['Vary'])
+
+    def test_attendees_refused_to_other_users(self):
+        """
+        Tests whether users other than the organiser are sent back to the
+        event page.
+        """
+        User.objects.create_user(username='other', password='pass')
+        self.client.login(username='other', password='pass')
+        response = self.client.get(self.url)
+        self.assertRedirects(
+            response, reverse('event-detail', args=[self.event.id])
+        )
+
+
+class TestExportAttendeesView(TestCase):
+    """
+    TestCase for the export_attendees view.
+    """
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='test',
+            password='pass',
+        )
+        self.other_user = User.objects.create_user(
+            username='=other',
+            password='pass',
+        )
+        self.event = Event.objects.create(
+            event_name='Test Event',
+            event_date=timezone.now() + timezone.timedelta(days=3),
+            image='test.jpg',
+            event_organiser=self.user,
+            is_online=True,
+            maximum_attendees=100,
+            short_description='Short description',
+            long_description='Long description',
+        )
+        self.booking = Booking.objects.create(
+            event=self.event, ticketholder=self.other_user, tickets=2
+        )
+
+    def export(self, export_format):
+        return self.client.get(
+            reverse('export-attendees', args=[self.event.id, export_format])
+        )
+
+    def test_csv_export(self):
+        """
+        Tests whether the organiser gets the attendees as a streamed CSV
+        attachment, with formula-like usernames made safe.
+        """
+        self.client.login(username='test', password='pass')
+        response = self.export('csv')
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Type'], 'text/csv')
+        self.assertIn('attendees-', response['Content-Disposition'])
+        self.assertEqual(
+            b''.join(response.streaming_content).decode(),
+            f"booking,ticketholder,tickets\r\n{self.booking.id},'=other,2\r\n",
+        )
+
+    def test_jsonl_export(self):
+        """
+        Tests whether the organiser gets one JSON object per booking.
+        """
+        self.client.login(username='test', password='pass')
+        response = self.export('jsonl')
+        self.assertEqual(
+            b''.join(response.streaming_content).decode(),
+            f'{{"booking": {self.booking.id}, "ticketholder": "=other", '
+            '"tickets": 2}\n',
+        )
+
+    def test_export_refused_to_other_users(self):
+        """
+        Tests whether users other than the organiser are sent back to the
+        event page, and unknown formats aren't found.
+        """
+        self.client.login(username='=other', password='pass')
+        response = self.export('csv')
+        self.assertRedirects(
+            response, reverse('event-detail', args=[self.event.id])
+        )
+        self.assertEqual(self.export('xlsx').status_code, 404)
+
+
 class TestReviewEventView(TestCase):
     """
     TestCase for the review_event View.
@@ -1545,3 +1700,104 @@ class TestDeleteBookingView(TestCase):
         self.assertRedirects(response, reverse('index'))
         messages = list(get_messages(response.wsgi_request))
         self.assertIn('You are not logged in.', [m.message for m in messages])
+
+
+def fail_on_deferred_load(instance, using=None, fields=None, **kwargs):
+    """
+    Stands in for Model.refresh_from_db, which Django calls to load a
+    deferred field, so that a card template touching one fails the test.
+    """
+    raise AssertionError(
+        f'{type(instance).__name__} loaded deferred field(s) {fields}'
+    )
+
+
+@patch.object(Event, 'refresh_from_db', fail_on_deferred_load)
+@patch.object(Booking, 'refresh_from_db', fail_on_deferred_load)
+class TestEventCardProjection(TestCase):
+    """
+    TestCase for the column projection used by list pages. Every test
+    renders a list page with deferred field loads turned into failures.
+    """
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='test', password='pass')
+        self.organiser = User.objects.create_user(
+            username='organiser',
+            password='pass'
+        )
+        self.client.login(username='test', password='pass')
+        event_details = {
+            'image': 'test.jpg',
+            'is_online': False,
+            'url_or_address': '123 Test Street',
+            'maximum_attendees': 10,
+            'short_description': 'Short description',
+            'long_description': 'Long description',
+        }
+        self.upcoming = Event.objects.create(
+            event_name='Upcoming Event',
+            event_date=timezone.now() + timezone.timedelta(days=3),
+            event_organiser=self.organiser,
+            **event_details
+        )
+        self.past = Event.objects.create(
+            event_name='Past Event',
+            event_date=timezone.now() - timezone.timedelta(days=3),
+            event_organiser=self.organiser,
+            **event_details
+        )
+        Event.objects.create(
+            event_name='Own Event',
+            event_date=timezone.now() + timezone.timedelta(days=3),
+            event_organiser=self.user,
+            **event_details
+        )
+        Booking.objects.create(
+            event=self.upcoming, ticketholder=self.user, tickets=2
+        )
+        Booking.objects.create(
+            event=self.past, ticketholder=self.user, tickets=1
+        )
+
+    def test_index_cards_use_projected_fields(self):
+        """
+        Tests whether the latest events carousel renders from the projected
+        columns only.
+        """
+        response = self.client.get(reverse('index'))
+        self.assertContains(response, 'Upcoming Event')
+        self.assertIn(
+            'long_description',
+            response.context['event_list'][0].get_deferred_fields()
+        )
+
+    def test_all_events_cards_use_projected_fields(self):
+        """
+        Tests whether the all events page renders from the projected columns
+        only.
+        """
+        response = self.client.get(reverse('all-events'))
+        self.assertContains(response, 'Upcoming Event')
+        self.assertContains(response, '2/10 places booked')
+
+    def test_search_cards_use_projected_fields(self):
+        """
+        Tests whether search results, including past events, render from the
+        projected columns only.
+        """
+        response = self.client.get(
+            reverse('search-events'), {'q': 'Event', 'past-events': 'on'}
+        )
+        self.assertContains(response, 'Past Event')
+        self.assertContains(response, 'Edit Event')
+
+    def test_my_events_cards_use_projected_fields(self):
+        """
+        Tests whether all three sections of the dashboard render from the
+        projected columns only.
+        """
+        response = self.client.get(reverse('my-events'))
+        self.assertContains(response, 'Upcoming Event')
+        self.assertContains(response, 'Past Event')
+        self.assertContains(response, 'Own Event')
@@ -0,0 +1,241 @@
+import os
+import shutil
+import struct
+import tempfile
+import uuid
+
+from django.conf import settings
+from jobs.queue import enqueue, task
+from .images import event_images_settings, get_image_backend
+
+DEFAULT_EVENT_UPLOADS = {
+    'MAX_BYTES': 10 * 1024 * 1024,
+    'FORMATS': ('jpeg', 'png', 'gif', 'webp'),
+    'MIN_DIMENSION': 200,
+    # Refuse decompression bombs before anything tries to decode them
+    'MAX_PIXELS': 50 * 1000 * 1000,
+    # Scratch space for resizing and transferring images. Each process uses
+    # its own, the staged bytes travel to the job workers in the database
+    'STAGING_DIR': os.path.join(tempfile.gettempdir(), 'ourglass-uploads'),
+}
+
+EXTENSIONS = {'jpeg': '.jpg', 'png': '.png', 'gif': '.gif', 'webp': '.webp'}
+
+PNG_SIGNATURE = b'\x89PNG\r\n\x1a\n'
+
+# JPEG start of frame markers, which hold the image dimensions
+JPEG_SOF_MARKERS = {
+    0xC0, 0xC1, 0xC2, 0xC3, 0xC5, 0xC6, 0xC7,
+    0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF,
+}
+
+
+class InvalidImage(ValueError):
+    pass
+
+
+def event_uploads_settings():
+    """
+    Returns the EVENT_UPLOADS setting merged over the defaults.
+    """
+    options = dict(DEFAULT_EVENT_UPLOADS)
+    options.update(getattr(settings, 'EVENT_UPLOADS', {}))
+    return options
+
+
+def _jpeg_size(file):
+    file.seek(2)
+    while True:
+        byte = file.read(1)
+        if byte != b'\xff':
+            break
+        while byte == b'\xff':
+            byte = file.read(1)
+        if not byte:
+            break
+        marker = byte[0]
+        if 0xD0 <= marker <= 0xD9 or marker == 0x01:
+            continue
+        header = file.read(2)
+        if len(header) < 2:
+            break
+        length = struct.unpack('>H', header)[0]
+        if marker in JPEG_SOF_MARKERS:
+            frame = file.read(5)
+            if len(frame) < 5:
+                break
+            height, width = struct.unpack('>HH', frame[1:])
+            return width, height
+        file.seek(length - 2, os.SEEK_CUR)
+    raise InvalidImage('JPEG has no frame header')
+
+
+def _webp_size(header):
+    chunk = header[12:16]
+    if chunk == b'VP8 ' and header[23:26] == b'\x9d\x01\x2a':
+        width, height = struct.unpack('<HH', header[26:30])
+        return width & 0x3FFF, height & 0x3FFF
+    if chunk == b'VP8L' and header[20:21] == b'\x2f':
+        bits = struct.unpack('<I', header[21:25])[0]
+        return (bits & 0x3FFF) + 1, ((bits >> 14) & 0x3FFF) + 1
+    if chunk == b'VP8X':
+        width = int.from_bytes(header[24:27], 'little') + 1
+        height = int.from_bytes(header[27:30], 'little') + 1
+        return width, height
+    raise InvalidImage('WebP has no frame header')
+
+
+def read_image_header(file):
+    """
+    Returns the format, width and height of an image by reading its header,
+    without decoding the pixels. Raises InvalidImage when the file isn't a
+    supported image.
+    """
+    file.seek(0)
+    header = file.read(32)
+    try:
+        if header.startswith(b'\xff\xd8'):
+            return ('jpeg', *_jpeg_size(file))
+        if header[:8] == PNG_SIGNATURE and header[12:16] == b'IHDR':
+            return ('png', *struct.unpack('>II', header[16:24]))
+        if header[:6] in (b'GIF87a', b'GIF89a'):
+            return ('gif', *struct.unpack('<HH', header[6:10]))
+        if header[:4] == b'RIFF' and header[8:12] == b'WEBP':
+            return ('webp', *_webp_size(header))
+    except struct.error:
+        raise InvalidImage('Image header is truncated')
+    finally:
+        file.seek(0)
+    raise InvalidImage('Unsupported image format')
+
+
+def validate_image(file):
+    """
+    Checks the size, format and dimensions of an uploaded image. Returns the
+    image format, or raises InvalidImage with a message for the user.
+    """
+    options = event_uploads_settings()
+    if file.size > options['MAX_BYTES']:
+        max_megabytes = options['MAX_BYTES'] // (1024 * 1024)
+        raise InvalidImage(
+            f'Images must be smaller than {max_megabytes}MB.'
+        )
+    try:
+        format, width, height = read_image_header(file)
+    except InvalidImage:
+        raise InvalidImage(
+            'Please upload a JPEG, PNG, GIF or WebP image.'
+        )
+    if format not in options['FORMATS']:
+        raise InvalidImage('This image format is not supported.')
+    if min(width, height) < options['MIN_DIMENSION']:
+        raise InvalidImage(
+            f'Images must be at least {options["MIN_DIMENSION"]} pixels '
+            'wide and tall.'
+        )
+    if width * height > options['MAX_PIXELS']:
+        raise InvalidImage('This image has too many pixels.')
+    return format
+
+
+def _downscale(path):
+    # Pillow is optional, without it the media backend limits the size of
+    # the stored image instead
+    try:
+        from PIL import Image
+    except ImportError:
+        return
+    max_dimension = event_images_settings()['MAX_DIMENSION']
+    with Image.open(path) as image:
+        if max(image.size) <= max_dimension:
+            return
+        image_format = image.format
+        image.thumbnail((max_dimension, max_dimension))
+        image.save(path, format=image_format)
+
+
+def _scratch_path(extension):
+    staging_dir = event_uploads_settings()['STAGING_DIR']
+    os.makedirs(staging_dir, exist_ok=True)
+    return os.path.join(staging_dir, uuid.uuid4().hex + extension)
+
+
+def stage_upload(file, format):
+    """
+    Scales an uploaded image down to the stored size and keeps it in a
+    StagedUpload until a job worker transfers it, returning the value for
+    the event's image_pending column. Uploads that Django has already
+    streamed to disk are moved rather than copied.
+    """
+    from .models import StagedUpload
+    path = _scratch_path(EXTENSIONS[format])
+    if hasattr(file, 'temporary_file_path'):
+        shutil.move(file.temporary_file_path(), path)
+    else:
+        with open(path, 'wb') as destination:
+            for chunk in file.chunks():
+                destination.write(chunk)
+    try:
+        _downscale(path)
+        with open(path, 'rb') as staged_file:
+            staged = StagedUpload.objects.create(
+                data=staged_file.read(), extension=EXTENSIONS[format]
+            )
+    finally:
+        os.remove(path)
+    return str(staged.pk)
+
+
+def discard_staged_upload(image_pending):
+    """
+    Deletes a staged upload that has been replaced before its transfer.
+    """
+    from .models import StagedUpload
+    if image_pending.isdigit():
+        StagedUpload.objects.filter(pk=image_pending).delete()
+
+
+@task(max_attempts=8)
+def transfer_image(event_id):
+    """
+    Uploads the staged image of an event to the media backend, then points
+    the event at it and removes the staged upload. The bytes are written to
+    this worker's own scratch space first, as the backends upload from a
+    file. A failed transfer raises, leaving the placeholder in place and
+    the staged upload in the database until the job is retried.
+    """
+    from .models import Event, StagedUpload
+    event = Event.objects.filter(pk=event_id).first()
+    if event is None or not event.image_pending:
+        return
+    staged = None
+    if event.image_pending.isdigit():
+        staged = StagedUpload.objects.filter(pk=event.image_pending).first()
+    if staged is None:
+        # Replaced or lost, a later transfer handles any newer upload
+        return
+    path = _scratch_path(staged.extension)
+    try:
+        with open(path, 'wb') as scratch_file:
+            scratch_file.write(staged.data)
+        event.image = get_image_backend().upload(path)
+    finally:
+        os.remove(path)
+    event.image_pending = ''
+    event.save(update_fields=['image', 'image_pending', 'updated_on'])
+    staged.delete()
+
+
+def schedule_image_transfer(event):
+    """
+    Queues the transfer of the event's staged image, so the request doesn't
+    wait on the upload. A transfer already queued for the event picks up
+    the latest staged image, so a second one isn't added.
+    """
+    if not event.image_pending:
+        return
+    enqueue(
+        transfer_image,
+        args=[event.pk],
+        idempotency_key=f'transfer-image:{event.pk}',
+    )
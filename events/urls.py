@@ -1,7 +1,24 @@
-from . import views
+from . import api, views
 from django.urls import path
 
 urlpatterns = [
+    path('api/events/', api.event_list_api, name='api-events'),
+    path(
+        'api/events/changes/',
+        api.event_changes_api,
+        name='api-event-changes'
+    ),
+    path(
+        'api/events/<int:event_id>/',
+        api.event_detail_api,
+        name='api-event'
+    ),
+    path(
+        'api/events/<int:event_id>/reviews/',
+        api.event_reviews_api,
+        name='api-event-reviews'
+    ),
+    path('api/bookings/', api.booking_list_api, name='api-bookings'),
     path(
         'events/<int:event_id>/',
         views.event_detail_view,
@@ -32,6 +49,26 @@ urlpatterns = [
         views.edit_review_view,
         name='edit-review'
     ),
+    path(
+        'events/attendees/<int:event_id>/',
+        views.event_attendees_view,
+        name='event-attendees'
+    ),
+    path(
+        'events/export-attendees/<int:event_id>/<str:export_format>/',
+        views.export_attendees_view,
+        name='export-attendees'
+    ),
+    path(
+        'calendar/<str:token>.ics',
+        views.calendar_feed_view,
+        name='calendar-feed'
+    ),
+    path(
+        'calendar/reset/',
+        views.reset_calendar_view,
+        name='reset-calendar'
+    ),
     path('events/create-event/', views.create_event_view, name='create-event'),
     path(
         'events/delete-booking/<int:booking_id>/',
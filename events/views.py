@@ -1,24 +1,97 @@
+import hashlib
 from django.contrib import messages
 from django.contrib.auth import logout, mixins
-from django.core.paginator import Paginator
+from django.contrib.auth.models import User
+from django.core.paginator import Page, Paginator
+from django.core.signing import BadSignature
 from django.db.models import (
-    OuterRef, Exists, Q, Case, When, BooleanField, Value
+    OuterRef, Exists, Q, Case, When, BooleanField, Value, Sum, Count
 )
+from django.db.models.functions import Coalesce
+from django.http import Http404, HttpResponse, StreamingHttpResponse
 from django.shortcuts import redirect, render, get_object_or_404
+from django.urls import reverse
+from django.utils.cache import (
+    get_conditional_response, patch_cache_control, patch_vary_headers
+)
+from django.utils.decorators import method_decorator
+from django.utils.http import quote_etag
 from django.utils.timezone import now
 from django.views import generic
-from .models import Event, Booking, Review
+from django.views.decorators.http import require_POST
+from .cache import (
+    PrecountedPaginator, event_detail_key, get_event_or_404,
+    get_object_or_404_cached, get_or_rebuild, list_generation
+)
+from .cdn import surrogate_keys
+from .models import (
+    ArchivedBooking, ArchivedEvent, ArchivedReview, Event, Booking, Review
+)
+from .resilience import fail_fast_when_degraded, serve_stale_when_degraded
+from .deletion import delete_event
+from .exports import EXPORT_FORMATS
+from .ical import (
+    cached_feed, caching_stream, calendar_chunks, calendar_token,
+    calendar_user_id, calendar_version, reset_calendar_token
+)
+from .uploads import schedule_image_transfer
 from .forms import EventForm, ReviewForm, BookingForm
 # Create your views here.
 
 
+@method_decorator(surrogate_keys('event-list'), name='dispatch')
+@method_decorator(serve_stale_when_degraded, name='dispatch')
 class LatestEventList(generic.ListView):
     """
     Returns a list of all event objects, ordered by the latest created.
+    The list is cached and rebuilt by a single request when it expires.
     """
-    queryset = Event.objects.all().order_by('-created_on')[:5]
+    context_object_name = 'event_list'
     template_name = 'events/index.html'
 
+    def get_queryset(self):
+        return get_or_rebuild(
+            f'events:latest:{list_generation()}',
+            lambda: list(
+                Event.objects.for_cards().annotate(
+                    tickets_booked=Coalesce(Sum('bookings__tickets'), 0)
+                ).order_by('-created_on')[:5]
+            ),
+        )
+
+
+def upcoming_bookings(user):
+    """
+    Returns the user's bookings for events that haven't happened yet, with
+    the columns of their event cards, soonest first.
+    """
+    event_card_fields = [f'event__{field}' for field in Event.CARD_FIELDS]
+    return Booking.objects.filter(
+        ticketholder=user
+    ).exclude(
+        event_date__lt=now()
+    ).select_related(
+        'event'
+    ).only(
+        'tickets', 'event_date', *event_card_fields
+    ).order_by(
+        'event_date'
+    )
+
+
+def upcoming_organised_events(user):
+    """
+    Returns the events the user organises that haven't happened yet,
+    soonest first.
+    """
+    return Event.objects.for_cards().filter(
+        event_organiser=user
+    ).exclude(
+        event_date__lt=now()
+    ).order_by(
+        'event_date'
+    )
+
 
 class MyEventsDashboardView(mixins.LoginRequiredMixin, generic.TemplateView):
     """
@@ -40,6 +113,10 @@ class MyEventsDashboardView(mixins.LoginRequiredMixin, generic.TemplateView):
         The paginated list of previous bookings provided by the
         previous_bookings_qs queryset, ordered by event date.
 
+    ``archived_bookings``
+        The paginated list of bookings for events that have been moved to
+        the archive, most recent first.
+
     **Template**
     :template:`events/my-events.html`
 
@@ -54,27 +131,36 @@ class MyEventsDashboardView(mixins.LoginRequiredMixin, generic.TemplateView):
             author=user,
             event=OuterRef('event')
         )
-        bookings_qs = Booking.objects.filter(
-            ticketholder=user
-        ).exclude(
-            event__event_date__lt=now()
-        ).order_by(
-            'event__event_date'
-        )
-        organised_events_qs = Event.objects.filter(
-            event_organiser=user
-        ).exclude(
-            event_date__lt=now()
-        ).order_by(
-            'event_date'
-        )
+        event_card_fields = [
+            f'event__{field}' for field in Event.CARD_FIELDS
+        ]
+        bookings_qs = upcoming_bookings(user)
+        organised_events_qs = upcoming_organised_events(user)
         previous_bookings_qs = Booking.objects.filter(
             ticketholder=user,
-            event__event_date__lt=now(),
+            event_date__lt=now(),
+        ).select_related(
+            'event'
+        ).only(
+            'tickets', *event_card_fields
         ).annotate(
             has_review=Exists(reviews)
         ).order_by(
-            'event__event_date'
+            'event_date'
+        )
+
+        archived_reviews = ArchivedReview.objects.filter(
+            author=user,
+            event=OuterRef('event')
+        )
+        archived_bookings_qs = ArchivedBooking.objects.filter(
+            ticketholder=user
+        ).select_related(
+            'event'
+        ).annotate(
+            has_review=Exists(archived_reviews)
+        ).order_by(
+            '-event__event_date'
         )
 
         # Pagination
@@ -87,10 +173,15 @@ class MyEventsDashboardView(mixins.LoginRequiredMixin, generic.TemplateView):
             'previous_bookings_page',
             1
         )
+        archived_bookings_page_number = self.request.GET.get(
+            'archived_bookings_page',
+            1
+        )
 
         bookings_paginator = Paginator(bookings_qs, 6)
         organised_events_paginator = Paginator(organised_events_qs, 6)
         previous_bookings_paginator = Paginator(previous_bookings_qs, 6)
+        archived_bookings_paginator = Paginator(archived_bookings_qs, 6)
 
         context['bookings'] = bookings_paginator.get_page(bookings_page_number)
         context['organised_events'] = organised_events_paginator.get_page(
@@ -99,14 +190,39 @@ class MyEventsDashboardView(mixins.LoginRequiredMixin, generic.TemplateView):
         context['previous_bookings'] = previous_bookings_paginator.get_page(
             previous_bookings_page_number
         )
+        context['archived_bookings'] = archived_bookings_paginator.get_page(
+            archived_bookings_page_number
+        )
+        context['calendar_url'] = self.request.build_absolute_uri(
+            reverse('calendar-feed', args=[calendar_token(user)])
+        )
 
         return context
 
 
+def _event_detail_snapshot(event_id):
+    """
+    Returns the event with everything the detail page shares between users
+    already loaded, ready to be cached.
+    """
+    event = get_event_or_404(event_id)
+    event.event_organiser
+    # Filtering on the date lets PostgreSQL read a single partition
+    event.tickets_booked = event.bookings.filter(
+        event_date=event.event_date
+    ).aggregate(
+        total=Coalesce(Sum('tickets'), 0)
+    )['total']
+    return event
+
+
+@surrogate_keys('event-{event_id}')
+@serve_stale_when_degraded
 def event_detail_view(request, event_id):
     """
     Returns a render for an individual event, as well as providing information
-    about the event's bookings and reviews.
+    about the event's bookings and reviews. The parts of the page shared by
+    every user are cached.
 
     **Context**
     ``event``
@@ -130,13 +246,26 @@ def event_detail_view(request, event_id):
         Checks if the event is in the past. Returns True if it is, False
         if it isn't.
 
+    ``archived``
+        True if the event has been moved to the archive, which can't be
+        booked or reviewed any more.
+
     **Template**
     :template:`events/event-detail.html`
 
 
     """
-    queryset = Event.objects.all()
-    event = get_object_or_404(queryset, id=event_id)
+    try:
+        event = get_or_rebuild(
+            event_detail_key(event_id),
+            lambda: _event_detail_snapshot(event_id),
+        )
+    except Http404:
+        # Past events move to the archive, which has the same relations
+        event = get_object_or_404(
+            ArchivedEvent.objects.select_related('event_organiser'),
+            id=event_id,
+        )
     reviews = event.reviews.all()
     paginator = Paginator(reviews, 9)
     page_number = request.GET.get('page')
@@ -161,6 +290,7 @@ def event_detail_view(request, event_id):
         'user_has_reviewed': user_has_reviewed,
         'reviews': page_obj,
         'past_event': has_event_passed,
+        'archived': isinstance(event, ArchivedEvent),
     }
     return render(
         request,
@@ -178,6 +308,7 @@ def logout_view(request):
     return redirect('index')
 
 
+@fail_fast_when_degraded
 def create_event_view(request):
     """
     View for creating events. Passes the EventForm to the template and saves
@@ -210,6 +341,7 @@ def create_event_view(request):
                 event = event_form.save(commit=False)
                 event.event_organiser = request.user
                 event.save()
+                schedule_image_transfer(event)
                 messages.success(
                     request,
                     success_message
@@ -232,6 +364,7 @@ def create_event_view(request):
     return render(request, 'events/create-event.html', {'form': event_form})
 
 
+@fail_fast_when_degraded
 def edit_event_view(request, event_id):
     """
     View for editing events. Passes the EventForm prepopulated with the Event
@@ -253,13 +386,16 @@ def edit_event_view(request, event_id):
         'You cannot edit an event as you are not currently logged in. '
         'Please make an account using the sign up process, or log in.'
     )
-    event = get_object_or_404(Event, id=event_id)
+    event = get_object_or_404_cached(Event, event_id)
 
     if request.user.is_authenticated:
         if request.method == 'POST':
-            event_form = EventForm(data=request.POST, instance=event)
+            event_form = EventForm(
+                data=request.POST, files=request.FILES, instance=event
+            )
             if event_form.is_valid() and event.event_organiser == request.user:
                 event = event_form.save()
+                schedule_image_transfer(event)
                 messages.success(request, success_message)
                 return redirect('event-detail', event_id=event.id)
             else:
@@ -280,12 +416,13 @@ def edit_event_view(request, event_id):
     return render(request, 'events/edit-event.html', context)
 
 
+@fail_fast_when_degraded
 def delete_event_view(request, event_id):
     """
     View for deleting events, accessed directly from the Edit Event template.
     Validation exists to ensure that the request.user is the event organiser.
     """
-    event = get_object_or_404(Event, id=event_id)
+    event = get_object_or_404_cached(Event, event_id)
     not_authorised_error = (
         'You do not have permission to delete this event.'
     )
@@ -299,7 +436,7 @@ def delete_event_view(request, event_id):
             messages.error(request, not_authorised_error)
             return redirect('event-detail', event_id=event_id)
         else:
-            event.delete()
+            delete_event(event)
             messages.success(request, success_message)
             return redirect('my-events')
     else:
@@ -310,6 +447,172 @@ def delete_event_view(request, event_id):
         return redirect('index')
 
 
+def calendar_feed_view(request, token):
+    """
+    Serves the iCalendar feed of a user's upcoming bookings and organised
+    events to calendar apps, which authenticate with the signed token in
+    the URL rather than a session. Tokens that have been reset and those
+    of deactivated users are refused before anything cached is served.
+
+    The feed is streamed as it is read and cached until one of the user's
+    bookings or events changes. Its version is the ETag, so a poll from a
+    client that is up to date is answered from the cache alone.
+    """
+    try:
+        user_id = calendar_user_id(token)
+    except BadSignature:
+        raise Http404('No calendar matches the given token.')
+    version = calendar_version(user_id)
+    etag = quote_etag(f'{user_id}-{version}')
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        content_type = 'text/calendar; charset=utf-8'
+        feed = cached_feed(user_id, version)
+        if feed is not None:
+            response = HttpResponse(feed, content_type=content_type)
+        else:
+            user = get_object_or_404(User, pk=user_id, is_active=True)
+            chunks = calendar_chunks(
+                upcoming_bookings(user),
+                upcoming_organised_events(user),
+                lambda event: request.build_absolute_uri(
+                    reverse('event-detail', args=[event.pk])
+                ),
+            )
+            response = StreamingHttpResponse(
+                caching_stream(chunks, user_id, version),
+                content_type=content_type,
+            )
+    response.headers['ETag'] = etag
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
+
+
+@require_POST
+def reset_calendar_view(request):
+    """
+    Replaces the user's calendar feed link, so anyone holding the old one
+    can no longer see their bookings.
+    """
+    not_logged_in_error = (
+        'You cannot reset your calendar link as you are not currently '
+        'logged in. Please make an account using the sign up process, or '
+        'log in.'
+    )
+    if not request.user.is_authenticated:
+        messages.error(request, not_logged_in_error)
+        return redirect('index')
+    reset_calendar_token(request.user)
+    messages.success(
+        request,
+        'Your calendar link has been reset. Subscribe to the new link in '
+        'your calendar app, the old one no longer works.'
+    )
+    return redirect('my-events')
+
+
+def event_attendees_view(request, event_id):
+    """
+    Returns a page of an event's attendees for its organiser. The event
+    page loads it on demand into its attendees section, other requests get
+    it as a page of its own.
+
+    **Context**
+    ``event``
+        The event object, determined by the id.
+
+    ``attendees``
+        The paginated bookings with their ticketholders joined in.
+
+    ``total_bookings`` and ``total_tickets``
+        Totals for the whole event, from a single aggregate that also
+        counts the bookings for the paginator.
+
+    **Template**
+    :template:`events/attendee-list.html` or
+    :template:`events/event-attendees.html`
+    """
+    event = get_object_or_404_cached(Event, event_id)
+    not_authorised_error = (
+        'Only the organiser of this event can see its attendees.'
+    )
+    not_logged_in_error = (
+        'You cannot view attendees as you are not currently logged in. '
+        'Please make an account using the sign up process, or log in.'
+    )
+    if not request.user.is_authenticated:
+        messages.error(request, not_logged_in_error)
+        return redirect('index')
+    if request.user.pk != event.event_organiser_id:
+        messages.error(request, not_authorised_error)
+        return redirect('event-detail', event_id=event_id)
+    # Filtering on the date lets PostgreSQL read a single partition
+    bookings = Booking.objects.filter(
+        event=event, event_date=event.event_date
+    )
+    totals = bookings.aggregate(
+        bookings=Count('id'), tickets=Coalesce(Sum('tickets'), 0)
+    )
+    paginator = PrecountedPaginator(totals['bookings'], 50)
+    number = paginator.get_page(request.GET.get('page')).number
+    offset = (number - 1) * paginator.per_page
+    attendees = Page(
+        list(
+            bookings.select_related(
+                'ticketholder'
+            ).only(
+                'tickets', 'ticketholder__username'
+            ).order_by('pk')[offset:offset + paginator.per_page]
+        ),
+        number,
+        paginator,
+    )
+    context = {
+        'event': event,
+        'attendees': attendees,
+        'total_bookings': totals['bookings'],
+        'total_tickets': totals['tickets'],
+    }
+    if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
+        response = render(request, 'events/attendee-list.html', context)
+    else:
+        response = render(request, 'events/event-attendees.html', context)
+    # The fragment and the full page share a URL
+    patch_vary_headers(response, ['X-Requested-With'])
+    return response
+
+
+def export_attendees_view(request, event_id, export_format):
+    """
+    Streams the bookings of an event to its organiser as CSV or JSON Lines.
+    Rows are written as they are read from the database, so the export
+    never holds the whole attendee list in memory.
+    """
+    if export_format not in EXPORT_FORMATS:
+        raise Http404('Unknown export format.')
+    event = get_object_or_404_cached(Event, event_id)
+    not_authorised_error = (
+        'Only the organiser of this event can export its attendees.'
+    )
+    not_logged_in_error = (
+        'You cannot export attendees as you are not currently logged in. '
+        'Please make an account using the sign up process, or log in.'
+    )
+    if not request.user.is_authenticated:
+        messages.error(request, not_logged_in_error)
+        return redirect('index')
+    if request.user != event.event_organiser:
+        messages.error(request, not_authorised_error)
+        return redirect('event-detail', event_id=event_id)
+    content_type, rows = EXPORT_FORMATS[export_format]
+    response = StreamingHttpResponse(rows(event), content_type=content_type)
+    response.headers['Content-Disposition'] = (
+        f'attachment; filename="attendees-{event.id}.{export_format}"'
+    )
+    return response
+
+
+@fail_fast_when_degraded
 def review_event_view(request, event_id):
     """
     View for creating a review for an event. Passes the ReviewForm to the
@@ -340,11 +643,12 @@ def review_event_view(request, event_id):
         'Please make an account using the sign up process, or log in.'
     )
     error_message = ("Sorry, your review wasn't able to be submitted")
-    event = get_object_or_404(Event, id=event_id)
+    event = get_event_or_404(event_id)
     user_has_booking = False
     if request.user.is_authenticated:
         user_has_booking = event.bookings.filter(
-            ticketholder=request.user
+            ticketholder=request.user,
+            event_date=event.event_date,
         ).exists()
         user_has_reviewed_event = event.reviews.filter(
             author=request.user
@@ -381,10 +685,32 @@ def review_event_view(request, event_id):
     return render(request, 'events/review-event.html', context)
 
 
+def _archived_review_redirect(request, review_id):
+    """
+    Sends the author of a review that has been moved to the archive back to
+    its event page, as archived reviews are read-only. Raises Http404 for
+    ids that aren't in the archive either.
+    """
+    event_id = ArchivedReview.objects.filter(
+        pk=review_id
+    ).values_list('event_id', flat=True).first()
+    if event_id is None:
+        raise Http404('No Review matches the given query.')
+    messages.error(
+        request,
+        'This event has been archived, so its reviews can no longer be '
+        'changed.'
+    )
+    return redirect('event-detail', event_id=event_id)
+
+
+@fail_fast_when_degraded
 def edit_review_view(request, review_id):
     """
     View for editing a review. Passes the ReviewForm prepopulated with the
     review instance details, then saves changes to the review in the database.
+    Reviews of archived events are read-only, their authors are sent back to
+    the event page.
 
     **Context**
     ``form``
@@ -399,8 +725,11 @@ def edit_review_view(request, review_id):
     **Template**
     :template:`events/edit-review.html`
     """
-    review = get_object_or_404(Review, id=review_id)
-    event = get_object_or_404(Event, id=review.event.id)
+    try:
+        review = get_object_or_404_cached(Review, review_id)
+    except Http404:
+        return _archived_review_redirect(request, review_id)
+    event = get_event_or_404(review.event_id)
     success_message = ('Your updated review is now awaiting approval.')
     error_message = ('Review was unable to be updated.')
     not_logged_in_error = (
@@ -438,12 +767,17 @@ def edit_review_view(request, review_id):
     return render(request, 'events/edit-review.html', context)
 
 
+@fail_fast_when_degraded
 def delete_review_view(request, review_id):
     """
     View for deleting reviews. Accessed through the edit-review template.
     Validation exists to ensure that only the reviewer can delete their review.
+    Reviews of archived events can't be deleted.
     """
-    review = get_object_or_404(Review, id=review_id)
+    try:
+        review = get_object_or_404_cached(Review, review_id)
+    except Http404:
+        return _archived_review_redirect(request, review_id)
     not_logged_in_error = (
         'You can not delete a review if you are not logged in.'
     )
@@ -490,10 +824,12 @@ def all_events_view(request):
         'Please sign up for an account or log in using the log in page.'
     )
     if request.user.is_authenticated:
-        events = Event.objects.exclude(
+        events = Event.objects.for_cards().exclude(
             event_organiser=request.user
         ).filter(
             event_date__gte=now()
+        ).annotate(
+            tickets_booked=Coalesce(Sum('bookings__tickets'), 0)
         ).order_by(
             'event_date'
         )
@@ -515,11 +851,14 @@ def all_events_view(request):
     return render(request, 'events/all-events.html', context)
 
 
+@surrogate_keys('event-list')
+@serve_stale_when_degraded
 def search_events_view(request):
     """
     View for event search results. Obtains the query information from the
     input on the search bar, as well as whether the user wants to see past
-    events. These are then paginated to 6 events per page.
+    events. These are then paginated to 6 events per page, and each page of
+    results is cached for all users.
 
     **Context**
     ``query``
@@ -537,24 +876,45 @@ def search_events_view(request):
     query = request.GET.get('q', '')
     include_past = request.GET.get('past-events') == 'on'
 
-    events = Event.objects.filter(
-        Q(event_name__icontains=query)
-    ).order_by('event_date')
-
-    if not include_past:
-        events = events.filter(event_date__gte=now())
+    page_number = request.GET.get('page')
 
-    events = events.annotate(
-        is_past=Case(
-            When(event_date__lt=now(), then=Value(True)),
-            default=Value(False),
-            output_field=BooleanField(),
+    def search_page():
+        events = Event.objects.for_cards().filter(
+            Q(event_name__icontains=query)
+        ).order_by('event_date')
+
+        if not include_past:
+            events = events.filter(event_date__gte=now())
+
+        events = events.annotate(
+            is_past=Case(
+                When(event_date__lt=now(), then=Value(True)),
+                default=Value(False),
+                output_field=BooleanField(),
+            ),
+            tickets_booked=Coalesce(Sum('bookings__tickets'), 0),
         )
-    )
 
-    paginator = Paginator(events, 6)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+        paginator = Paginator(events, 6)
+        page_obj = paginator.get_page(page_number)
+        return {
+            'count': paginator.count,
+            'number': page_obj.number,
+            'object_list': list(page_obj.object_list),
+        }
+
+    digest = hashlib.md5(
+        f'{query.lower()}|{include_past}|{page_number}'.encode()
+    ).hexdigest()
+    cached_page = get_or_rebuild(
+        f'events:search:{list_generation()}:{digest}',
+        search_page,
+    )
+    page_obj = Page(
+        cached_page['object_list'],
+        cached_page['number'],
+        PrecountedPaginator(cached_page['count'], 6),
+    )
 
     context = {
         'query': query,
@@ -564,6 +924,7 @@ def search_events_view(request):
     return render(request, 'events/search-events.html', context)
 
 
+@fail_fast_when_degraded
 def booking_tickets_view(request, event_id):
     """
     View for booking tickets for an event. Passes the BookingForm to the
@@ -583,7 +944,7 @@ def booking_tickets_view(request, event_id):
         'You cannot book tickets as you are not currently logged in. '
         'Please make an account using the sign up process, or log in.'
     )
-    event = get_object_or_404(Event, id=event_id)
+    event = get_event_or_404(event_id)
 
     if request.user.is_authenticated:
         if event.event_organiser == request.user:
@@ -621,6 +982,7 @@ def booking_tickets_view(request, event_id):
     return render(request, 'events/book-event.html', context)
 
 
+@fail_fast_when_degraded
 def edit_booking_view(request, event_id):
     """
     View for editing a booking. Passes the BookingForm preopulated with the
@@ -646,7 +1008,7 @@ def edit_booking_view(request, event_id):
         'Please make an account using the sign up process, or log in.'
     )
     if request.user.is_authenticated:
-        event = get_object_or_404(Event, id=event_id)
+        event = get_event_or_404(event_id)
         booking = get_object_or_404(
             Booking,
             event=event,
@@ -684,6 +1046,7 @@ def edit_booking_view(request, event_id):
     return render(request, 'events/edit-booking.html', context)
 
 
+@fail_fast_when_degraded
 def delete_booking_view(request, booking_id):
     """
     View for deleting bookings. Accessed through the edit-booking template.
@@ -691,7 +1054,7 @@ def delete_booking_view(request, booking_id):
     bookings.
     """
     if request.user.is_authenticated:
-        booking = get_object_or_404(Booking, id=booking_id)
+        booking = get_object_or_404_cached(Booking, booking_id)
 
         if booking.ticketholder != request.user:
             messages.error(
@@ -0,0 +1,18 @@
+"""
+Gunicorn configuration, picked up automatically from the working directory.
+
+The application is loaded once in the master process and warmed up there,
+so the imports and compiled templates are shared with every worker through
+copy-on-write rather than repeated in each one.
+"""
+
+preload_app = True
+
+
+def post_fork(server, worker):
+    # Connections opened while warming up in the master must not be shared
+    # between workers
+    from django.db import connections
+    from django.core.cache import caches
+    connections.close_all()
+    caches.close_all()
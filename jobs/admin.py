@@ -0,0 +1,10 @@
+from django.contrib import admin
+from .models import Job
+
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = ('id', 'task', 'status', 'priority', 'attempts',
+                    'run_after', 'duration_ms', 'finished_on',)
+    search_fields = ['task', 'idempotency_key']
+    list_filter = ('status', 'task',)
@@ -0,0 +1,236 @@
+import base64
+import random
+import threading
+import time
+from datetime import timedelta
+from email.mime.base import MIMEBase
+
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.core.mail.backends.base import BaseEmailBackend
+from django.utils import timezone
+from .models import Job
+from .queue import Retry, current_job, enqueue, task
+
+DEFAULT_EMAIL_QUEUE = {
+    # Backend the workers deliver through
+    'BACKEND': 'django.core.mail.backends.smtp.EmailBackend',
+    # Messages sent per minute across all workers, None for no limit
+    'RATE_LIMIT': None,
+    # Seconds a worker keeps an unused connection before opening a new one,
+    # shorter than the mail server's own idle timeout
+    'IDLE_TIMEOUT': 60,
+    # Messages sent together are queued as one job of up to this many, so
+    # a worker claims them at once and sends them over one connection
+    'BATCH_SIZE': 50,
+}
+
+_local = threading.local()
+
+
+def email_queue_settings():
+    """
+    Returns the EMAIL_QUEUE setting merged over the defaults.
+    """
+    options = dict(DEFAULT_EMAIL_QUEUE)
+    options.update(getattr(settings, 'EMAIL_QUEUE', {}))
+    return options
+
+
+def serialize_message(message):
+    """
+    Returns the parts of an email as JSON serializable data, or None for
+    messages with attachments that are already MIME objects.
+    """
+    attachments = []
+    for attachment in message.attachments:
+        if isinstance(attachment, MIMEBase):
+            return None
+        filename, content, mimetype = attachment
+        if isinstance(content, bytes):
+            content = base64.b64encode(content).decode('ascii')
+            attachments.append([filename, content, mimetype, True])
+        else:
+            attachments.append([filename, content, mimetype, False])
+    return {
+        'subject': message.subject,
+        'body': message.body,
+        'from_email': message.from_email,
+        'to': list(message.to),
+        'cc': list(message.cc),
+        'bcc': list(message.bcc),
+        'reply_to': list(message.reply_to),
+        'headers': dict(message.extra_headers),
+        'content_subtype': message.content_subtype,
+        'alternatives': [
+            list(alternative)
+            for alternative in getattr(message, 'alternatives', [])
+        ],
+        'attachments': attachments,
+    }
+
+
+def deserialize_message(data):
+    message = EmailMultiAlternatives(
+        subject=data['subject'],
+        body=data['body'],
+        from_email=data['from_email'],
+        to=data['to'],
+        cc=data['cc'],
+        bcc=data['bcc'],
+        reply_to=data['reply_to'],
+        headers=data['headers'],
+        alternatives=[tuple(item) for item in data['alternatives']],
+    )
+    message.content_subtype = data['content_subtype']
+    for filename, content, mimetype, encoded in data['attachments']:
+        if encoded:
+            content = base64.b64decode(content)
+        message.attach(filename, content, mimetype)
+    return message
+
+
+def get_pooled_connection():
+    """
+    Returns this thread's open connection to the delivery backend, opening
+    a new one when there is none or it has been idle for too long.
+    """
+    options = email_queue_settings()
+    connection = getattr(_local, 'connection', None)
+    if connection is not None and (
+        time.monotonic() - _local.last_used > options['IDLE_TIMEOUT']
+    ):
+        close_connection()
+        connection = None
+    if connection is None:
+        connection = get_connection(options['BACKEND'], fail_silently=False)
+        connection.open()
+        _local.connection = connection
+    _local.last_used = time.monotonic()
+    return connection
+
+
+def close_connection():
+    """
+    Closes this thread's connection to the delivery backend, if it has one.
+    """
+    connection = getattr(_local, 'connection', None)
+    _local.connection = None
+    if connection is not None:
+        try:
+            connection.close()
+        except Exception:
+            # The server has usually dropped the connection already
+            pass
+
+
+def queued_messages(data):
+    """
+    Returns the list of serialized messages a send_email job carries. Jobs
+    queued before messages were batched carry a single one.
+    """
+    return [data] if isinstance(data, dict) else data
+
+
+def sent_count(job):
+    """
+    Returns the number of messages a send_email job has sent, or is sending
+    while it runs. Jobs finished before the count was recorded sent their
+    whole batch.
+    """
+    if job.status == Job.DONE and job.result is not None:
+        return job.result
+    return len(queued_messages(job.args[0]))
+
+
+def check_rate_limit(count):
+    """
+    Raises Retry when sending ``count`` more messages would go over
+    RATE_LIMIT in the last minute, with the delay until enough of the sent
+    ones drop out of the window. Batches other workers are sending count as
+    sent now. Workers can race past the limit by a batch or two.
+    """
+    limit = email_queue_settings()['RATE_LIMIT']
+    if not limit:
+        return
+    now = timezone.now()
+    window = now - timedelta(minutes=1)
+    running = Job.objects.filter(
+        task=send_email.job_name, status=Job.RUNNING
+    )
+    current = current_job()
+    if current is not None:
+        running = running.exclude(pk=current.pk)
+    done = Job.objects.filter(
+        task=send_email.job_name, status=Job.DONE, finished_on__gte=window
+    ).order_by('-finished_on')
+    recent = [(now, job) for job in running] + [
+        (job.finished_on, job) for job in done[:limit]
+    ]
+    sent = 0
+    for sent_on, job in recent:
+        sent += sent_count(job)
+        if sent + count > limit:
+            delay = (sent_on - window).total_seconds()
+            raise Retry(max(delay, 0) + random.uniform(0, 1))
+
+
+@task(priority=20, max_attempts=8)
+def send_email(data):
+    """
+    Sends a batch of queued messages back to back over the worker's pooled
+    connection, without a new SMTP handshake each. If one fails after
+    others have gone out, the rest are queued as a new batch rather than
+    retrying this one, so nobody gets a message twice. Returns the number
+    sent, which the rate limit counts.
+    """
+    batch = queued_messages(data)
+    check_rate_limit(len(batch))
+    connection = get_pooled_connection()
+    for number, item in enumerate(batch):
+        try:
+            connection.send_messages([deserialize_message(item)])
+        except Exception:
+            # Start the retry on a fresh connection
+            close_connection()
+            if not number:
+                raise
+            enqueue(send_email, args=[batch[number:]])
+            return number
+    return len(batch)
+
+
+class QueuedEmailBackend(BaseEmailBackend):
+    """
+    Email backend that queues messages as jobs instead of sending them, so
+    requests that send mail, like signing up, never wait on the mail server.
+    The messages of one call are queued together in batches of BATCH_SIZE,
+    and workers deliver them through EMAIL_QUEUE['BACKEND']. Messages that
+    can't be queued are sent straight away.
+    """
+
+    def send_messages(self, email_messages):
+        options = email_queue_settings()
+        batch_size = options['BATCH_SIZE']
+        if options['RATE_LIMIT']:
+            batch_size = min(batch_size, options['RATE_LIMIT'])
+        queued = []
+        unqueued = []
+        for message in email_messages:
+            if not message.recipients():
+                continue
+            data = serialize_message(message)
+            if data is None:
+                unqueued.append(message)
+                continue
+            queued.append(data)
+        for start in range(0, len(queued), batch_size):
+            enqueue(send_email, args=[queued[start:start + batch_size]])
+        sent = len(queued)
+        if unqueued:
+            connection = get_connection(
+                options['BACKEND'],
+                fail_silently=self.fail_silently,
+            )
+            sent += connection.send_messages(unqueued) or 0
+        return sent
@@ -0,0 +1,36 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Avg, Count, Max, Q
+from jobs.models import Job
+
+
+class Command(BaseCommand):
+    help = (
+        'Reports queued and failed jobs, and how long finished jobs waited '
+        'and ran, per task.'
+    )
+
+    def handle(self, *args, **options):
+        stats = Job.objects.values('task').annotate(
+            queued=Count('pk', filter=Q(status=Job.QUEUED)),
+            running=Count('pk', filter=Q(status=Job.RUNNING)),
+            done=Count('pk', filter=Q(status=Job.DONE)),
+            failed=Count('pk', filter=Q(status=Job.FAILED)),
+            avg_wait=Avg('wait_ms', filter=Q(status=Job.DONE)),
+            avg_duration=Avg('duration_ms', filter=Q(status=Job.DONE)),
+            max_duration=Max('duration_ms', filter=Q(status=Job.DONE)),
+        ).order_by('task')
+        if not stats:
+            self.stdout.write('No jobs have been queued yet.')
+            return
+        for row in stats:
+            self.stdout.write(
+                f"{row['task']}: {row['queued']} queued, "
+                f"{row['running']} running, {row['done']} done, "
+                f"{row['failed']} failed, "
+                f"wait {row['avg_wait'] or 0:.0f}ms, "
+                f"run {row['avg_duration'] or 0:.0f}ms "
+                f"(max {row['max_duration'] or 0}ms)"
+            )
+        self.stdout.write(self.style.SUCCESS(
+            f"Queue depth: {sum(row['queued'] for row in stats)} jobs"
+        ))
@@ -0,0 +1,80 @@
+import signal
+import threading
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+from jobs.mail import close_connection
+from jobs.queue import work, worker_name
+
+
+class Command(BaseCommand):
+    help = (
+        'Runs queued background jobs, such as emails, image transfers and '
+        'CDN purges, until stopped with SIGTERM or SIGINT.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--concurrency',
+            type=int,
+            default=1,
+            help='Number of jobs run at once, each in its own thread.',
+        )
+        parser.add_argument(
+            '--burst',
+            action='store_true',
+            help='Exit once no job is due instead of waiting for more.',
+        )
+        parser.add_argument(
+            '--max-jobs',
+            type=int,
+            default=None,
+            help='Exit after each thread has run this many jobs.',
+        )
+
+    def work_in_thread(self, stop, options, results):
+        try:
+            results.append(work(
+                worker=worker_name(),
+                stop=stop,
+                burst=options['burst'],
+                max_jobs=options['max_jobs'],
+            ))
+        finally:
+            # Worker threads open their own connections
+            connections.close_all()
+            close_connection()
+
+    def handle(self, *args, **options):
+        stop = threading.Event()
+
+        def shut_down(signum, frame):
+            # Jobs already running are finished first
+            stop.set()
+
+        handlers = {
+            signum: signal.signal(signum, shut_down)
+            for signum in (signal.SIGTERM, signal.SIGINT)
+        }
+        results = []
+        threads = [
+            threading.Thread(
+                target=self.work_in_thread,
+                args=(stop, options, results),
+                name=f'jobs-worker-{number}',
+            )
+            for number in range(options['concurrency'])
+        ]
+        for thread in threads:
+            thread.start()
+        try:
+            # Joining with a timeout keeps the main thread free for signals
+            while any(thread.is_alive() for thread in threads):
+                for thread in threads:
+                    thread.join(timeout=1)
+        finally:
+            for signum, handler in handlers.items():
+                signal.signal(signum, handler)
+        self.stdout.write(self.style.SUCCESS(
+            f'Ran {sum(results)} jobs with {len(threads)} workers'
+        ))
@@ -0,0 +1,61 @@
+from django.db import models
+from django.utils import timezone
+
+
+class Job(models.Model):
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUS_CHOICES = {
+        QUEUED: 'Queued',
+        RUNNING: 'Running',
+        DONE: 'Done',
+        FAILED: 'Failed',
+    }
+
+    # Dotted path of a function registered with jobs.queue.task
+    task = models.CharField(max_length=200)
+    args = models.JSONField(default=list, blank=True)
+    kwargs = models.JSONField(default=dict, blank=True)
+    # Higher priorities are claimed first
+    priority = models.SmallIntegerField(default=0)
+    status = models.CharField(
+        max_length=10, choices=STATUS_CHOICES, default=QUEUED
+    )
+    run_after = models.DateTimeField(default=timezone.now)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    max_attempts = models.PositiveSmallIntegerField(default=5)
+    # Seconds a run may take before it is taken to be abandoned by its
+    # worker, JOBS['LOCK_TIMEOUT'] when empty
+    timeout = models.PositiveIntegerField(null=True, blank=True)
+    # Only one queued job can hold a key, see jobs.queue.enqueue
+    idempotency_key = models.CharField(max_length=200, null=True, blank=True)
+    worker = models.CharField(max_length=100, blank=True)
+    last_error = models.TextField(blank=True)
+    # What the task returned when it finished
+    result = models.JSONField(null=True, blank=True)
+    created_on = models.DateTimeField(auto_now_add=True)
+    started_on = models.DateTimeField(null=True, blank=True)
+    finished_on = models.DateTimeField(null=True, blank=True)
+    # Timings of the latest attempt, in milliseconds
+    wait_ms = models.PositiveIntegerField(null=True, blank=True)
+    duration_ms = models.PositiveIntegerField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=['status', '-priority', 'run_after'],
+                name='jobs_claim_idx',
+            ),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=['idempotency_key'],
+                condition=models.Q(status='queued'),
+                name='jobs_unique_queued_key',
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.task} #{self.pk} | {self.status}'
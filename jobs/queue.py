@@ -0,0 +1,369 @@
+import logging
+import os
+import random
+import socket
+import threading
+import time
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import (
+    DatabaseError, IntegrityError, connection, connections, transaction
+)
+from django.db.models import F
+from django.utils import timezone
+from django.utils.module_loading import import_string
+from .models import Job
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_JOBS = {
+    # Run jobs as soon as they are enqueued, for tests and management
+    # commands
+    'EAGER': False,
+    'MAX_ATTEMPTS': 5,
+    # Retries wait BACKOFF_BASE seconds, doubling with every attempt up to
+    # BACKOFF_MAX, with jitter so failed jobs don't all retry together
+    'BACKOFF_BASE': 10,
+    'BACKOFF_MAX': 60 * 60,
+    # Seconds an idle worker waits before looking for due jobs again
+    'POLL_INTERVAL': 1,
+    # Running jobs older than this are taken to belong to a worker that
+    # died, unless their task sets a timeout of its own
+    'LOCK_TIMEOUT': 10 * 60,
+    # Finished jobs are kept this many seconds for the timing stats
+    'KEEP_DONE': 7 * 24 * 60 * 60,
+    'MAINTENANCE_INTERVAL': 5 * 60,
+}
+
+# Functions that can be run as jobs, by dotted path
+TASKS = {}
+
+_running = threading.local()
+
+
+class Retry(Exception):
+    """
+    Raised by a task to run again after ``delay`` seconds without counting
+    as a failed attempt, e.g. when a rate limit has been reached.
+    """
+
+    def __init__(self, delay):
+        super().__init__(f'Retrying in {delay:.0f}s')
+        self.delay = delay
+
+
+def jobs_settings():
+    """
+    Returns the JOBS setting merged over the defaults.
+    """
+    options = dict(DEFAULT_JOBS)
+    options.update(getattr(settings, 'JOBS', {}))
+    return options
+
+
+def task(func=None, *, priority=0, max_attempts=None, timeout=None):
+    """
+    Registers a function so it can be enqueued and run by the workers.
+    Jobs only store the function's dotted path, so its arguments and
+    return value have to be JSON serializable. Can be used with or without
+    arguments, e.g. ``@task(priority=10)``. Tasks that can legitimately run
+    longer than LOCK_TIMEOUT give their own ``timeout`` in seconds.
+    """
+    def register(func):
+        func.job_name = f'{func.__module__}.{func.__qualname__}'
+        func.job_priority = priority
+        func.job_max_attempts = max_attempts
+        func.job_timeout = timeout
+        TASKS[func.job_name] = func
+        return func
+    return register(func) if func is not None else register
+
+
+def get_task(name):
+    """
+    Returns the registered function for a job, importing its module first
+    if it hasn't been loaded in this process. Only functions registered
+    with task can be run, whatever a job row says.
+    """
+    if name not in TASKS:
+        import_string(name)
+    try:
+        return TASKS[name]
+    except KeyError:
+        raise LookupError(f'{name} is not a registered task') from None
+
+
+def current_job():
+    """
+    Returns the job this thread is running, or None outside of a task.
+    """
+    return getattr(_running, 'job', None)
+
+
+def backoff(attempts):
+    """
+    Returns the seconds to wait before retrying a job that has failed
+    ``attempts`` times.
+    """
+    options = jobs_settings()
+    delay = min(
+        options['BACKOFF_BASE'] * 2 ** (attempts - 1), options['BACKOFF_MAX']
+    )
+    return delay / 2 + random.uniform(0, delay / 2)
+
+
+def worker_name():
+    return f'{socket.gethostname()}:{os.getpid()}:{threading.get_ident()}'
+
+
+def enqueue(func, args=(), kwargs=None, *, priority=None,
+            idempotency_key=None, delay=None, max_attempts=None):
+    """
+    Queues a registered function to be run by a worker and returns the job.
+
+    The job is inserted in the current transaction, so workers only see it
+    once the changes it acts on have committed. While a job with the same
+    idempotency key is queued no other is added and the queued one is
+    returned instead, as it hasn't started yet and will see the latest
+    state when it runs.
+    """
+    options = jobs_settings()
+    job = Job(
+        task=func.job_name,
+        args=list(args),
+        kwargs=kwargs or {},
+        priority=func.job_priority if priority is None else priority,
+        idempotency_key=idempotency_key,
+        max_attempts=(
+            max_attempts or func.job_max_attempts or options['MAX_ATTEMPTS']
+        ),
+        timeout=func.job_timeout,
+    )
+    if delay:
+        job.run_after = timezone.now() + timedelta(seconds=delay)
+    for attempt in range(3):
+        try:
+            with transaction.atomic():
+                job.save()
+            break
+        except IntegrityError:
+            if idempotency_key is None or attempt == 2:
+                raise
+        queued = Job.objects.filter(
+            idempotency_key=idempotency_key, status=Job.QUEUED
+        ).first()
+        if queued is not None:
+            return queued
+        # The queued job was claimed in the meantime, so this one can go in
+    if options['EAGER'] and not delay and _start(job.pk, worker_name()):
+        job.refresh_from_db()
+        run_job(job)
+    return job
+
+
+def _start(job_id, worker):
+    # Conditional update, so of two workers racing for a job only one
+    # changes a row
+    started = timezone.now()
+    return Job.objects.filter(pk=job_id, status=Job.QUEUED).update(
+        status=Job.RUNNING,
+        worker=worker,
+        attempts=F('attempts') + 1,
+        started_on=started,
+        finished_on=None,
+    )
+
+
+def claim_job(worker):
+    """
+    Marks the most urgent due job as running for ``worker`` and returns it,
+    or None when no job is due.
+
+    Databases with SELECT ... FOR UPDATE SKIP LOCKED let workers pass over
+    rows that another worker is claiming instead of waiting on them. SQLite
+    serialises writes anyway, so there the first conditional update that
+    changes a row wins.
+    """
+    due = Job.objects.filter(
+        status=Job.QUEUED, run_after__lte=timezone.now()
+    ).order_by('-priority', 'run_after', 'pk')
+    if connection.features.has_select_for_update_skip_locked:
+        with transaction.atomic():
+            job = due.select_for_update(skip_locked=True).first()
+            if job is None:
+                return None
+            _start(job.pk, worker)
+    else:
+        for job_id in due.values_list('pk', flat=True)[:10]:
+            if _start(job_id, worker):
+                break
+        else:
+            return None
+        job = Job(pk=job_id)
+    job.refresh_from_db()
+    return job
+
+
+def _milliseconds(delta):
+    return max(0, round(delta.total_seconds() * 1000))
+
+
+def _requeue(job, delay):
+    job.status = Job.QUEUED
+    job.run_after = timezone.now() + timedelta(seconds=delay)
+    try:
+        with transaction.atomic():
+            job.save()
+        return True
+    except IntegrityError:
+        job.last_error += (
+            '\nNot retried, another job with the same key is queued.'
+        )
+        return False
+
+
+def _retry_or_fail(job, error):
+    job.last_error = error
+    if job.attempts < job.max_attempts and _requeue(
+        job, backoff(job.attempts)
+    ):
+        return
+    job.status = Job.FAILED
+    job.save()
+
+
+def run_job(job):
+    """
+    Runs a claimed job and records its outcome and timings. Failed jobs are
+    queued again with a backoff until they run out of attempts, jobs that
+    raise Retry without using up an attempt.
+    """
+    started = time.perf_counter()
+    job.wait_ms = _milliseconds(job.started_on - job.run_after)
+    _running.job = job
+    try:
+        result = get_task(job.task)(*job.args, **job.kwargs)
+    except Retry as retry:
+        job.attempts -= 1
+        job.last_error = str(retry)
+        if not _requeue(job, retry.delay):
+            job.status = Job.FAILED
+            job.save()
+        return
+    except Exception:
+        error = traceback.format_exc()
+    else:
+        error = None
+    finally:
+        _running.job = None
+    job.duration_ms = round((time.perf_counter() - started) * 1000)
+    job.finished_on = timezone.now()
+    if error is None:
+        job.status = Job.DONE
+        job.last_error = ''
+        job.result = result
+        job.save()
+        logger.info(
+            'Job %s #%s done in %dms after waiting %dms',
+            job.task, job.pk, job.duration_ms, job.wait_ms,
+        )
+        return
+    _retry_or_fail(job, error)
+    logger.log(
+        logging.WARNING if job.status == Job.QUEUED else logging.ERROR,
+        'Job %s #%s failed on attempt %d of %d\n%s',
+        job.task, job.pk, job.attempts, job.max_attempts, error,
+    )
+
+
+def _release_stale(job, cutoff, **fields):
+    # Conditional update, so a job whose worker finishes it or that another
+    # worker claims meanwhile is left alone
+    return Job.objects.filter(
+        pk=job.pk, status=Job.RUNNING, started_on__lt=cutoff
+    ).update(**fields)
+
+
+def requeue_stale_jobs():
+    """
+    Retries or fails jobs left running past their timeout by a worker that
+    stopped without finishing them, and returns how many.
+    """
+    now = timezone.now()
+    lock_timeout = jobs_settings()['LOCK_TIMEOUT']
+    released = 0
+    # Only as many jobs run at once as there are workers
+    for job in Job.objects.filter(status=Job.RUNNING):
+        cutoff = now - timedelta(seconds=job.timeout or lock_timeout)
+        if job.started_on >= cutoff:
+            continue
+        error = f'Worker {job.worker} stopped running the job.'
+        if job.attempts < job.max_attempts:
+            try:
+                with transaction.atomic():
+                    released += _release_stale(
+                        job, cutoff, status=Job.QUEUED, last_error=error,
+                        run_after=now + timedelta(
+                            seconds=backoff(job.attempts)
+                        ),
+                    )
+                continue
+            except IntegrityError:
+                error += (
+                    '\nNot retried, another job with the same key is queued.'
+                )
+        released += _release_stale(
+            job, cutoff, status=Job.FAILED, last_error=error
+        )
+    return released
+
+
+def prune_jobs():
+    """
+    Deletes finished jobs past KEEP_DONE. Failed jobs are kept for
+    inspection.
+    """
+    cutoff = timezone.now() - timedelta(seconds=jobs_settings()['KEEP_DONE'])
+    deleted, _ = Job.objects.filter(
+        status=Job.DONE, finished_on__lt=cutoff
+    ).delete()
+    return deleted
+
+
+def work(worker=None, stop=None, burst=False, max_jobs=None):
+    """
+    Claims and runs jobs until ``stop`` is set, or in burst mode until no
+    job is due. Returns the number of jobs run.
+    """
+    options = jobs_settings()
+    worker = worker or worker_name()
+    stop = stop or threading.Event()
+    ran = 0
+    maintained = None
+    while not stop.is_set() and (max_jobs is None or ran < max_jobs):
+        try:
+            if maintained is None or (
+                time.monotonic() - maintained
+                > options['MAINTENANCE_INTERVAL']
+            ):
+                requeue_stale_jobs()
+                prune_jobs()
+                maintained = time.monotonic()
+            job = claim_job(worker)
+        except DatabaseError:
+            if burst:
+                raise
+            logger.exception('Worker %s could not claim a job', worker)
+            connections.close_all()
+            stop.wait(options['POLL_INTERVAL'])
+            continue
+        if job is None:
+            if burst:
+                break
+            stop.wait(options['POLL_INTERVAL'])
+            continue
+        run_job(job)
+        ran += 1
+    return ran
@@ -0,0 +1,189 @@
+import socketserver
+import threading
+from django.core import mail
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from .mail import close_connection, send_email, serialize_message
+from .models import Job
+from .queue import enqueue, work
+
+
+class SMTPHandler(socketserver.StreamRequestHandler):
+    """
+    Stand-in for an SMTP server that accepts every message and records it.
+    """
+
+    def reply(self, line):
+        self.wfile.write(line.encode() + b'\r\n')
+
+    def handle(self):
+        self.server.connections += 1
+        self.reply('220 localhost ESMTP')
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            command = line.decode().strip().upper()
+            if command == 'DATA':
+                self.reply('354 End data with <CR><LF>.<CR><LF>')
+                lines = []
+                while (data := self.rfile.readline()) not in (b'.\r\n', b''):
+                    lines.append(data)
+                self.server.messages.append(b''.join(lines).decode())
+                self.reply('250 OK')
+            elif command == 'QUIT':
+                self.reply('221 Bye')
+                return
+            else:
+                self.reply('250 OK')
+
+
+class QueuedEmailTests(TestCase):
+    """
+    TestCase for queuing emails and delivering them from the workers over
+    a pooled SMTP connection.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.server = socketserver.ThreadingTCPServer(
+            ('127.0.0.1', 0), SMTPHandler
+        )
+        cls.server.daemon_threads = True
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+        super().tearDownClass()
+
+    def setUp(self):
+        self.server.connections = 0
+        self.server.messages = []
+        self.settings = self.settings(
+            EMAIL_BACKEND='jobs.mail.QueuedEmailBackend',
+            EMAIL_HOST='127.0.0.1',
+            EMAIL_PORT=self.server.server_address[1],
+            EMAIL_USE_TLS=False,
+            EMAIL_HOST_USER='',
+            EMAIL_HOST_PASSWORD='',
+            EMAIL_QUEUE={
+                'BACKEND': 'django.core.mail.backends.smtp.EmailBackend',
+            },
+            JOBS={'EAGER': False},
+        )
+        self.settings.enable()
+        self.addCleanup(self.settings.disable)
+        self.addCleanup(close_connection)
+
+    def send(self, count):
+        for number in range(count):
+            mail.send_mail(
+                f'Message {number}', 'Body', 'admin@example.com',
+                [f'user{number}@example.com'],
+            )
+
+    def test_signup_doesnt_wait_on_mail_server(self):
+        """
+        Tests whether signing up queues the verification email without
+        connecting to the mail server, and a worker then delivers it.
+        """
+        response = self.client.post(reverse('account_signup'), {
+            'username': 'newuser',
+            'email': 'newuser@example.com',
+            'password1': 'a-long-Passw0rd',
+            'password2': 'a-long-Passw0rd',
+        })
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(self.server.connections, 0)
+        self.assertEqual(
+            Job.objects.filter(
+                task=send_email.job_name, status=Job.QUEUED
+            ).count(),
+            1,
+        )
+
+        work(burst=True)
+        self.assertEqual(len(self.server.messages), 1)
+        self.assertIn('newuser@example.com', self.server.messages[0])
+
+    def test_messages_share_a_connection(self):
+        """
+        Tests whether a worker delivers queued messages back to back over a
+        single SMTP connection.
+        """
+        self.send(3)
+        self.assertEqual(work(burst=True), 3)
+        self.assertEqual(len(self.server.messages), 3)
+        self.assertEqual(self.server.connections, 1)
+
+    def test_messages_sent_together_are_one_job(self):
+        """
+        Tests whether the messages of one send are queued as a single job,
+        and a job queued with a single message is still delivered.
+        """
+        mail.send_mass_mail([
+            (f'Message {number}', 'Body', 'admin@example.com',
+             [f'user{number}@example.com'])
+            for number in range(3)
+        ])
+        self.assertEqual(Job.objects.count(), 1)
+        message = mail.EmailMessage(
+            'Old', 'Body', 'admin@example.com', ['old@example.com']
+        )
+        enqueue(send_email, args=[serialize_message(message)])
+        self.assertEqual(work(burst=True), 2)
+        self.assertEqual(len(self.server.messages), 4)
+        self.assertEqual(self.server.connections, 1)
+
+    @override_settings(EMAIL_QUEUE={'RATE_LIMIT': 2})
+    def test_rate_limit_defers_messages(self):
+        """
+        Tests whether messages over the rate limit are put back in the
+        queue for later without using up an attempt.
+        """
+        self.send(3)
+        work(burst=True)
+        self.assertEqual(len(self.server.messages), 2)
+        deferred = Job.objects.get(status=Job.QUEUED)
+        self.assertEqual(deferred.attempts, 0)
+        self.assertGreater(deferred.run_after, timezone.now())
+
+    @override_settings(EMAIL_QUEUE={'RATE_LIMIT': 2})
+    def test_rate_limit_counts_batches_being_sent(self):
+        """
+        Tests whether a batch another worker is still sending counts
+        towards the rate limit.
+        """
+        message = mail.EmailMessage(
+            'Sending', 'Body', 'admin@example.com', ['other@example.com']
+        )
+        Job.objects.create(
+            task=send_email.job_name,
+            args=[[serialize_message(message)] * 2],
+            status=Job.RUNNING,
+            started_on=timezone.now(),
+        )
+        self.send(1)
+        work(burst=True)
+        self.assertEqual(self.server.messages, [])
+        self.assertEqual(Job.objects.filter(status=Job.QUEUED).count(), 1)
+
+    @override_settings(EMAIL_QUEUE={'RATE_LIMIT': 2})
+    def test_rate_limit_counts_messages_sent(self):
+        """
+        Tests whether finished batches count the messages they sent rather
+        than the ones they were queued with.
+        """
+        self.send(1)
+        work(burst=True)
+        self.assertEqual(Job.objects.get().result, 1)
+        Job.objects.update(args=[[serialize_message(mail.EmailMessage(
+            'Partly sent', 'Body', 'admin@example.com', [address]
+        )) for address in ['a@example.com', 'b@example.com']]])
+        self.send(1)
+        work(burst=True)
+        self.assertEqual(len(self.server.messages), 2)
@@ -0,0 +1,206 @@
+from io import StringIO
+from unittest.mock import patch
+from django.core.management import call_command
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+from .models import Job
+from .queue import claim_job, enqueue, requeue_stale_jobs, task, work
+
+calls = []
+
+
+@task
+def record(value):
+    calls.append(value)
+
+
+@task(priority=5, max_attempts=2)
+def fail():
+    raise RuntimeError('Mail server unavailable')
+
+
+@task(timeout=3 * 60 * 60)
+def slow():
+    pass
+
+
+@override_settings(JOBS={'EAGER': False})
+class JobQueueTests(TestCase):
+    """
+    TestCase for queuing, claiming and retrying background jobs.
+    """
+
+    def setUp(self):
+        calls.clear()
+
+    def test_jobs_run_in_priority_order(self):
+        """
+        Tests whether workers claim the highest priority job first, and
+        record the job as done with its timings.
+        """
+        enqueue(record, args=['low'])
+        enqueue(record, args=['high'], priority=10)
+        self.assertEqual(work(burst=True), 2)
+        self.assertEqual(calls, ['high', 'low'])
+        job = Job.objects.get(args=['low'])
+        self.assertEqual(job.status, Job.DONE)
+        self.assertEqual(job.attempts, 1)
+        self.assertIsNotNone(job.duration_ms)
+        self.assertIsNotNone(job.wait_ms)
+
+    def test_idempotency_key_while_queued(self):
+        """
+        Tests whether a job isn't queued twice under the same key, but can
+        be queued again once the first one has run.
+        """
+        first = enqueue(record, args=[1], idempotency_key='record-1')
+        second = enqueue(record, args=[1], idempotency_key='record-1')
+        self.assertEqual(first.pk, second.pk)
+        work(burst=True)
+        third = enqueue(record, args=[1], idempotency_key='record-1')
+        self.assertNotEqual(third.pk, first.pk)
+        self.assertEqual(calls, [1])
+
+    def test_failed_jobs_back_off_then_fail(self):
+        """
+        Tests whether a failing job is retried after a delay, and marked as
+        failed once it runs out of attempts.
+        """
+        job = enqueue(fail)
+        with self.assertLogs('jobs.queue', 'WARNING'):
+            work(burst=True)
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.QUEUED)
+        self.assertGreater(job.run_after, timezone.now())
+        self.assertIn('Mail server unavailable', job.last_error)
+        self.assertIsNone(claim_job('test'))
+
+        Job.objects.filter(pk=job.pk).update(run_after=timezone.now())
+        with self.assertLogs('jobs.queue', 'ERROR'):
+            work(burst=True)
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.FAILED)
+        self.assertEqual(job.attempts, 2)
+
+    def test_stale_jobs_are_requeued(self):
+        """
+        Tests whether a job left running by a worker that died is queued
+        again.
+        """
+        job = enqueue(record, args=['stale'])
+        claim_job('dead-worker')
+        Job.objects.filter(pk=job.pk).update(
+            started_on=timezone.now() - timezone.timedelta(hours=1)
+        )
+        self.assertEqual(requeue_stale_jobs(), 1)
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.QUEUED)
+        self.assertIn('dead-worker', job.last_error)
+
+    def test_job_finished_meanwhile_is_not_requeued(self):
+        """
+        Tests whether a job that its worker finishes while stale jobs are
+        being requeued keeps its result instead of being run again.
+        """
+        job = enqueue(record, args=['slow'])
+        claim_job('slow-worker')
+        Job.objects.filter(pk=job.pk).update(
+            started_on=timezone.now() - timezone.timedelta(hours=1)
+        )
+
+        def finish(attempts):
+            Job.objects.filter(pk=job.pk).update(status=Job.DONE)
+            return 0
+
+        with patch('jobs.queue.backoff', side_effect=finish):
+            self.assertEqual(requeue_stale_jobs(), 0)
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.DONE)
+
+    def test_task_timeout_outlasts_lock_timeout(self):
+        """
+        Tests whether a job of a task with a long timeout isn't taken to be
+        abandoned once LOCK_TIMEOUT has passed.
+        """
+        job = enqueue(slow)
+        self.assertEqual(job.timeout, 3 * 60 * 60)
+        claim_job('busy-worker')
+        Job.objects.filter(pk=job.pk).update(
+            started_on=timezone.now() - timezone.timedelta(hours=1)
+        )
+        self.assertEqual(requeue_stale_jobs(), 0)
+        Job.objects.filter(pk=job.pk).update(
+            started_on=timezone.now() - timezone.timedelta(hours=4)
+        )
+        self.assertEqual(requeue_stale_jobs(), 1)
+
+    def test_key_claimed_while_queuing(self):
+        """
+        Tests whether a job is still queued when the job holding its key is
+        claimed between the failed insert and looking that job up.
+        """
+        first = enqueue(record, args=[1], idempotency_key='record-1')
+        lookup = Job.objects.filter
+        raced = []
+
+        def racing_lookup(*args, **kwargs):
+            if kwargs.get('idempotency_key') and not raced:
+                raced.append(True)
+                claim_job('other-worker')
+            return lookup(*args, **kwargs)
+
+        with patch.object(Job.objects, 'filter', racing_lookup):
+            second = enqueue(record, args=[1], idempotency_key='record-1')
+        self.assertNotEqual(second.pk, first.pk)
+        self.assertEqual(second.status, Job.QUEUED)
+
+    def test_unregistered_functions_are_not_run(self):
+        """
+        Tests whether a job naming a function that isn't a registered task
+        fails instead of running it.
+        """
+        job = Job.objects.create(
+            task='os.remove', args=['/tmp/nothing'], max_attempts=1
+        )
+        with self.assertLogs('jobs.queue', 'ERROR'):
+            work(burst=True)
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.FAILED)
+        self.assertIn('not a registered task', job.last_error)
+
+    @override_settings(JOBS={'EAGER': True})
+    def test_eager_jobs_run_when_queued(self):
+        """
+        Tests whether jobs run as soon as they are queued in eager mode.
+        """
+        job = enqueue(record, args=['now'])
+        self.assertEqual(calls, ['now'])
+        self.assertEqual(job.status, Job.DONE)
+
+
+@override_settings(JOBS={'EAGER': False})
+class RunWorkersCommandTests(TransactionTestCase):
+    """
+    TestCase for the run_workers and job_stats commands. Workers run in
+    threads with their own connections, so the jobs have to be committed.
+    """
+
+    def setUp(self):
+        calls.clear()
+
+    def test_burst(self):
+        """
+        Tests whether the workers run every due job and exit, and the stats
+        report the finished jobs.
+        """
+        for value in range(3):
+            enqueue(record, args=[value])
+        out = StringIO()
+        call_command('run_workers', burst=True, stdout=out)
+        self.assertIn('Ran 3 jobs', out.getvalue())
+        self.assertEqual(sorted(calls), [0, 1, 2])
+
+        out = StringIO()
+        call_command('job_stats', stdout=out)
+        self.assertIn('jobs.test_queue.record: 0 queued', out.getvalue())
+        self.assertIn('3 done', out.getvalue())
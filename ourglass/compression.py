@@ -0,0 +1,114 @@
+from django.conf import settings
+from django.middleware.gzip import GZipMiddleware, re_accepts_gzip
+from django.utils.cache import patch_vary_headers
+from django.utils.regex_helper import _lazy_re_compile
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+re_accepts_brotli = _lazy_re_compile(r'\bbr\b')
+
+DEFAULT_RESPONSE_COMPRESSION = {
+    # Smaller bodies fit in a single packet either way
+    'MIN_SIZE': 860,
+    'CONTENT_TYPES': (
+        'text/html',
+        'text/plain',
+        'text/css',
+        'text/csv',
+        'text/calendar',
+        'application/json',
+        'application/javascript',
+        'application/x-ndjson',
+    ),
+    'BROTLI_QUALITY': 5,
+    # What to do with pages that carry a CSRF token: 'pad' gzips them with
+    # a random length header, 'skip' sends them uncompressed
+    'CSRF_PAGES': 'pad',
+}
+
+
+def response_compression_settings():
+    """
+    Returns the RESPONSE_COMPRESSION setting merged over the defaults.
+    """
+    options = dict(DEFAULT_RESPONSE_COMPRESSION)
+    options.update(getattr(settings, 'RESPONSE_COMPRESSION', {}))
+    return options
+
+
+def _brotli_sequence(sequence, quality):
+    compressor = brotli.Compressor(quality=quality)
+    for item in sequence:
+        data = compressor.process(item)
+        if data:
+            yield data
+    yield compressor.finish()
+
+
+class CompressionMiddleware(GZipMiddleware):
+    """
+    Compresses text responses above a minimum size with Brotli, or gzip
+    for browsers without Brotli support.
+
+    Pages that carry a CSRF token are never sent with Brotli, as an
+    attacker who can inject text into them could otherwise recover the
+    token from the compressed size (BREACH). They are gzipped with Django's
+    random length filename padding instead, or left uncompressed when
+    CSRF_PAGES is 'skip'. Django also masks the token differently on every
+    request.
+    """
+
+    def process_response(self, request, response):
+        options = response_compression_settings()
+        content_type = response.get('Content-Type', '').split(';')[0]
+        if content_type.strip() not in options['CONTENT_TYPES']:
+            return response
+        if not response.streaming and (
+            len(response.content) < options['MIN_SIZE']
+        ):
+            return response
+        if response.has_header('Content-Encoding'):
+            return response
+
+        # CsrfViewMiddleware sets the cookie whenever the page used a token
+        carries_csrf_token = (
+            settings.CSRF_COOKIE_NAME in response.cookies
+            or request.META.get('CSRF_COOKIE_NEEDS_UPDATE')
+        )
+        if carries_csrf_token and options['CSRF_PAGES'] == 'skip':
+            return response
+        accept_encoding = request.META.get('HTTP_ACCEPT_ENCODING', '')
+        if (
+            carries_csrf_token
+            or brotli is None
+            or not re_accepts_brotli.search(accept_encoding)
+            or (response.streaming and response.is_async)
+        ):
+            if re_accepts_gzip.search(accept_encoding):
+                return super().process_response(request, response)
+            patch_vary_headers(response, ('Accept-Encoding',))
+            return response
+
+        patch_vary_headers(response, ('Accept-Encoding',))
+        if response.streaming:
+            response.streaming_content = _brotli_sequence(
+                response.streaming_content, options['BROTLI_QUALITY']
+            )
+            del response.headers['Content-Length']
+        else:
+            compressed_content = brotli.compress(
+                response.content, quality=options['BROTLI_QUALITY']
+            )
+            if len(compressed_content) >= len(response.content):
+                return response
+            response.content = compressed_content
+            response.headers['Content-Length'] = str(len(response.content))
+
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response.headers['ETag'] = 'W/' + etag
+        response.headers['Content-Encoding'] = 'br'
+        return response
@@ -11,7 +11,7 @@ https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
 from pathlib import Path
-import os, sys
+import os, sys, tempfile
 import dj_database_url
 if os.path.isfile('env.py'):
     import env
@@ -54,11 +54,14 @@ INSTALLED_APPS = [
     'contact',
     'crispy_forms',
     'crispy_bootstrap5',
+    'jobs',
 ]
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',
+    'ourglass.compression.CompressionMiddleware',
+    'events.cdn.CDNCacheMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -70,12 +73,27 @@ MIDDLEWARE = [
 
 ROOT_URLCONF = 'ourglass.urls'
 
+# Both loaders collapse the indentation of HTML templates as they read them
+TEMPLATE_LOADERS = [
+    'ourglass.templates.FilesystemLoader',
+    'ourglass.templates.AppDirectoriesLoader',
+]
+if not DEBUG:
+    # Keep compiled templates in memory for the life of the worker
+    TEMPLATE_LOADERS = [
+        ('django.template.loaders.cached.Loader', TEMPLATE_LOADERS),
+    ]
+
+# Compile every project template when a worker boots rather than on the
+# first request to use it
+PRECOMPILE_TEMPLATES = not DEBUG
+
 TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
         'DIRS': [TEMPLATES_DIR],
-        'APP_DIRS': True,
         'OPTIONS': {
+            'loaders': TEMPLATE_LOADERS,
             'context_processors': [
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
@@ -103,7 +121,111 @@ DATABASES = {
 }
 
 if 'test' in sys.argv:
-    DATABASES['default']['ENGINE'] = 'django.db.backends.sqlite3'
+    # Tests run on SQLite unless TEST_DATABASE_URL names a PostgreSQL
+    # database, which the booking partition tests need
+    if os.environ.get('TEST_DATABASE_URL'):
+        DATABASES['default'] = dj_database_url.parse(
+            os.environ['TEST_DATABASE_URL']
+        )
+    else:
+        DATABASES['default']['ENGINE'] = 'django.db.backends.sqlite3'
+
+# Stop slow queries before they tie up every worker
+DATABASE_STATEMENT_TIMEOUT = int(
+    os.environ.get('DATABASE_STATEMENT_TIMEOUT', 5000)
+)
+if DATABASES['default']['ENGINE'] == 'django.db.backends.postgresql':
+    DATABASES['default'].setdefault('OPTIONS', {}).update({
+        'connect_timeout': 5,
+        'options': f'-c statement_timeout={DATABASE_STATEMENT_TIMEOUT}',
+    })
+
+# Caching
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+# The file-based cache is shared by every gunicorn worker on a dyno.
+# It culls by deleting files at random once MAX_ENTRIES is reached, so it is
+# sized for the event objects, rendered pages, search pages and calendar
+# feeds it holds. Keys that are numerous and cheap to lose go in 'volatile'
+# instead, where they can't evict those.
+
+CACHE_MAX_ENTRIES = int(os.environ.get('CACHE_MAX_ENTRIES', 20000))
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.environ.get(
+            'CACHE_LOCATION',
+            os.path.join(tempfile.gettempdir(), 'ourglass_cache')
+        ),
+        'OPTIONS': {
+            'MAX_ENTRIES': CACHE_MAX_ENTRIES,
+            'CULL_FREQUENCY': 10,
+        },
+    },
+    'volatile': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.environ.get(
+            'VOLATILE_CACHE_LOCATION',
+            os.path.join(tempfile.gettempdir(), 'ourglass_volatile_cache')
+        ),
+        'OPTIONS': {
+            'MAX_ENTRIES': CACHE_MAX_ENTRIES,
+            'CULL_FREQUENCY': 4,
+        },
+    },
+}
+
+# Hot event objects - per-worker LRU in front of the shared cache
+EVENT_CACHE = {
+    'LOCAL_MAX_ENTRIES': 256,
+    'LOCAL_TTL': 30,
+    'SHARED_TTL': 300,
+    'NEGATIVE_CACHE_ALIAS': 'volatile',
+    'LOCK_DIR': os.environ.get(
+        'CACHE_LOCK_LOCATION',
+        os.path.join(tempfile.gettempdir(), 'ourglass_locks')
+    ),
+}
+
+# CDN caching of anonymous event pages, purged by surrogate key on changes.
+# Set CDN_PURGE_URL to the CDN's purge endpoint to enable purging.
+CDN = {
+    'S_MAXAGE': 300,
+    'STALE_WHILE_REVALIDATE': 60,
+}
+if os.environ.get('CDN_PURGE_URL'):
+    CDN.update({
+        'BACKEND': 'events.cdn.HTTPPurger',
+        'PURGE_URL': os.environ['CDN_PURGE_URL'],
+        'PURGE_HEADERS': {'Fastly-Key': os.environ.get('CDN_PURGE_TOKEN', '')},
+    })
+
+# Brotli or gzip compression of text responses, see ourglass/compression.py
+RESPONSE_COMPRESSION = {
+    'MIN_SIZE': 860,
+    'CSRF_PAGES': 'pad',
+}
+
+# Searches rendered by the warm_caches command, '' is the upcoming events list
+WARM_CACHES_SEARCH_QUERIES = ['']
+
+# Circuit breaker around the events read views
+CIRCUIT_BREAKER = {
+    'FAILURE_THRESHOLD': 5,
+    'RESET_TIMEOUT': 30,
+    'CACHE_ALIAS': 'volatile',
+}
+
+if 'test' in sys.argv:
+    # Test databases reuse ids between tests, so cached rows would go stale
+    CACHES = {
+        alias: {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': alias,
+        }
+        for alias in CACHES
+    }
+    EVENT_CACHE['ENABLED'] = False
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -145,6 +267,77 @@ STATICFILES_DIRS = [
 ]
 STATIC_ROOT = 'static_root'
 
+# Fingerprinted, Brotli and gzip precompressed static files. WhiteNoise
+# serves the hashed names with far-future, immutable Cache-Control headers.
+STORAGES = {
+    'default': {
+        'BACKEND': 'django.core.files.storage.FileSystemStorage',
+    },
+    'staticfiles': {
+        'BACKEND': 'whitenoise.storage.CompressedManifestStaticFilesStorage',
+    },
+}
+# Files without a hash in their name, such as favicons, are kept for a day
+WHITENOISE_MAX_AGE = 60 * 60 * 24
+
+if 'test' in sys.argv:
+    # Tests render templates without running collectstatic first
+    STORAGES['staticfiles'] = {
+        'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage',
+    }
+
+# Uploaded media, only used when images are served by LocalImageBackend
+MEDIA_URL = '/media/'
+MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
+
+# Event images - resized variants offered to browsers through srcset
+EVENT_IMAGES = {
+    'BACKEND': os.environ.get(
+        'EVENT_IMAGES_BACKEND', 'events.images.CloudinaryImageBackend'
+    ),
+    'WIDTHS': (320, 640, 960, 1280),
+    'DEFAULT_WIDTH': 640,
+    'MAX_DIMENSION': 2560,
+}
+
+# Event image uploads - validated and staged in the database during the
+# request, then transferred to the image backend by a job worker
+EVENT_UPLOADS = {
+    'MAX_BYTES': 10 * 1024 * 1024,
+    'MIN_DIMENSION': 200,
+    'STAGING_DIR': os.environ.get(
+        'UPLOAD_STAGING_DIR',
+        os.path.join(tempfile.gettempdir(), 'ourglass-uploads')
+    ),
+}
+
+# Stream anything but small uploads to a temporary file instead of memory
+FILE_UPLOAD_MAX_MEMORY_SIZE = 256 * 1024
+
+# Past events move to the archive tables this long after they took place,
+# see `manage.py archive_events`
+EVENT_ARCHIVE = {
+    'AFTER_DAYS': int(os.environ.get('EVENT_ARCHIVE_AFTER_DAYS', 365)),
+}
+
+# Bookings are range partitioned by event date on PostgreSQL, see
+# `manage.py booking_partitions`
+BOOKING_PARTITIONS = {
+    'MONTHS_AHEAD': 12,
+}
+
+# Background jobs - queued in the database and run by
+# `manage.py run_workers`
+JOBS = {
+    'MAX_ATTEMPTS': 5,
+    'BACKOFF_BASE': 10,
+    'POLL_INTERVAL': 1,
+}
+
+if 'test' in sys.argv:
+    # Jobs run as they are queued, so tests see their effects
+    JOBS['EAGER'] = True
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
@@ -164,8 +357,16 @@ AUTHENTICATION_BACKENDS = [
 ACCOUNT_SIGNUP_FIELDS = ['username*', 'email*', 'password1*', 'password2*']
 ACCOUNT_EMAIL_VERIFICATION = 'mandatory'
 
-# Email Backend for sending verification emails
-EMAIL_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
+# Email Backend for sending verification emails - messages are queued as
+# jobs and delivered over SMTP by the workers
+EMAIL_BACKEND = 'jobs.mail.QueuedEmailBackend'
+EMAIL_QUEUE = {
+    'BACKEND': 'django.core.mail.backends.smtp.EmailBackend',
+    # Stays well under Gmail's sending limits
+    'RATE_LIMIT': 20,
+    'IDLE_TIMEOUT': 60,
+}
+EMAIL_TIMEOUT = 10
 EMAIL_HOST = 'smtp.gmail.com'
 EMAIL_HOST_USER = os.environ.get('EMAIL_HOST_USER')
 EMAIL_HOST_PASSWORD = os.environ.get('EMAIL_HOST_PASSWORD')
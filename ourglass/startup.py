@@ -0,0 +1,23 @@
+import logging
+import time
+
+from django.urls import get_resolver
+from ourglass.templates import warm_templates
+
+logger = logging.getLogger(__name__)
+
+
+def warm_up():
+    """
+    Does the work Django would otherwise leave to the first request: the
+    URLconf is imported along with every view, form and widget module it
+    pulls in, and the templates are compiled. Run in the gunicorn master
+    with preload_app, forked workers share the result copy-on-write.
+    """
+    started = time.perf_counter()
+    get_resolver().url_patterns
+    logger.info(
+        'Imported the URLconf in %.0fms',
+        (time.perf_counter() - started) * 1000,
+    )
+    warm_templates()
@@ -0,0 +1,119 @@
+import logging
+import os
+import re
+import time
+
+from django.conf import settings
+from django.template import TemplateSyntaxError, engines
+from django.template.backends.django import DjangoTemplates
+from django.template.loaders import app_directories, filesystem
+from django.template.utils import get_app_template_dirs
+
+logger = logging.getLogger(__name__)
+
+TEMPLATE_EXTENSIONS = ('.html', '.txt')
+
+# Blocks whose whitespace is significant, kept exactly as written
+PRESERVED_BLOCKS = re.compile(
+    r'(<(pre|textarea|script|style)\b.*?</\2\s*>)',
+    re.DOTALL | re.IGNORECASE,
+)
+INDENTATION = re.compile(r'[ \t]*\n\s*')
+
+
+def collapse_whitespace(source):
+    """
+    Removes indentation and blank lines from HTML template source, leaving
+    a single newline wherever there was a line break so that inline content
+    keeps its spacing. Preformatted, textarea, script and style blocks are
+    left alone.
+    """
+    parts = PRESERVED_BLOCKS.split(source)
+    # split() returns the text between blocks, each block and its tag name
+    for index in range(0, len(parts), 3):
+        parts[index] = INDENTATION.sub('\n', parts[index])
+    return ''.join(
+        part for index, part in enumerate(parts) if index % 3 != 2
+    )
+
+
+class CollapseWhitespaceMixin:
+    """
+    Collapses the whitespace of HTML templates as they are read, so it is
+    done once per template by the cached loader rather than per request.
+    """
+
+    def get_contents(self, origin):
+        contents = super().get_contents(origin)
+        if origin.name.endswith('.html'):
+            return collapse_whitespace(contents)
+        return contents
+
+
+class FilesystemLoader(CollapseWhitespaceMixin, filesystem.Loader):
+    pass
+
+
+class AppDirectoriesLoader(CollapseWhitespaceMixin, app_directories.Loader):
+    pass
+
+
+def project_template_names(engine):
+    """
+    Returns the names of the templates in the project's own template
+    directories, leaving out those shipped inside third party packages.
+    """
+    base_dir = str(settings.BASE_DIR)
+    names = set()
+    # The app directories loader is configured explicitly, so the engine's
+    # template_dirs doesn't list the app template directories
+    directories = [*engine.dirs, *get_app_template_dirs('templates')]
+    for directory in directories:
+        directory = str(directory)
+        if not directory.startswith(base_dir) or not os.path.isdir(directory):
+            continue
+        for root, _, files in os.walk(directory):
+            for filename in files:
+                if filename.endswith(TEMPLATE_EXTENSIONS):
+                    path = os.path.join(root, filename)
+                    names.add(os.path.relpath(path, directory))
+    return sorted(name.replace(os.sep, '/') for name in names)
+
+
+def compile_templates():
+    """
+    Loads every project template through the configured loaders, so that
+    the cached loader holds them compiled before the first request. Returns
+    a list of (name, seconds, error) for each template.
+    """
+    timings = []
+    for engine in engines.all():
+        if not isinstance(engine, DjangoTemplates):
+            continue
+        for name in project_template_names(engine):
+            started = time.perf_counter()
+            error = None
+            try:
+                engine.get_template(name)
+            except TemplateSyntaxError as exception:
+                error = exception
+            timings.append((name, time.perf_counter() - started, error))
+    return timings
+
+
+def warm_templates():
+    """
+    Compiles the project templates when PRECOMPILE_TEMPLATES is set and
+    logs how long it took.
+    """
+    if not getattr(settings, 'PRECOMPILE_TEMPLATES', False):
+        return []
+    timings = compile_templates()
+    skipped = sum(1 for _, _, error in timings if error)
+    logger.info(
+        'Compiled %d templates in %.0fms, %d skipped',
+        len(timings) - skipped,
+        sum(seconds for _, seconds, _ in timings) * 1000,
+        skipped,
+    )
+    return timings
@@ -14,3 +14,9 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'ourglass.settings')
 
 application = get_wsgi_application()
+
+from ourglass.startup import warm_up  # noqa: E402
+
+# Set by the profile_imports command so the warm up is not counted
+if not os.environ.get('OURGLASS_SKIP_WARM_UP'):
+    warm_up()
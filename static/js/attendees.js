@@ -0,0 +1,30 @@
+/**
+ * Loads the attendee list of an event into the event page when the
+ * organiser asks for it, and swaps in other pages of it in place
+ */
+document.addEventListener('DOMContentLoaded', function () {
+	const list = document.getElementById('attendee-list');
+	if (!list) {
+		return;
+	}
+	list.addEventListener('click', function (event) {
+		const link = event.target.closest('#load-attendees, .page-link[href]');
+		if (!link) {
+			return;
+		}
+		event.preventDefault();
+		fetch(link.href, { headers: { 'X-Requested-With': 'XMLHttpRequest' } })
+			.then(function (response) {
+				if (!response.ok || response.redirected) {
+					throw new Error(response.statusText);
+				}
+				return response.text();
+			})
+			.then(function (html) {
+				list.innerHTML = html;
+			})
+			.catch(function () {
+				window.location.href = link.href;
+			});
+	});
+});
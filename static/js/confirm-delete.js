@@ -0,0 +1,11 @@
+/**
+ * Enables Delete Button Functionality
+ */
+document.addEventListener('DOMContentLoaded', function () {
+	const deleteButton = document.getElementById('confirm-delete');
+	if (deleteButton) {
+		deleteButton.addEventListener('click', function () {
+			document.getElementById('delete-form').submit();
+		});
+	}
+});
@@ -0,0 +1,10 @@
+/**
+ * Attaches flatpickr date and time pickers to the event date fields
+ */
+document.addEventListener('DOMContentLoaded', function () {
+	flatpickr('.flatpickr', {
+		enableTime:  true,
+		dateFormat: 'Y-m-d\\TH:i',
+		locale: 'uk'
+	});
+});
@@ -0,0 +1,15 @@
+/**
+ * Converts the numerical value for user ratings into star icons from
+ * FontAwesome
+ */
+document.addEventListener('DOMContentLoaded', function () {
+	const ratings = document.querySelectorAll('.review-rating');
+	ratings.forEach((element) => {
+		const rating = parseInt(element.dataset.rating);
+		let starsHtml = '';
+		for (let i = 0; i < rating; i++) {
+			starsHtml += "<i class='fa-solid fa-star text-warning'></i>";
+		}
+		element.innerHTML = starsHtml;
+	});
+});
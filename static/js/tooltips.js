@@ -0,0 +1,11 @@
+/**
+ * Bootstrap required code to initialize tooltips
+ */
+document.addEventListener('DOMContentLoaded', function () {
+	const tooltipTriggerList = document.querySelectorAll(
+		'[data-bs-toggle=tooltip]'
+	);
+	const tooltipList = [...tooltipTriggerList].map(
+		(tooltipTriggerEl) => new bootstrap.Tooltip(tooltipTriggerEl)
+	);
+});